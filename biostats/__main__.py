@@ -1,3 +1,5 @@
+import multiprocessing
+
 from biostats import app
 
 def main():
@@ -5,4 +7,5 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
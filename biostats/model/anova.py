@@ -1,11 +1,14 @@
 import pandas as pd
+import numpy as np
 from scipy import stats as st
 
-from statsmodels.formula.api import ols
-from statsmodels.stats.anova import anova_lm
 from statsmodels.multivariate.manova import MANOVA
+from scipy import linalg
+from patsy import dmatrix
 
-from biostats.model.util import _CC, _process, _add_p
+from biostats.model.util import _CC, _process, _add_p, _read_stats, _pairing, _result
+from biostats.model.t_test import _group_summary
+from biostats.model.basic import _read
 
 def one_way_anova(data, variable, between):
     '''
@@ -18,7 +21,7 @@ def one_way_anova(data, variable, between):
     variable : :py:class:`str`
         The numeric variable that we want to calculate mean values of.
     between : :py:class:`str`
-        The categorical variable that specifies which group the samples belong to. Maximum 20 groups.
+        The categorical variable that specifies which group the samples belong to. There is no limit on the number of groups.
 
     Returns
     -------
@@ -101,51 +104,96 @@ def one_way_anova(data, variable, between):
 
     '''
 
+    # Read the columns as they are, without converting the whole data.
     data = data[list({variable, between})].dropna()
-    _process(data, num=[variable], cat=[between])
-
-    if str(data[variable].dtypes) not in ("float64", "Int64"):
+    try:
+        values = data[variable].to_numpy(dtype=np.float64)
+    except:
         raise Warning("The column '{}' must be numeric".format(variable))
-    if data[between].nunique() > 20:
-        raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(between))
 
-    group = data[between].dropna().unique()
+    # The count, sum and sum of squares of every group, from the group codes.
+    (code, group) = pd.factorize(data[between], sort=False)
+    n = np.bincount(code, minlength=len(group)).astype(np.float64)
+    mean = np.bincount(code, values, minlength=len(group)) / n
+    dev = values - mean[code]
+    np.multiply(dev, dev, out=dev)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(np.bincount(code, dev, minlength=len(group)) / (n - 1))
 
-    summary = pd.DataFrame()
+    return _one_way_anova(between, list(group), n, mean, std)
 
-    for x in group:
-        n = _CC(lambda: data[data[between]==x][variable].dropna().count())
-        mean = _CC(lambda: data[data[between]==x][variable].dropna().mean())
-        std = _CC(lambda: data[data[between]==x][variable].dropna().std())
-        sem = _CC(lambda: data[data[between]==x][variable].dropna().sem())
-        temp = pd.DataFrame(
-            {
-                "{}".format(between): _CC(lambda: x),
-                "Count": _CC(lambda: n),
-                "Mean": _CC(lambda: mean),
-                "Std. Deviation": _CC(lambda: std),
-                "95% CI: Lower" : _CC(lambda: st.t.ppf(0.025, n-1, mean, sem)) ,
-                "95% CI: Upper" : _CC(lambda: st.t.ppf(0.975, n-1, mean, sem)) ,
-            }, index=[0]
-        )
-        summary = pd.concat([summary, temp], ignore_index=True)
-    summary.index += 1
-
-    formula = "Q('%s') ~ " % variable
-    formula += "C(Q('%s'))" % between
-    model = ols(formula, data=data).fit()
-    result = anova_lm(model)
-    result = result.rename(columns={
-        'df': 'D.F.',
-        'sum_sq' : 'Sum Square',
-        'mean_sq' : 'Mean Square',
-        'F' : 'F Statistic',
-        'PR(>F)' : 'p-value'
-    })
-    result = result.rename(index={
-        "C(Q('%s'))" % between : between
-    })
-    _add_p(result)
+
+def one_way_anova_stats(data, between, count, mean, std):
+    '''
+    Test whether the mean values of a variable are different between several groups, from their counts, mean values and standard deviations.
+
+    Parameters
+    ----------
+    data : :py:class:`pandas.DataFrame`
+        The summary of the input data, one row per group. Must contain a categorical column and the counts, mean values and standard deviations of the groups.
+    between : :py:class:`str`
+        The categorical variable that specifies the groups. There is no limit on the number of groups.
+    count : :py:class:`str`
+        The column of the counts.
+    mean : :py:class:`str`
+        The column of the mean values.
+    std : :py:class:`str`
+        The column of the sample standard deviations. May be empty for groups of one sample.
+
+    Returns
+    -------
+    summary : :py:class:`pandas.DataFrame`
+        The counts, mean values, standard deviations, and confidence intervals of each group.
+    result : :py:class:`pandas.DataFrame`
+        The degree of freedom, sum of squares, mean of squares, F statistic, and p-value of the test.
+
+    See also
+    --------
+    one_way_anova : The same test on the raw data.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> data = bs.dataset("one_way_anova.csv")
+    >>> stats = data.groupby("Location", sort=False)["Length"].agg(["count", "mean", "std"]).reset_index()
+    >>> summary, result = bs.one_way_anova_stats(data=stats, between="Location", count="count", mean="mean", std="std")
+    >>> result
+              D.F.  Sum Square  Mean Square  F Statistic   p-value     
+    Location     4    0.004520     0.001130     7.121019  0.000281  ***
+    Residual    34    0.005395     0.000159          NaN       NaN  NaN
+
+    The same as :py:func:`one_way_anova` on the raw data, where the counts, mean values and standard deviations could come from a database.
+
+    '''
+
+    (group, n, m, sd) = _read_stats(data, count, mean, std, between)
+
+    return _one_way_anova(between, group, n, m, sd)
+
+def _one_way_anova(between, group, n, mean, std):
+
+    summary = _group_summary(between, group, n, mean, std)
+
+    # The sums of squares between and within the groups follow from the counts,
+    # means and standard deviations alone.
+    (df_1, df_2) = (len(group) - 1, n.sum() - len(group))
+    grand = (n * mean).sum() / n.sum()
+    ss_1 = (n * (mean - grand) ** 2).sum()
+    ss_2 = np.where(n > 1, (n - 1) * std ** 2, 0).sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        (ms_1, ms_2) = (ss_1 / df_1, ss_2 / df_2)
+        F = ms_1 / ms_2
+    p = _CC(st.f.sf, F, df_1, df_2)
+
+    result = _result(
+        {
+            "D.F." : [df_1, df_2] ,
+            "Sum Square" : [ss_1, ss_2] ,
+            "Mean Square" : [ms_1, ms_2] ,
+            "F Statistic" : [F, np.nan] ,
+            "p-value" : [p, np.nan]
+        }, index=[between, "Residual"]
+    ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -153,6 +201,17 @@ def one_way_anova(data, variable, between):
     return summary, result
 
 
+def _cell(data, by, variable, cell):
+
+    # The count, mean value and standard deviation of every variable in every
+    # cell, from one groupby, with the cells that have no samples counted as zero.
+    stats = data.groupby(by, sort=False)[variable].agg(["count", "mean", "std"]).reindex(cell)
+    result = {}
+    for var in variable:
+        n = stats[(var, "count")].fillna(0).to_numpy(dtype=np.float64)
+        result[var] = (n, stats[(var, "mean")].to_numpy(dtype=np.float64), stats[(var, "std")].to_numpy(dtype=np.float64))
+    return result
+
 def two_way_anova(data, variable, between_1, between_2):
     '''
     Test whether the mean values of a variable are different between several groups, when the groups are classified in two ways.
@@ -261,48 +320,23 @@ def two_way_anova(data, variable, between_1, between_2):
     group_1 = data[between_1].dropna().unique()
     group_2 = data[between_2].dropna().unique()
 
-    summary = pd.DataFrame()
-
-    for x in group_1:
-        for y in group_2:
-            n = _CC(lambda: data[(data[between_1]==x) & (data[between_2]==y)][variable].dropna().count())
-            mean = _CC(lambda: data[(data[between_1]==x) & (data[between_2]==y)][variable].dropna().mean())
-            std = _CC(lambda: data[(data[between_1]==x) & (data[between_2]==y)][variable].dropna().std())
-            sem = _CC(lambda: data[(data[between_1]==x) & (data[between_2]==y)][variable].dropna().sem())
-            temp = pd.DataFrame(
-                {
-                    "{}".format(between_1): _CC(lambda: x),
-                    "{}".format(between_2): _CC(lambda: y),
-                    "Count": _CC(lambda: n),
-                    "Mean": _CC(lambda: mean),
-                    "Std. Deviation": _CC(lambda: std),
-                    "95% CI: Lower" : _CC(lambda: st.t.ppf(0.025, n-1, mean, sem)) ,
-                    "95% CI: Upper" : _CC(lambda: st.t.ppf(0.975, n-1, mean, sem)) ,
-                }, index=[0]
-            )
-            summary = pd.concat([summary, temp], ignore_index=True)
-    summary.index += 1
-
-    formula = "Q('%s') ~ " % variable
-    formula += "C(Q('%s'), Sum) * " % between_1
-    formula += "C(Q('%s'), Sum)" % between_2
-    model = ols(formula, data=data).fit()
-    result = anova_lm(model)
-    result = result.rename(columns={
-        'df': 'D.F.',
-        'sum_sq' : 'Sum Square',
-        'mean_sq' : 'Mean Square',
-        'F' : 'F Statistic',
-        'PR(>F)' : 'p-value'
-    })
-    index_change = {}
-    for index in result.index:
-        changed = index
-        changed = changed.replace("C(Q('%s'), Sum)" % between_1, between_1)
-        changed = changed.replace("C(Q('%s'), Sum)" % between_2, between_2)
-        changed = changed.replace(":", " : ")
-        index_change[index] = changed
-    result = result.rename(index_change)
+    cell = pd.MultiIndex.from_product([group_1, group_2])
+    (n, mean, std) = _cell(data, [between_1, between_2], [variable], cell)[variable]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sem = std / np.sqrt(n)
+        summary = _result(
+            {
+                "{}".format(between_1): cell.get_level_values(0),
+                "{}".format(between_2): cell.get_level_values(1),
+                "Count": n,
+                "Mean": mean,
+                "Std. Deviation": std,
+                "95% CI: Lower" : st.t.ppf(0.025, n-1, mean, sem) ,
+                "95% CI: Upper" : st.t.ppf(0.975, n-1, mean, sem) ,
+            }
+        ).build(start=1)
+
+    result = anova_design(data, [between_1, between_2]).single(data, variable)
     _add_p(result)
 
     _process(summary)
@@ -426,46 +460,19 @@ def one_way_ancova(data, variable, between, covariable):
 
     group = data[between].dropna().unique()
 
-    summary = pd.DataFrame()
-
-    for x in group:
-        n = _CC(lambda: data[data[between]==x][[variable, covariable]].dropna()[variable].count())
-        mean_1 = _CC(lambda: data[data[between]==x][[variable, covariable]].dropna()[variable].mean())
-        std_1 = _CC(lambda: data[data[between]==x][[variable, covariable]].dropna()[variable].std())
-        mean_2 = _CC(lambda: data[data[between]==x][[variable, covariable]].dropna()[covariable].mean())
-        std_2 = _CC(lambda: data[data[between]==x][[variable, covariable]].dropna()[covariable].std())
-        temp = pd.DataFrame(
-            {
-                "{}".format(between): x,
-                "Count": n,
-                "Mean ({})".format(variable): _CC(lambda: mean_1),
-                "Std. ({})".format(variable): _CC(lambda: std_1),
-                "Mean ({})".format(covariable): _CC(lambda: mean_2),
-                "Std. ({})".format(covariable): _CC(lambda: std_2),
-            }, index=[0]
-        )
-        summary = pd.concat([summary, temp], ignore_index=True)
-    summary.index += 1
-
-    formula = "Q('%s') ~ " % variable
-    formula += "C(Q('%s'), Sum) + " % between
-    formula += "Q('%s')" % covariable
-    model = ols(formula, data=data).fit()
-
-    result = anova_lm(model, typ=2)
-    result = result.rename(columns={
-        'df': 'D.F.',
-        'sum_sq' : 'Sum Square',
-        'F' : 'F Statistic',
-        'PR(>F)' : 'p-value'
-    })
-    index_change = {}
-    for index in result.index:
-        changed = index
-        changed = changed.replace("C(Q('%s'), Sum)" % between, between)
-        changed = changed.replace("Q('%s')" % covariable, covariable)
-        index_change[index] = changed
-    result = result.rename(index_change)
+    stats = _cell(data, between, [variable, covariable], pd.Index(group))
+    summary = _result(
+        {
+            "{}".format(between): group,
+            "Count": stats[variable][0],
+            "Mean ({})".format(variable): stats[variable][1],
+            "Std. ({})".format(variable): stats[variable][2],
+            "Mean ({})".format(covariable): stats[covariable][1],
+            "Std. ({})".format(covariable): stats[covariable][2],
+        }
+    ).build(start=1)
+
+    result = anova_design(data, [between], covariable).single(data, variable)
     _add_p(result)
 
     _process(summary)
@@ -587,54 +594,21 @@ def two_way_ancova(data, variable, between_1, between_2, covariable):
     group_1 = data[between_1].dropna().unique()
     group_2 = data[between_2].dropna().unique()
 
-    summary = pd.DataFrame()
-
-
-    summary = pd.DataFrame()
-
-    for x in group_1:
-        for y in group_2:
-            n = _CC(lambda: data[(data[between_1]==x) & (data[between_2]==y)][[variable, covariable]].dropna()[variable].count())
-            mean_1 = _CC(lambda: data[(data[between_1]==x) & (data[between_2]==y)][[variable, covariable]].dropna()[variable].mean())
-            std_1 = _CC(lambda: data[(data[between_1]==x) & (data[between_2]==y)][[variable, covariable]].dropna()[variable].std())
-            mean_2 = _CC(lambda: data[(data[between_1]==x) & (data[between_2]==y)][[variable, covariable]].dropna()[covariable].mean())
-            std_2 = _CC(lambda: data[(data[between_1]==x) & (data[between_2]==y)][[variable, covariable]].dropna()[covariable].std())
-            temp = pd.DataFrame(
-                {
-                    "{}".format(between_1): _CC(lambda: x),
-                    "{}".format(between_2): _CC(lambda: y),
-                    "Count": _CC(lambda: n),
-                    "Mean ({})".format(variable): _CC(lambda: mean_1),
-                    "Std. ({})".format(variable): _CC(lambda: std_1),
-                    "Mean ({})".format(covariable): _CC(lambda: mean_2),
-                    "Std. ({})".format(covariable): _CC(lambda: std_2),
-                }, index=[0]
-            )
-            summary = pd.concat([summary, temp], ignore_index=True)
-    summary.index += 1
-
-    formula = "Q('%s') ~ " % variable
-    formula += "C(Q('%s'), Sum) * " % between_1
-    formula += "C(Q('%s'), Sum) + " % between_2
-    formula += "Q('%s')" % covariable
-    model = ols(formula, data=data).fit()
-
-    result = anova_lm(model, typ=2)
-    result = result.rename(columns={
-        'df': 'D.F.',
-        'sum_sq' : 'Sum Square',
-        'F' : 'F Statistic',
-        'PR(>F)' : 'p-value'
-    })
-    index_change = {}
-    for index in result.index:
-        changed = index
-        changed = changed.replace("C(Q('%s'), Sum)" % between_1, between_1)
-        changed = changed.replace("C(Q('%s'), Sum)" % between_2, between_2)
-        changed = changed.replace("Q('%s')" % covariable, covariable)
-        changed = changed.replace(":", " : ")
-        index_change[index] = changed
-    result = result.rename(index_change)
+    cell = pd.MultiIndex.from_product([group_1, group_2])
+    stats = _cell(data, [between_1, between_2], [variable, covariable], cell)
+    summary = _result(
+        {
+            "{}".format(between_1): cell.get_level_values(0),
+            "{}".format(between_2): cell.get_level_values(1),
+            "Count": stats[variable][0],
+            "Mean ({})".format(variable): stats[variable][1],
+            "Std. ({})".format(variable): stats[variable][2],
+            "Mean ({})".format(covariable): stats[covariable][1],
+            "Std. ({})".format(covariable): stats[covariable][2],
+        }
+    ).build(start=1)
+
+    result = anova_design(data, [between_1, between_2], covariable).single(data, variable)
     _add_p(result)
 
     _process(summary)
@@ -714,16 +688,12 @@ def multivariate_anova(data, variable, between):
 
     group = data[between].dropna().unique().tolist()
 
-    summary = pd.DataFrame({between:group})
+    stats = _cell(data, between, variable, pd.Index(group))
+    summary = _result({between: group})
     for var in variable:
-        mean = []
-        std = []
-        for x in group:
-            mean.append(_CC(lambda: data[data[between]==x][var].dropna().mean()))
-            std.append(_CC(lambda: data[data[between]==x][var].dropna().std()))
-        summary["Mean ({})".format(var)] = mean
-        summary["Std. ({})".format(var)] = std  
-    summary.index += 1 
+        summary.column["Mean ({})".format(var)] = stats[var][1]
+        summary.column["Std. ({})".format(var)] = stats[var][2]
+    summary = summary.build(start=1)
 
     formula = ""
     for var in variable:
@@ -732,22 +702,21 @@ def multivariate_anova(data, variable, between):
     formula += " ~ {}".format(between)
     fit = MANOVA.from_formula(formula, data=data)
     table = pd.DataFrame((fit.mv_test().results[between]['stat']))
-    result = pd.DataFrame(
+    result = _result(
         {
             "D.F." : _CC(lambda: len(group)-1) ,
             "Pillai's Trace" : _CC(lambda: table.iloc[1][0]) ,
             "F Statistic" : _CC(lambda: table.iloc[1][3]) ,
             "p-value" : _CC(lambda: table.iloc[1][4])
         }, index=[between]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
 
     return summary, result
 
-def repeated_measures_anova(data, variable, between, subject):
+def repeated_measures_anova(data, variable, between, subject, sphericity=False):
     '''
     Test whether the mean values of a variable are different between several groups on repeated measured data.
 
@@ -760,14 +729,16 @@ def repeated_measures_anova(data, variable, between, subject):
     between : :py:class:`str`
         The categorical variable that specifies which group the samples belong to. Maximum 20 groups.
     subject : :py:class:`str`
-        The variable that specifies the subject ID. Samples measured on the same subject should have the same ID. Maximum 2000 subjects.
+        The variable that specifies the subject ID. Samples measured on the same subject should have the same ID. There is no limit on the number of subjects.
+    sphericity : :py:class:`bool`
+        Whether to also test the sphericity of the groups, and correct the test for its violation.
 
     Returns
     -------
     summary : :py:class:`pandas.DataFrame`
         The counts, mean values, standard deviations, and confidence intervals of each group.
     result : :py:class:`pandas.DataFrame`
-        The degree of freedom, sum of squares, mean of squares, F statistic, and p-value of the test.
+        The degree of freedom, sum of squares, mean of squares, F statistic, and p-value of the test. With sphericity, also the test with the degrees of freedom corrected by Greenhouse-Geisser, and a row with the W statistic, chi-square statistic, degree of freedom, and p-value of Mauchly's test, and the epsilon of Greenhouse-Geisser.
 
     See also
     --------
@@ -820,77 +791,324 @@ def repeated_measures_anova(data, variable, between, subject):
 
     The p-value < 0.001, so the mean values of *response* in each group are significantly different.
 
+    >>> summary, result = bs.repeated_measures_anova(data=data, variable="response", between="drug", subject="patient", sphericity=True)
+    >>> result
+                                        D.F.  Sum Square  Mean Square  F Statistic  Mauchly W  Chi Square  G-G Epsilon   p-value     
+    drug                            3.000000       698.2   232.733333    24.758865        NaN         NaN          NaN  0.000020  ***
+    Residual                       12.000000       112.8     9.400000          NaN        NaN         NaN          NaN       NaN  NaN
+    drug (Greenhouse-Geisser)       1.814622       698.2   384.763302    24.758865        NaN         NaN          NaN  0.000649  ***
+    Residual (Greenhouse-Geisser)   7.258488       112.8    15.540426          NaN        NaN         NaN          NaN       NaN  NaN
+    Mauchly's Test                  5.000000         NaN          NaN          NaN   0.186495    4.571562     0.604874  0.470366  NaN
+
+    The p-value of Mauchly's test > 0.05, so there is no significant violation of sphericity.
+
     '''
 
+    # Read the columns as they are, without converting the whole data.
     data = data[list({variable, between, subject})].dropna()
-    _process(data, num=[variable], cat=[between, subject])
-
-    if str(data[variable].dtypes) not in ("float64", "Int64"):
+    try:
+        values = data[variable].to_numpy(dtype=np.float64)
+    except:
         raise Warning("The column '{}' must be numeric".format(variable))
     if data[between].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(between))
-    if data[subject].nunique() > 2000:
-        raise Warning("The nmuber of classes in column '{}' cannot > 2000.".format(subject))
-
-    cross = pd.crosstab(index=data[subject], columns=data[between])
-    for col in cross:
-        cross = cross.drop(cross[cross[col] != 1].index)
-    sub = cross.index.values.tolist()
-    data = data[data[subject].isin(sub)]
-    
-    group = data[between].dropna().unique()
-
-    summary = pd.DataFrame()
 
-    for x in group:
-        n = _CC(lambda: data[data[between]==x][variable].dropna().count())
-        mean = _CC(lambda: data[data[between]==x][variable].dropna().mean())
-        std = _CC(lambda: data[data[between]==x][variable].dropna().std())
-        sem = _CC(lambda: data[data[between]==x][variable].dropna().sem())
-        temp = pd.DataFrame(
+    # Keep the subjects measured exactly once in every group, and lay them out as
+    # a matrix of subjects by groups.
+    (index, group) = _pairing(data, subject, between)
+
+    return _repeated_measures_anova(between, group, values[index], sphericity)
+
+def _repeated_measures_anova(between, group, Y, sphericity):
+
+    (s, k) = Y.shape
+    n = np.full(k, s, dtype=np.float64)
+    mean = Y.mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = Y.std(axis=0, ddof=1)
+    summary = _group_summary(between, group, n, mean, std)
+
+    # The sums of squares of the groups, and of the error left once the means of
+    # the subjects and of the groups are taken out.
+    grand = Y.mean() if Y.size > 0 else np.nan
+    sub = Y.mean(axis=1, keepdims=True)
+    (df_1, df_2) = (k - 1, (k - 1) * (s - 1))
+    SS_1 = s * ((mean - grand) ** 2).sum()
+    SS_2 = ((Y - sub - mean + grand) ** 2).sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        (MS_1, MS_2) = (SS_1 / df_1, SS_2 / df_2)
+        F = MS_1 / MS_2
+    p = _CC(st.f.sf, F, df_1, df_2)
+
+    # With sphericity, the columns of Mauchly's test go before the p-value, and
+    # are left empty in the rows of the F tests.
+    column = {
+        "D.F." : [df_1, df_2] ,
+        "Sum Square" : [SS_1, SS_2] ,
+        "Mean Square" : [MS_1, MS_2] ,
+        "F Statistic" : [F, None]
+    }
+    if sphericity:
+        column.update({"Mauchly W" : [None, None], "Chi Square" : [None, None], "G-G Epsilon" : [None, None]})
+    column["p-value"] = [p, None]
+    result = _result(column, index = [between, "Residual"])
+
+    if sphericity:
+        # Mauchly's test on the covariance of orthonormal contrasts of the groups,
+        # and the epsilon of Greenhouse-Geisser from its eigenvalues.
+        C = np.linalg.qr(np.eye(k) - 1 / k)[0][:, :k-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            M = C.T @ np.cov(Y, rowvar=False).reshape(k, k) @ C
+            eig = np.linalg.eigvalsh(M)
+            W = np.prod(eig / eig.mean())
+            eps = eig.sum() ** 2 / (df_1 * (eig ** 2).sum())
+            df = df_1 * (df_1 + 1) / 2 - 1
+            chi2 = -(s - 1 - (2 * df_1 ** 2 + df_1 + 2) / (6 * df_1)) * np.log(W)
+        p_ = _CC(st.chi2.sf, chi2, df) if df > 0 else np.nan
+
+        result.add(
             {
-                "{}".format(between): _CC(lambda: x),
-                "Count": _CC(lambda: n),
-                "Mean": _CC(lambda: mean),
-                "Std. Deviation": _CC(lambda: std),
-                "95% CI: Lower" : _CC(lambda: st.t.ppf(0.025, n-1, mean, sem)) ,
-                "95% CI: Upper" : _CC(lambda: st.t.ppf(0.975, n-1, mean, sem)) ,
-            }, index=[0]
+                "D.F." : eps * df_1 ,
+                "Sum Square" : SS_1 ,
+                "Mean Square" : SS_1 / (eps * df_1) ,
+                "F Statistic" : F ,
+                "Mauchly W" : None ,
+                "Chi Square" : None ,
+                "G-G Epsilon" : None ,
+                "p-value" : _CC(st.f.sf, F, eps * df_1, eps * df_2)
+            }, index = "{} (Greenhouse-Geisser)".format(between)
+        )
+        result.add(
+            {
+                "D.F." : eps * df_2 ,
+                "Sum Square" : SS_2 ,
+                "Mean Square" : SS_2 / (eps * df_2) ,
+                "F Statistic" : None ,
+                "Mauchly W" : None ,
+                "Chi Square" : None ,
+                "G-G Epsilon" : None ,
+                "p-value" : None
+            }, index = "Residual (Greenhouse-Geisser)"
+        )
+        result.add(
+            {
+                "D.F." : df ,
+                "Sum Square" : None ,
+                "Mean Square" : None ,
+                "F Statistic" : None ,
+                "Mauchly W" : W ,
+                "Chi Square" : chi2 ,
+                "G-G Epsilon" : eps ,
+                "p-value" : p_
+            }, index = "Mauchly's Test"
         )
-        summary = pd.concat([summary, temp], ignore_index=True)
-    summary.index += 1
-
-    formula = "Q('%s') ~ " % variable
-    formula += "C(Q('%s'))" % between
-    model = ols(formula, data=data).fit()
-    anova_1 = anova_lm(model)
-    formula = "Q('%s') ~ " % variable
-    formula += "C(Q('%s'))" % subject
-    model = ols(formula, data=data).fit()
-    anova_2 = anova_lm(model)
-
-    df_1 = _CC(lambda: anova_1.iloc[0][0])
-    df_2 = _CC(lambda: df_1 * anova_2.iloc[0][0])
-    SS_1 = _CC(lambda: anova_1.iloc[0][1])
-    SS_2 = _CC(lambda: anova_2.iloc[1][1] - SS_1)
-    MS_1 = _CC(lambda: SS_1 / df_1)
-    MS_2 = _CC(lambda: SS_2 / df_2)
-    F = _CC(lambda: MS_1 / MS_2)
-    p = _CC(lambda: 1 - st.f.cdf(F, df_1, df_2))
-
-    result = pd.DataFrame(
-        {
-            "D.F." : [df_1, df_2] ,
-            "Sum Square" : [SS_1, SS_2] ,
-            "Mean Square" : [MS_1, MS_2] ,
-            "F Statistic" : [F, None] ,
-            "p-value" : [p, None]
-        }, index = [between, "Residual"]
-    )
-    _add_p(result)
+
+    result = result.build(p=True)
 
     _process(summary)
     _process(result)
 
     return summary, result
 
+class design_state:
+
+    def __init__(self, X, name, factor, index, row, size, typ):
+        self.X = X
+        self.name = name
+        self.factor = factor
+        self.index = index
+        self.row = row
+        self.size = size
+        self.typ = typ
+
+        # The columns of the models compared for every term but the intercept:
+        # the terms before it for type I sums of squares, and the terms that do
+        # not contain it for type II.
+        self.compare = []
+        for i in range(1, len(name)):
+            if typ == 1:
+                reduced = list(range(i))
+            else:
+                reduced = [j for j in range(len(name)) if j != i and not factor[i] < factor[j]]
+            self.compare.append((self.column(reduced), self.column(reduced + [i])))
+        self.full = self.column(range(len(name)))
+        self.cache = {}
+
+    def column(self, term):
+        return tuple(sorted(c for i in term for c in self.index[i]))
+
+    def basis(self, keep, column):
+
+        # An orthonormal basis of the columns, from a pivoted QR that leaves out
+        # the columns that depend on the others, kept for later responses.
+        key = (keep.tobytes(), column)
+        if key not in self.cache:
+            X = self.X[keep][:, list(column)]
+            if X.shape[1] == 0:
+                self.cache[key] = X
+            else:
+                (Q, R, _) = linalg.qr(X, mode="economic", pivoting=True)
+                d = np.abs(np.diag(R))
+                self.cache[key] = Q[:, :(d > d[0] * max(X.shape) * np.finfo(np.float64).eps).sum()]
+        return self.cache[key]
+
+    def calc(self, Y):
+
+        # The sums of squares of every term for all the responses, with one
+        # product per model for the responses missing the same samples.
+        (m, k) = (len(Y), len(self.compare))
+        SS = np.full((m, k + 1), np.nan)
+        df = np.full((m, k + 1), np.nan)
+        valid = ~np.isnan(Y)
+        packed = np.packbits(valid, axis=1)
+        packed = np.ascontiguousarray(packed).view(np.dtype((np.void, packed.shape[1]))).ravel()
+        (_, first, inverse) = np.unique(packed, return_index=True, return_inverse=True)
+        for (u, keep) in enumerate(valid[first]):
+            which = np.flatnonzero(inverse.ravel() == u)
+            y = Y[which][:, keep]
+            rss = {}
+            for column in set(c for pair in self.compare for c in pair) | {self.full}:
+                Q = self.basis(keep, column)
+                e = y - (y @ Q) @ Q.T
+                rss[column] = ((e * e).sum(axis=1), Q.shape[1])
+            for (i, (reduced, full)) in enumerate(self.compare):
+                SS[which, i] = rss[reduced][0] - rss[full][0]
+                df[which, i] = rss[full][1] - rss[reduced][1]
+            SS[which, k] = rss[self.full][0]
+            df[which, k] = keep.sum() - rss[self.full][1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            MS = SS / df
+            F = MS[:, :k] / MS[:, k:]
+        return SS, df, MS, F, st.f.sf(F, df[:, :k], df[:, k:])
+
+    def table(self, SS, df, MS, F, p):
+        F = np.append(F, np.nan)
+        p = np.append(p, np.nan)
+        if self.typ == 1:
+            column = {"D.F.": df, "Sum Square": SS, "Mean Square": MS, "F Statistic": F, "p-value": p}
+        else:
+            column = {"Sum Square": SS, "D.F.": df, "F Statistic": F, "p-value": p}
+        return _result(column, index=self.name[1:] + ["Residual"]).build()
+
+    def single(self, data, variable):
+        Y = _read(data, [variable])[:, self.row]
+        return self.table(*[x[0] for x in self.calc(Y)])
+
+    def fit(self, data, variable):
+        '''
+        Fit the design to many numeric responses at once.
+
+        Parameters
+        ----------
+        data : :py:class:`pandas.DataFrame`
+            The data the design was made from, with the same rows.
+        variable : :py:class:`list`
+            The list of numeric responses. Missing values are left out of the fit of their response only.
+
+        Returns
+        -------
+        result : :py:class:`pandas.DataFrame`
+            One row per response and term, with the degrees of freedom, sums of squares, F statistic, and p-value.
+        '''
+
+        if len(data) != self.size:
+            raise Warning("The data must have the same rows as the design.")
+        variable = list(dict.fromkeys(variable))
+        Y = _read(data, variable)[:, self.row]
+        (SS, df, MS, F, p) = self.calc(Y)
+
+        k = len(self.name) - 1
+        F = np.hstack([F, np.full((len(F), 1), np.nan)])
+        p = np.hstack([p, np.full((len(p), 1), np.nan)])
+        column = {"Variable": np.repeat(variable, k + 1), "Term": np.tile(self.name[1:] + ["Residual"], len(variable))}
+        if self.typ == 1:
+            column.update({"D.F.": df.ravel(), "Sum Square": SS.ravel(), "Mean Square": MS.ravel()})
+        else:
+            column.update({"Sum Square": SS.ravel(), "D.F.": df.ravel()})
+        column.update({"F Statistic": F.ravel(), "p-value": p.ravel()})
+        result = _result(column).build(start=1, p=True)
+
+        _process(result)
+
+        return result
+
+
+def anova_design(data, between, covariable=None):
+    '''
+    Set up the design of an ANOVA or ANCOVA once, to test many responses with it.
+
+    Parameters
+    ----------
+    data : :py:class:`pandas.DataFrame`
+        The input data. Must contain at least one categorical column.
+    between : :py:class:`list`
+        One or two categorical variables that specify which group the samples belong to. Two variables are crossed, with their interaction.
+    covariable : :py:class:`str`
+        The numeric variable to be controlled, if any.
+
+    Returns
+    -------
+    design : :py:class:`object`
+        The factorized design. Call ``design.fit(data, variable)`` with a list of responses to get the ANOVA table of each.
+
+    See also
+    --------
+    two_way_anova : Test whether the mean values of a variable are different between the groups of two factors.
+    one_way_ancova : Test whether the mean values of a variable are different between several groups, controlling a covariable.
+    two_way_ancova : Test whether the mean values of a variable are different between the groups of two factors, controlling a covariable.
+
+    Notes
+    -----
+    The design matrix is built and factorized once for each model compared, and all the responses are fitted with one product per model, so the tables of thousands of responses cost about as much as one.
+    Without a covariable the sums of squares are sequential (type I), as in :py:func:`two_way_anova`, and with one they are of type II, as in :py:func:`one_way_ancova` and :py:func:`two_way_ancova`.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> data = bs.dataset("two_way_ancova.csv")
+    >>> design = bs.anova_design(data=data, between=["Sex", "Genotype"], covariable="Age")
+    >>> result = design.fit(data=data, variable=["Activity"])
+    >>> result
+       Variable            Term  Sum Square  D.F.  F Statistic   p-value      
+    1  Activity             Sex    0.018057     1     0.023349  0.879612  <NA>
+    2  Activity        Genotype    0.113591     2     0.073441  0.929363  <NA>
+    3  Activity  Sex : Genotype    0.727884     2     0.470606  0.629311  <NA>
+    4  Activity             Age    1.286714     1     1.663822  0.207280  <NA>
+    5  Activity        Residual   22.427109    29          NaN       NaN  <NA>
+
+    The same table as the one of :py:func:`two_way_ancova`, one block of rows per response.
+
+    '''
+
+    if isinstance(between, str):
+        between = [between]
+    between = list(between)
+    column = between + ([covariable] if covariable is not None else [])
+    keep = data[list(dict.fromkeys(column))].notna().all(axis=1).to_numpy()
+    row = np.flatnonzero(keep)
+    data = data[keep]
+
+    formula = " * ".join("C(Q('%s'), Sum)" % x for x in between)
+    frame = pd.DataFrame({x: data[x].astype("object") for x in between})
+    if covariable is not None:
+        try:
+            frame[covariable] = data[covariable].to_numpy(dtype=np.float64)
+        except:
+            raise Warning("The column '{}' must be numeric".format(covariable))
+        formula += " + Q('%s')" % covariable
+    X = dmatrix(formula, frame)
+    info = X.design_info
+
+    name = []
+    for term in info.term_names:
+        changed = term
+        for x in between:
+            changed = changed.replace("C(Q('%s'), Sum)" % x, x)
+        if covariable is not None:
+            changed = changed.replace("Q('%s')" % covariable, covariable)
+        name.append(changed.replace(":", " : "))
+    factor = [frozenset(term.factors) for term in info.terms]
+
+    index = [range(x.start, x.stop) for x in info.term_slices.values()]
+
+    return design_state(np.asarray(X), name, factor, index, row, len(keep), 1 if covariable is None else 2)
@@ -1,9 +1,493 @@
 import pandas as pd
 import numpy as np
+import copy
 from scipy import stats as st
+from scipy import sparse
 from statsmodels.stats.proportion import proportion_confint
 
-from biostats.model.util import _CC, _process, _add_p
+from biostats.model.util import _CC, _process, _add_p, _weight
+
+# Columns are summarized in blocks of about _BLOCK values, which bounds the
+# memory taken by the sorted copy.
+_BLOCK = 2 ** 24
+
+class describe:
+
+    def __init__(self, values, group=None):
+        self.values = values
+        self.group = group
+
+    def calc(self):
+
+        # One row per statistic and one column per variable, or per group when
+        # the group codes of the values are given, with empty rows between the
+        # sections, in the order of the result of numeric.
+        if self.group is not None:
+            return self.segment(np.asarray(self.values, dtype=np.float64), np.asarray(self.group, dtype=np.int64))
+        values = np.asarray(self.values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, None]
+        step = max(1, _BLOCK // max(1, len(values)))
+        return np.hstack(
+            [self.block(values[:, i:i+step]) for i in range(0, values.shape[1], step)]
+            or [np.zeros((26, 0))]
+        )
+
+    def block(self, values):
+
+        # Copy the variables into rows and sort them once, so that the missing
+        # values are moved to the end of every row, and read the order statistics
+        # off the sorted buffer. The sums run along the rows, pairwise as in np.sum.
+        x = values.T.copy()
+        if x.shape[1] == 0:
+            x = np.full((len(x), 1), np.nan)
+        x.sort(axis=1)
+        n = (~np.isnan(x)).sum(axis=1)
+        valid = np.arange(x.shape[1]) < n[:, None]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = np.where(valid, x, 0)
+            mean = value.sum(axis=1) / n
+            value -= mean[:, None]
+            value[~valid] = 0
+            ss = np.where(n > 0, np.einsum("ij,ij->i", value, value), np.nan)
+            var = ss / (n - 1)
+            std = np.sqrt(var)
+            pvar = ss / n
+
+            # The geometric and harmonic means are 0 with a zero, and undefined
+            # with a negative value, which the minimum tells.
+            value = np.where(valid, x, 1)
+            gmean = np.exp(np.log(value).sum(axis=1) / n)
+            hmean = n / ((1 / value).sum(axis=1) - (x.shape[1] - n))
+            hmean[x[:, 0] == 0] = 0
+            hmean[x[:, 0] < 0] = np.nan
+
+            sem = np.sqrt(var / n)
+            quant = [self.quantile(x, n, q) for q in (0, 0.25, 0.5, 0.75, 1)]
+            ci = [st.t.ppf(q, n - 1, mean, sem) for q in (0.025, 0.975, 0.050, 0.950)]
+
+        empty = np.full(len(n), np.nan)
+        return np.array(
+            [n, mean, quant[2], gmean, hmean, self.mode(x, n), empty]
+            + [var, std, std / mean, pvar, np.sqrt(pvar), empty]
+            + quant + [quant[4] - quant[0], quant[3] - quant[1], empty]
+            + [sem] + ci
+        )
+
+    def segment(self, values, group):
+
+        # Sort the values by group once, and reduce every segment at once. The
+        # missing values are dropped first, and groups without values are kept.
+        keep = ~np.isnan(values)
+        size = group.max(initial=-1) + 1
+        (x, code) = (values[keep], group[keep])
+        order = np.lexsort((x, code))
+        (x, code) = (x[order], code[order])
+        n = np.bincount(code, minlength=size)
+        start = np.cumsum(n) - n
+        full = n > 0
+
+        def total(y):
+            out = np.zeros(size)
+            out[full] = np.add.reduceat(y, start[full]) if len(y) > 0 else 0
+            return out
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = total(x) / n
+            ss = np.where(full, total((x - mean[code]) ** 2), np.nan)
+            var = ss / (n - 1)
+            std = np.sqrt(var)
+            pvar = ss / n
+
+            # The geometric and harmonic means are 0 with a zero, and undefined
+            # with a negative value, which the minimum tells.
+            low = np.where(full, x[np.minimum(start, len(x) - 1)] if len(x) > 0 else np.nan, np.nan)
+            gmean = np.exp(total(np.log(np.maximum(x, 0))) / n)
+            hmean = n / total(1 / x)
+            gmean[low == 0] = 0
+            hmean[low == 0] = 0
+            gmean[low < 0] = np.nan
+            hmean[low < 0] = np.nan
+
+            sem = np.sqrt(var / n)
+            quant = [self.quantile(x, n, q, start) for q in (0, 0.25, 0.5, 0.75, 1)]
+            ci = [st.t.ppf(q, n - 1, mean, sem) for q in (0.025, 0.975, 0.050, 0.950)]
+
+        # The mode is the first of the longest runs of equal values in a segment.
+        mode = np.full(size, np.nan)
+        if len(x) > 0:
+            first = np.flatnonzero(np.concatenate([[True], (x[1:] != x[:-1]) | (code[1:] != code[:-1])]))
+            length = np.diff(np.append(first, len(x)))
+            seg = code[first]
+            top = np.zeros(size, dtype=np.int64)
+            np.maximum.at(top, seg, length)
+            best = np.flatnonzero(length == top[seg])
+            (_, pick) = np.unique(seg[best], return_index=True)
+            mode[seg[best[pick]]] = x[first[best[pick]]]
+
+        empty = np.full(size, np.nan)
+        return np.array(
+            [n, mean, quant[2], gmean, hmean, mode, empty]
+            + [var, std, std / mean, pvar, np.sqrt(pvar), empty]
+            + quant + [quant[4] - quant[0], quant[3] - quant[1], empty]
+            + [sem] + ci
+        )
+
+    def quantile(self, x, n, q, start=None):
+
+        # Linear interpolation between the order statistics, as np.percentile,
+        # in the sorted rows, or in the sorted segments from their starts.
+        pos = q * np.maximum(n - 1, 0)
+        low = np.floor(pos).astype(np.int64)
+        high = np.minimum(low + 1, np.maximum(n - 1, 0))
+        if start is None:
+            row = np.arange(len(x))
+            value = x[row, low] + (x[row, high] - x[row, low]) * (pos - low)
+        elif len(x) == 0:
+            value = np.full(len(n), np.nan)
+        else:
+            (low, high) = (np.minimum(start + low, len(x) - 1), np.minimum(start + high, len(x) - 1))
+            value = x[low] + (x[high] - x[low]) * (pos - np.floor(pos))
+        return np.where(n > 0, value, np.nan)
+
+    def mode(self, x, n):
+
+        # The longest run of equal values in each sorted row, found by where the
+        # run of every value starts. Ties go to the smallest value, as st.mode, so
+        # a row without repeated values gives its minimum.
+        mode = x[:, 0].copy()
+        row = np.flatnonzero((x[:, 1:] == x[:, :-1]).any(axis=1))
+        if len(row) == 0:
+            return mode
+        (x, n) = (x[row], n[row])
+        col = np.arange(x.shape[1])
+        start = np.ones(x.shape, dtype=bool)
+        start[:, 1:] = x[:, 1:] != x[:, :-1]
+        length = col - np.maximum.accumulate(np.where(start, col, 0), axis=1) + 1
+        length[col >= n[:, None]] = 0
+        mode[row] = x[np.arange(len(row)), length.argmax(axis=1)]
+        return mode
+
+# A streamed summary keeps every value until it has more than _SKETCH of a
+# variable, and then a sketch of _SKETCH weighted centroids for the quantiles
+# and a uniform sample of _SKETCH values for the mode.
+_SKETCH = 4096
+
+class numeric_state:
+
+    def __init__(self, values, label, group=None, grouped=False, rng=None):
+
+        # One entry per variable, the columns of the values, or per group, when
+        # the group codes of the values are given.
+        x = np.asarray(values, dtype=np.float64)
+        if group is None:
+            x = x.reshape(len(x), len(label))
+            column = [x[:, i] for i in range(x.shape[1])]
+        else:
+            group = np.asarray(group, dtype=np.int64)
+            order = np.argsort(group, kind="stable")
+            column = np.split(x[order], np.cumsum(np.bincount(group, minlength=len(label)))[:-1])
+        self.label = list(label)
+        self.grouped = grouped
+
+        # The sufficient statistics: the moments of Welford and Chan, extremes and
+        # sums for the other means. The values themselves go into the sketches,
+        # each with a random key, so that the sample of the smallest keys stays
+        # uniform however it is merged.
+        rng = rng or np.random.default_rng()
+        size = len(self.label)
+        (self.n, self.mean, self.m2) = (np.zeros(size, dtype=np.int64), np.zeros(size), np.zeros(size))
+        (self.min, self.max) = (np.full(size, np.inf), np.full(size, -np.inf))
+        (self.log, self.inv) = (np.zeros(size), np.zeros(size))
+        (self.sketch, self.sample) = ([], [])
+        for (i, y) in enumerate(column):
+            y = np.sort(y[~np.isnan(y)])
+            if len(y) > 0:
+                self.n[i] = len(y)
+                self.mean[i] = y.mean()
+                self.m2[i] = ((y - self.mean[i]) ** 2).sum()
+                (self.min[i], self.max[i]) = (y[0], y[-1])
+                self.log[i] = np.log(y[y > 0]).sum()
+                self.inv[i] = (1 / y[y != 0]).sum()
+            self.sketch.append(_compress(y, np.ones(len(y))))
+            key = rng.random(len(y))
+            keep = np.argsort(key)[:_SKETCH]
+            self.sample.append((y[keep], key[keep]))
+
+    @property
+    def exact(self):
+        return self.n <= _SKETCH
+
+    def __add__(self, other):
+
+        # Line both up on the union of their labels, with empty entries for the
+        # labels one of them lacks, and merge them into a new state.
+        if self.grouped != other.grouped:
+            raise Warning("Only the states of the same function can be added.")
+        label = self.label + [x for x in other.label if x not in set(self.label)]
+        (a, b) = (self.align(label), other.align(label))
+
+        # Combine the moments as Chan et al., and the sketches by merging and
+        # compressing them again.
+        new = copy.copy(a)
+        new.n = a.n + b.n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta = b.mean - a.mean
+            frac = np.where(new.n > 0, b.n / new.n, 0)
+            new.m2 = a.m2 + b.m2 + delta ** 2 * a.n * frac
+            new.mean = a.mean + delta * frac
+        new.min = np.minimum(a.min, b.min)
+        new.max = np.maximum(a.max, b.max)
+        new.log = a.log + b.log
+        new.inv = a.inv + b.inv
+        (new.sketch, new.sample) = ([], [])
+        for i in range(len(label)):
+            (v, w) = (np.concatenate([a.sketch[i][0], b.sketch[i][0]]), np.concatenate([a.sketch[i][1], b.sketch[i][1]]))
+            order = np.argsort(v, kind="stable")
+            new.sketch.append(_compress(v[order], w[order]))
+            (v, k) = (np.concatenate([a.sample[i][0], b.sample[i][0]]), np.concatenate([a.sample[i][1], b.sample[i][1]]))
+            keep = np.argsort(k)[:_SKETCH]
+            new.sample.append((v[keep], k[keep]))
+        return new
+
+    def __radd__(self, other):
+        # So that sum() can start from 0.
+        if isinstance(other, int) and other == 0:
+            return self
+        return other + self
+
+    def align(self, label):
+        if label == self.label:
+            return self
+        pos = {x: i for (i, x) in enumerate(self.label)}
+        idx = np.array([pos.get(x, -1) for x in label], dtype=np.int64)
+        have = idx >= 0
+        new = copy.copy(self)
+        new.label = list(label)
+        for (name, fill) in (("n", 0), ("mean", 0), ("m2", 0), ("min", np.inf), ("max", -np.inf), ("log", 0), ("inv", 0)):
+            value = getattr(self, name)
+            setattr(new, name, np.where(have, value[np.maximum(idx, 0)] if len(value) > 0 else fill, fill).astype(value.dtype))
+        empty = (np.zeros(0), np.zeros(0))
+        new.sketch = [self.sketch[i] if i >= 0 else empty for i in idx]
+        new.sample = [self.sample[i] if i >= 0 else empty for i in idx]
+        return new
+
+    def result(self):
+
+        # The table of numeric, or of numeric_grouped.
+        index = ["Count", "Mean", "Median", "Geometric Mean", "Harmonic Mean", "Mode"]
+        index += ["", "Variance", "Std. Deviation", "Coef. Variation", "(Population) Variance", "(Population) Std.Dev"]
+        index += ["", "Minimum", "25% Percentile", "50% Percentile", "75% Percentile", "Maximum", "Range", "Interquartile Range"]
+        if self.grouped:
+            index += ["", "Std. Error", "95% CI: Lower", "95% CI: Upper", "(One-Tail) 95% CI: Lower", "(One-Tail) 95% CI: Upper"]
+        else:
+            index += ["", "Std. Error", "95% CI: Lower", "95% CI: Upper", "(One-Sided) 95% CI: Lower", "(One-Sided) 95% CI: Upper"]
+        result = pd.DataFrame(self.calc(), index=index, columns=self.label)
+        result.attrs["approximate"] = [x for (x, exact) in zip(self.label, self.exact) if not exact]
+
+        _process(result)
+
+        return result
+
+    def calc(self):
+
+        # The table of numeric, from the sufficient statistics. The quantiles and
+        # the mode are exact as long as every value is kept.
+        n = self.n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(n > 0, self.mean, np.nan)
+            ss = np.where(n > 0, self.m2, np.nan)
+            var = ss / (n - 1)
+            std = np.sqrt(var)
+            pvar = ss / n
+            gmean = np.exp(self.log / n)
+            hmean = n / self.inv
+            low = np.where(n > 0, self.min, np.nan)
+            gmean[low == 0] = 0
+            hmean[low == 0] = 0
+            gmean[low < 0] = np.nan
+            hmean[low < 0] = np.nan
+            sem = np.sqrt(var / n)
+            ci = [st.t.ppf(q, n - 1, mean, sem) for q in (0.025, 0.975, 0.050, 0.950)]
+
+        quant = np.array([[_quantile(v, w, q) for (v, w) in self.sketch] for q in (0, 0.25, 0.5, 0.75, 1)]).reshape(5, len(n))
+        quant[0] = low
+        quant[4] = np.where(n > 0, self.max, np.nan)
+        mode = np.array([_mode(v) for (v, _) in self.sample])
+
+        empty = np.full(len(n), np.nan)
+        return np.array(
+            [n, mean, quant[2], gmean, hmean, mode, empty]
+            + [var, std, std / mean, pvar, np.sqrt(pvar), empty]
+            + list(quant) + [quant[4] - quant[0], quant[3] - quant[1], empty]
+            + [sem] + ci
+        )
+
+def _compress(value, weight):
+
+    # Merge sorted weighted values into at most _SKETCH centroids of about equal
+    # weight, keeping every value while they are few enough.
+    if len(value) <= _SKETCH:
+        return value, weight
+    cum = np.cumsum(weight) - weight
+    bucket = np.floor(cum * _SKETCH / weight.sum()).astype(np.int64)
+    first = np.flatnonzero(np.concatenate([[True], np.diff(bucket) != 0]))
+    total = np.add.reduceat(weight, first)
+    return np.add.reduceat(value * weight, first) / total, total
+
+def _quantile(value, weight, q):
+
+    # Linear interpolation between the order statistics, as np.percentile, with
+    # each centroid standing at the middle of the ranks it covers.
+    if len(value) == 0:
+        return np.nan
+    mid = np.cumsum(weight) - (weight + 1) / 2
+    return np.interp(q * (weight.sum() - 1), mid, value)
+
+def _mode(value):
+    if len(value) == 0:
+        return np.nan
+    (uniq, count) = np.unique(value, return_counts=True)
+    return uniq[count.argmax()]
+
+
+class categorical_state:
+
+    def __init__(self, values, weight=None):
+
+        # The count of every class, in the order they appear, or the sum of the
+        # weights of the rows in it.
+        (code, cat) = pd.factorize(values, sort=False)
+        self.label = list(cat)
+        if weight is None:
+            weight = np.ones(len(code), dtype=np.int64)
+        keep = code >= 0
+        self.count = np.bincount(code[keep], weight[keep], minlength=len(cat)).astype(np.int64)
+
+    def __add__(self, other):
+        label = self.label + [x for x in other.label if x not in set(self.label)]
+        new = copy.copy(self)
+        new.label = label
+        new.count = self.align(label) + other.align(label)
+        return new
+
+    def __radd__(self, other):
+        if isinstance(other, int) and other == 0:
+            return self
+        return other + self
+
+    def align(self, label):
+        pos = {x: i for (i, x) in enumerate(self.label)}
+        count = np.zeros(len(label), dtype=np.int64)
+        for (i, x) in enumerate(label):
+            if x in pos:
+                count[i] = self.count[pos[x]]
+        return count
+
+    def result(self):
+
+        # The table of categorical, with the Wilson intervals of every class at once.
+        n = self.count.sum()
+        (ci_1, ci_2) = proportion_confint(self.count, n, method="wilson")
+        result = pd.DataFrame(
+            {
+                "Count" : self.count,
+                "Proportion"  : self.count / n,
+                "95% CI: Lower" : ci_1,
+                "95% CI: Upper" : ci_2
+            }, index=self.label
+        )
+
+        _process(result)
+
+        return result
+
+class contingency_state:
+
+    def __init__(self, values_1, values_2, weight=None):
+
+        # The crosstab counts, kept sparse from the codes of the classes of both
+        # variables, in the order they appear. Duplicate cells are summed, so the
+        # rows may carry counts of their own.
+        (code_1, cat_1) = pd.factorize(values_1, sort=False)
+        (code_2, cat_2) = pd.factorize(values_2, sort=False)
+        (self.label_1, self.label_2) = (list(cat_1), list(cat_2))
+        if weight is None:
+            weight = np.ones(len(code_1), dtype=np.int64)
+        keep = (code_1 >= 0) & (code_2 >= 0)
+        self.count = self.table(code_1[keep], code_2[keep], len(cat_1), len(cat_2), weight[keep])
+
+    def table(self, row, col, size_1, size_2, count=None):
+        if count is None:
+            count = np.ones(len(row), dtype=np.int64)
+        return sparse.coo_matrix((count, (row, col)), shape=(size_1, size_2)).tocsr()
+
+    def __add__(self, other):
+        label_1 = self.label_1 + [x for x in other.label_1 if x not in set(self.label_1)]
+        label_2 = self.label_2 + [x for x in other.label_2 if x not in set(self.label_2)]
+        new = copy.copy(self)
+        (new.label_1, new.label_2) = (label_1, label_2)
+        new.count = self.align(label_1, label_2) + other.align(label_1, label_2)
+        return new
+
+    def __radd__(self, other):
+        if isinstance(other, int) and other == 0:
+            return self
+        return other + self
+
+    def align(self, label_1, label_2):
+        pos_1 = {x: i for (i, x) in enumerate(label_1)}
+        pos_2 = {x: i for (i, x) in enumerate(label_2)}
+        cell = self.count.tocoo()
+        row = np.array([pos_1[x] for x in self.label_1], dtype=np.int64)[cell.row]
+        col = np.array([pos_2[x] for x in self.label_2], dtype=np.int64)[cell.col]
+        return self.table(row, col, len(label_1), len(label_2), cell.data)
+
+    def result(self, kind="count", sparse=False):
+
+        # The table of contingency, with the classes sorted as pd.crosstab. The
+        # proportions are scaled by broadcasting the sums of the rows or columns,
+        # without making the table dense.
+        row = pd.Index(self.label_1).argsort()
+        col = pd.Index(self.label_2).argsort()
+        count = self.count[row][:, col]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if kind == "vertical":
+                count = count.multiply(1 / count.sum(axis=0)).tocsr()
+            if kind == "horizontal":
+                count = count.multiply(1 / count.sum(axis=1)).tocsr()
+            if kind == "overall":
+                count = count / count.sum()
+        index = pd.Index(self.label_1)[row].map(str)
+        columns = pd.Index(self.label_2)[col].map(str)
+
+        if sparse:
+            return pd.DataFrame.sparse.from_spmatrix(count, index=index, columns=columns)
+
+        result = pd.DataFrame(count.toarray(), index=index, columns=columns)
+
+        _process(result)
+
+        return result
+
+def _read(data, variable):
+
+    # Read every variable once into a row of one buffer, leaving the data as is.
+    # Wide numeric data is converted in one go, and column by column otherwise
+    # to name the column that is not numeric.
+    try:
+        return np.ascontiguousarray(data[list(variable)].to_numpy(dtype=np.float64, na_value=np.nan).T)
+    except:
+        pass
+    values = np.empty((len(variable), len(data)))
+    for (i, var) in enumerate(variable):
+        try:
+            values[i] = data[var].to_numpy(dtype=np.float64, na_value=np.nan)
+        except:
+            raise Warning("The column '{}' must be numeric".format(var))
+    return values
+
 
 def numeric(data, variable):
     '''
@@ -78,49 +562,15 @@ def numeric(data, variable):
 
     '''
 
-    data = data[list(set(variable))].dropna(how='all')
-    _process(data, num=variable)
-
-    for var in variable:
-        if str(data[var].dtypes) not in ("float64", "Int64"):
-            print(str(data[var].dtypes))
-            raise Warning("The column '{}' must be numeric".format(var))
+    variable = list(dict.fromkeys(variable))
+    values = _read(data, variable)
 
     index = ["Count", "Mean", "Median", "Geometric Mean", "Harmonic Mean", "Mode"]
     index += ["", "Variance", "Std. Deviation", "Coef. Variation", "(Population) Variance", "(Population) Std.Dev"]
     index += ["", "Minimum", "25% Percentile", "50% Percentile", "75% Percentile", "Maximum", "Range", "Interquartile Range"]
     index += ["", "Std. Error", "95% CI: Lower", "95% CI: Upper", "(One-Sided) 95% CI: Lower", "(One-Sided) 95% CI: Upper"]
-    result = pd.DataFrame(index=index)
-
-    for var in variable:
-        result[var] = [
-            _CC(data[var].count) ,
-            _CC(st.tmean, data[var].dropna()) ,
-            _CC(np.median, data[var].dropna()) ,
-            _CC(st.gmean, data[var].dropna()) ,
-            _CC(st.hmean, data[var].dropna()) ,
-            _CC(lambda a: st.mode(a)[0][0], data[var].dropna()) ,
-            np.nan ,
-            _CC(st.tvar, data[var].dropna()) ,
-            _CC(st.tstd, data[var].dropna()) ,
-            _CC(lambda a: st.tstd(a)/st.tmean(a), data[var].dropna()) ,
-            _CC(np.var, data[var].dropna()) ,
-            _CC(np.std, data[var].dropna()) ,
-            np.nan ,
-            _CC(np.percentile, data[var].dropna(), 0) ,
-            _CC(np.percentile, data[var].dropna(), 25) ,
-            _CC(np.percentile, data[var].dropna(), 50) ,
-            _CC(np.percentile, data[var].dropna(), 75) ,
-            _CC(np.percentile, data[var].dropna(), 100) ,
-            _CC(lambda a: np.percentile(a,100)-np.percentile(a,0), data[var].dropna()) ,
-            _CC(lambda a: np.percentile(a,75)-np.percentile(a,25), data[var].dropna()) ,
-            np.nan ,
-            _CC(st.tsem, data[var].dropna()) ,
-            _CC(lambda a: st.t.ppf(0.025, a.count()-1, st.tmean(a), st.tsem(a)), data[var].dropna()) ,
-            _CC(lambda a: st.t.ppf(0.975, a.count()-1, st.tmean(a), st.tsem(a)), data[var].dropna()) ,
-            _CC(lambda a: st.t.ppf(0.050, a.count()-1, st.tmean(a), st.tsem(a)), data[var].dropna()) ,
-            _CC(lambda a: st.t.ppf(0.950, a.count()-1, st.tmean(a), st.tsem(a)), data[var].dropna()) ,
-        ]
+
+    result = pd.DataFrame(describe(values.T).calc(), index=index, columns=variable)
 
     _process(result)
 
@@ -138,12 +588,12 @@ def numeric_grouped(data, variable, group):
     variable : :py:class:`str`
         The numeric variable that we want to analyze.
     group : :py:class:`str`
-        The categorical variable that specifies which group the samples belong to. Maximum 20 groups.
+        The categorical variable that specifies which group the samples belong to. There is no limit on the number of groups.
 
     Returns
     -------
     result : :py:class:`pandas.DataFrame`
-        The count, arithmetic mean, median, geometric mean, harmonic mean, mode, / sample variance, sample standard deviation, coefficient of variation, population variance, population standard deviation, / minimum, 25% percentile, 50% percentile, 75% percentile, maximum, range, interquartile range, / standard error, two-sided 95% confidence interval (lower and upper limit), and one-sided 95% confidence interval (lower and upper limit) of the variable in each group.
+        The count, arithmetic mean, median, geometric mean, harmonic mean, mode, / sample variance, sample standard deviation, coefficient of variation, population variance, population standard deviation, / minimum, 25% percentile, 50% percentile, 75% percentile, maximum, range, interquartile range, / standard error, two-sided 95% confidence interval (lower and upper limit), and one-sided 95% confidence interval (lower and upper limit) of the variable in each group, one column per group.
 
     See also
     --------
@@ -216,51 +666,83 @@ def numeric_grouped(data, variable, group):
 
     if str(data[variable].dtypes) not in ("float64", "Int64"):
         raise Warning("The column '{}' must be numeric".format(variable))
-    if data[group].nunique() > 20:
-        raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(group))
 
     index = ["Count", "Mean", "Median", "Geometric Mean", "Harmonic Mean", "Mode"]
     index += ["", "Variance", "Std. Deviation", "Coef. Variation", "(Population) Variance", "(Population) Std.Dev"]
     index += ["", "Minimum", "25% Percentile", "50% Percentile", "75% Percentile", "Maximum", "Range", "Interquartile Range"]
     index += ["", "Std. Error", "95% CI: Lower", "95% CI: Upper", "(One-Tail) 95% CI: Lower", "(One-Tail) 95% CI: Upper"]
-    result = pd.DataFrame(index=index)
-
-    for cat in data[group].dropna().unique():
-        result[cat] = [
-            _CC(data[data[group]==cat][variable].count) ,
-            _CC(st.tmean, data[data[group]==cat][variable].dropna()) ,
-            _CC(np.median, data[data[group]==cat][variable].dropna()) ,
-            _CC(st.gmean, data[data[group]==cat][variable].dropna()) ,
-            _CC(st.hmean, data[data[group]==cat][variable].dropna()) ,
-            _CC(lambda a: st.mode(a)[0][0], data[data[group]==cat][variable].dropna()) ,
-            np.nan ,
-            _CC(st.tvar, data[data[group]==cat][variable].dropna()) ,
-            _CC(st.tstd, data[data[group]==cat][variable].dropna()) ,
-            _CC(lambda a: st.tstd(a)/st.tmean(a), data[data[group]==cat][variable].dropna()) ,
-            _CC(np.var, data[data[group]==cat][variable].dropna()) ,
-            _CC(np.std, data[data[group]==cat][variable].dropna()) ,
-            np.nan ,
-            _CC(np.percentile, data[data[group]==cat][variable].dropna(), 0) ,
-            _CC(np.percentile, data[data[group]==cat][variable].dropna(), 25) ,
-            _CC(np.percentile, data[data[group]==cat][variable].dropna(), 50) ,
-            _CC(np.percentile, data[data[group]==cat][variable].dropna(), 75) ,
-            _CC(np.percentile, data[data[group]==cat][variable].dropna(), 100) ,
-            _CC(lambda a: np.percentile(a,100)-np.percentile(a,0), data[data[group]==cat][variable].dropna()) ,
-            _CC(lambda a: np.percentile(a,75)-np.percentile(a,25), data[data[group]==cat][variable].dropna()) ,
-            np.nan ,
-            _CC(st.tsem, data[data[group]==cat][variable].dropna()) ,
-            _CC(lambda a: st.t.ppf(0.025, a.count()-1, st.tmean(a), st.tsem(a)), data[data[group]==cat][variable].dropna()) ,
-            _CC(lambda a: st.t.ppf(0.975, a.count()-1, st.tmean(a), st.tsem(a)), data[data[group]==cat][variable].dropna()) ,
-            _CC(lambda a: st.t.ppf(0.050, a.count()-1, st.tmean(a), st.tsem(a)), data[data[group]==cat][variable].dropna()) ,
-            _CC(lambda a: st.t.ppf(0.950, a.count()-1, st.tmean(a), st.tsem(a)), data[data[group]==cat][variable].dropna()) ,
-        ]    
+
+    # Factorize the groups once, in the order they appear, and summarize every
+    # group at once from the values sorted by group.
+    (code, cat) = pd.factorize(data[group], sort=False)
+    values = data[variable].to_numpy(dtype=np.float64, na_value=np.nan)
+    result = pd.DataFrame(describe(values, code).calc(), index=index, columns=cat)
 
     _process(result)
 
     return result
 
 
-def categorical(data, variable):
+def numeric_stream(source, variable, chunksize=100000, seed=None):
+    '''
+    Compute descriptive statistics of numeric variables in data too large to fit in the memory.
+
+    Parameters
+    ----------
+    source : :py:class:`str` or iterable of :py:class:`pandas.DataFrame`
+        The path of a CSV file, which is read in chunks, or the chunks of the input data. Each chunk must contain the numeric columns.
+    variable : :py:class:`list`
+        The list of numeric variables to be analyzed.
+    chunksize : :py:class:`int`
+        The number of rows in each chunk when source is a path.
+    seed : :py:class:`int`
+        The random seed of the sample of values for the mode.
+
+    Returns
+    -------
+    result : :py:class:`pandas.DataFrame`
+        The same statistics as :py:func:`numeric`. Once a variable has more than 4096 values, its median, mode, percentiles and interquartile range are approximate, and the variable is listed in ``result.attrs["approximate"]``.
+
+    See also
+    --------
+    numeric : Compute descriptive statistics of numeric variables.
+
+    Notes
+    -----
+    The chunks are summarized one at a time and merged: the count, moments, extremes and the other means with the updates of Welford and Chan, which are exact, the percentiles with a sketch of weighted centroids, and the mode with a uniform sample of the values. Only the sketches and the samples are kept in the memory, whatever the size of the data.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> data = bs.dataset("numeric.csv")
+    >>> result = bs.numeric_stream(source=[data[:5], data[5:]], variable=["Fish", "Crab", "Temperature"])
+    >>> result.loc[["Count", "Mean", "Median"]]
+            Fish        Crab  Temperature
+    Count    9.0    9.000000     9.000000
+    Mean    70.0  186.111111    18.133333
+    Median  76.0  140.000000    18.500000
+
+    The chunks give the same statistics as :py:func:`numeric` on the whole data.
+
+    '''
+
+    variable = list(dict.fromkeys(variable))
+    if isinstance(source, str):
+        source = pd.read_csv(source, usecols=variable, chunksize=chunksize)
+
+    # Summarize every chunk from one buffer, and merge the summaries.
+    rng = np.random.default_rng(seed)
+    state = numeric_state(np.zeros((0, len(variable))), variable, rng=rng)
+    for chunk in source:
+        values = _read(chunk, variable)
+        state = state + numeric_state(values.T, variable, rng=rng)
+
+    result = state.result()
+
+    return result
+
+
+def categorical(data, variable, count=None):
     '''
     Compute descriptive statistics of a categorical variable.
 
@@ -269,7 +751,9 @@ def categorical(data, variable):
     data : :py:class:`pandas.DataFrame`
         The input data. Must contain at least one categorical column.
     variable : :py:class:`str`
-        The categorical variable to be analyzed. Maximum 20 groups.
+        The categorical variable to be analyzed. There is no limit on the number of groups.
+    count : :py:class:`str`
+        The numeric variable that gives the number of samples each row stands for, when the data is already aggregated. If not given, each row is one sample.
 
     Returns
     -------
@@ -313,41 +797,17 @@ def categorical(data, variable):
 
     '''
 
-    data = data[[variable]].dropna()
-    _process(data, cat=[variable])
-
-    if data[variable].nunique() > 20:
-        raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(variable))
-
-    cat = data.groupby(variable, sort=False)[variable].groups.keys()
-    cnt = []
-    prop = []
-    CI_low = []
-    CI_high = []
-    for var in cat:
-        cnt.append(_CC(lambda: data[variable].value_counts()[var]))
-    n = _CC(lambda: sum(cnt))
-    for x in cnt:
-        prop.append(_CC(lambda: x / n))
-        (ci_1, ci_2) = _CC(lambda: proportion_confint(x, n, method="wilson"))
-        CI_low.append(ci_1)
-        CI_high.append(ci_2)
-
-    result = pd.DataFrame(
-        {
-            "Count" : _CC(lambda: cnt), 
-            "Proportion"  : _CC(lambda: prop),
-            "95% CI: Lower" : _CC(lambda: CI_low),
-            "95% CI: Upper" : _CC(lambda: CI_high)
-        }, index=cat
-    )
+    data = data[list({variable, count} - {None})].dropna()
+    _process(data, num=[count], cat=[variable])
+    (data, weight) = _weight(data, count)
 
-    _process(result)
+    # Count every class at once, in the order they appear.
+    result = categorical_state(data[variable], weight).result()
 
     return result
 
 
-def contingency(data, variable_1, variable_2, kind="count"):
+def contingency(data, variable_1, variable_2, kind="count", sparse=False, count=None):
     '''
     Compute the contingency table of two categorical variables.
 
@@ -356,9 +816,9 @@ def contingency(data, variable_1, variable_2, kind="count"):
     data : :py:class:`pandas.DataFrame`
         The input data. Must contain at least two categorical columns.
     variable_1 : :py:class:`str`
-        The first categorical variable. Maximum 20 groups.
+        The first categorical variable. There is no limit on the number of groups.
     variable_2 : :py:class:`str`
-        The second categorical variable. Maximum 20 groups.
+        The second categorical variable. There is no limit on the number of groups.
     kind : :py:class:`str`
         The way to summarize the contingency table.
         
@@ -367,10 +827,15 @@ def contingency(data, variable_1, variable_2, kind="count"):
         * "horizontal" : Calculate proportions horizontally, so that the sum of each row equals 1.
         * "overall" : Calculate overall proportions, so that the sum of the whole table equals 1.
 
+    sparse : :py:class:`bool`
+        Whether to return the table with sparse columns, which keeps only the nonzero cells in the memory. Useful for variables with thousands of groups.
+    count : :py:class:`str`
+        The numeric variable that gives the number of samples each row stands for, when the data is already aggregated. If not given, each row is one sample.
+
     Returns
     -------
     result : :py:class:`pandas.DataFrame`
-        The contingency table of the two categorical variables.
+        The contingency table of the two categorical variables. With sparse, its columns are of :py:class:`pandas.SparseDtype`, and ``result.sparse.to_coo()`` gives the table as a SciPy sparse matrix.
 
     See also
     --------
@@ -406,36 +871,186 @@ def contingency(data, variable_1, variable_2, kind="count"):
 
     '''
 
-    data = data[list({variable_1, variable_2})].dropna()
-    _process(data, cat=[variable_1, variable_2])
+    data = data[list({variable_1, variable_2, count} - {None})].dropna()
+    _process(data, num=[count], cat=[variable_1, variable_2])
+    (data, weight) = _weight(data, count)
 
-    if data[variable_1].nunique() > 20:
-        raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(variable_1))
-    if data[variable_2].nunique() > 20:
-        raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(variable_2))
-        
-    result = pd.crosstab(index=data[variable_1], columns=data[variable_2])
-    result.index.name = None
-    result.columns.name = None
-
-    if kind == "vertical":
-        col_sum = _CC(lambda: result.sum(axis=0))
-        for i in range(result.shape[0]):
-            for j in range(result.shape[1]):
-                result.iat[i,j] = _CC(lambda: result.iat[i,j] / col_sum[j])
-
-    if kind == "horizontal":
-        col_sum = _CC(lambda: result.sum(axis=1))
-        for i in range(result.shape[0]):
-            for j in range(result.shape[1]):
-                result.iat[i,j] = _CC(lambda: result.iat[i,j] / col_sum[i])
-
-    if kind == "overall":
-        _sum = _CC(lambda: result.to_numpy().sum())
-        for i in range(result.shape[0]):
-            for j in range(result.shape[1]):
-                result.iat[i,j] = _CC(lambda: result.iat[i,j] / _sum)
+    # Count the pairs of classes from their codes into a sparse table.
+    result = contingency_state(data[variable_1], data[variable_2], weight).result(kind, sparse)
 
-    _process(result)
+    return result
+
+
+def partial_numeric(data, variable):
+    '''
+    Compute the partial aggregate of numeric variables in a shard of the data.
+
+    Parameters
+    ----------
+    data : :py:class:`pandas.DataFrame`
+        A shard of the input data. Must contain at least one numeric column.
+    variable : :py:class:`list`
+        The list of numeric variables to be analyzed.
+
+    Returns
+    -------
+    state : :py:class:`numeric_state`
+        The sufficient statistics of the variables. The aggregates of the shards are combined with ``+``, and ``state.result()`` gives the same statistics as :py:func:`numeric`.
+
+    See also
+    --------
+    numeric : Compute descriptive statistics of numeric variables.
+    numeric_stream : Compute descriptive statistics of numeric variables in data too large to fit in the memory.
+
+    Notes
+    -----
+    The aggregates can be pickled, so the shards can be summarized in separate processes or on other machines. The count, moments, extremes and the other means are merged exactly. Once a variable has more than 4096 values, its median, mode, percentiles and interquartile range are approximate, as in :py:func:`numeric_stream`.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> data = bs.dataset("numeric.csv")
+    >>> state = bs.partial_numeric(data[:5], ["Fish", "Crab"]) + bs.partial_numeric(data[5:], ["Fish", "Crab"])
+    >>> state.result().loc[["Count", "Mean", "Median"]]
+            Fish        Crab
+    Count    9.0    9.000000
+    Mean    70.0  186.111111
+    Median  76.0  140.000000
+
+    '''
+
+    variable = list(dict.fromkeys(variable))
+    values = _read(data, variable)
+
+    return numeric_state(values.T, variable)
+
+def partial_numeric_grouped(data, variable, group):
+    '''
+    Compute the partial aggregate of a numeric variable in different groups in a shard of the data.
+
+    Parameters
+    ----------
+    data : :py:class:`pandas.DataFrame`
+        A shard of the input data. Must contain at least one numeric column and one categorical column.
+    variable : :py:class:`str`
+        The numeric variable that we want to analyze.
+    group : :py:class:`str`
+        The categorical variable that specifies which group the samples belong to.
+
+    Returns
+    -------
+    state : :py:class:`numeric_state`
+        The sufficient statistics of the variable in each group. The aggregates of the shards are combined with ``+``, and ``state.result()`` gives the same statistics as :py:func:`numeric_grouped`.
+
+    See also
+    --------
+    numeric_grouped : Compute descriptive statistics of a numeric variable in different groups.
+    partial_numeric : Compute the partial aggregate of numeric variables in a shard of the data.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> data = bs.dataset("numeric_grouped.csv")
+    >>> state = sum(bs.partial_numeric_grouped(data[i::3], "Count", "Animal") for i in range(3))
+    >>> state.result().loc[["Count", "Mean"]]
+           Fish     Insect
+    Count   9.0   9.000000
+    Mean   70.0  49.777778
+
+    '''
+
+    data = data[list({variable, group})].dropna()
+    _process(data, num=[variable], cat=[group])
+
+    if str(data[variable].dtypes) not in ("float64", "Int64"):
+        raise Warning("The column '{}' must be numeric".format(variable))
+
+    (code, cat) = pd.factorize(data[group], sort=False)
+    values = data[variable].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    return numeric_state(values, cat, group=code, grouped=True)
+
+def partial_categorical(data, variable, count=None):
+    '''
+    Compute the partial aggregate of a categorical variable in a shard of the data.
+
+    Parameters
+    ----------
+    data : :py:class:`pandas.DataFrame`
+        A shard of the input data. Must contain at least one categorical column.
+    variable : :py:class:`str`
+        The categorical variable to be analyzed.
+    count : :py:class:`str`
+        The numeric variable that gives the number of samples each row stands for, when the data is already aggregated. If not given, each row is one sample.
+
+    Returns
+    -------
+    state : :py:class:`categorical_state`
+        The count of each group. The aggregates of the shards are combined with ``+``, and ``state.result()`` gives the same statistics as :py:func:`categorical`.
+
+    See also
+    --------
+    categorical : Compute descriptive statistics of a categorical variable.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> data = bs.dataset("categorical.csv")
+    >>> state = bs.partial_categorical(data[:100], "Color") + bs.partial_categorical(data[100:], "Color")
+    >>> state.result()
+            Count  Proportion  95% CI: Lower  95% CI: Upper
+    Yellow     74       0.370       0.306126       0.438774
+    Blue       69       0.345       0.282598       0.413244
+    Red        35       0.175       0.128605       0.233644
+    Green      22       0.110       0.073772       0.160927
+
+    '''
+
+    data = data[list({variable, count} - {None})].dropna()
+    _process(data, num=[count], cat=[variable])
+    (data, weight) = _weight(data, count)
+
+    return categorical_state(data[variable], weight)
+
+def partial_contingency(data, variable_1, variable_2, count=None):
+    '''
+    Compute the partial aggregate of the contingency table of two categorical variables in a shard of the data.
+
+    Parameters
+    ----------
+    data : :py:class:`pandas.DataFrame`
+        A shard of the input data. Must contain at least two categorical columns.
+    variable_1 : :py:class:`str`
+        The first categorical variable.
+    variable_2 : :py:class:`str`
+        The second categorical variable.
+    count : :py:class:`str`
+        The numeric variable that gives the number of samples each row stands for, when the data is already aggregated. If not given, each row is one sample.
+
+    Returns
+    -------
+    state : :py:class:`contingency_state`
+        The counts of the contingency table. The aggregates of the shards are combined with ``+``, and ``state.result(kind)`` gives the same table as :py:func:`contingency`.
+
+    See also
+    --------
+    contingency : Compute the contingency table of two categorical variables.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> data = bs.dataset("contingency.csv")
+    >>> state = bs.partial_contingency(data[:1000], "Genotype", "Health") + bs.partial_contingency(data[1000:], "Genotype", "Health")
+    >>> state.result(kind="count")
+             disease  no_disease
+    del-del      184          42
+    ins-del      759         199
+    ins-ins      807         268
+
+    '''
+
+    data = data[list({variable_1, variable_2, count} - {None})].dropna()
+    _process(data, num=[count], cat=[variable_1, variable_2])
+    (data, weight) = _weight(data, count)
 
-    return result
\ No newline at end of file
+    return contingency_state(data[variable_1], data[variable_2], weight)
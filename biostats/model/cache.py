@@ -0,0 +1,69 @@
+import numpy as np
+import os
+import hashlib
+from collections import OrderedDict
+
+# Null distributions are kept as .npy files in the user cache directory, opened
+# memory-mapped, and evicted least recently used first beyond _DISK_SIZE bytes.
+# The most recent ones also stay open in memory.
+_DISK_SIZE = 256 * 2 ** 20
+_MEMORY_SIZE = 64
+_memory = OrderedDict()
+
+def _cache_dir():
+    path = os.environ.get("BIOSTATS_CACHE")
+    if path is None:
+        if os.name == "nt":
+            base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+        else:
+            base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser(os.path.join("~", ".cache")))
+        path = os.path.join(base, "biostats")
+    return path
+
+def _cached(kind, key, fun):
+    name = hashlib.sha1(kind.encode() + np.ascontiguousarray(key, dtype=np.int64).tobytes()).hexdigest()
+
+    # Hits are touched on disk too, so that the files age in order of use.
+    path = os.path.join(_cache_dir(), name + ".npy")
+    if name in _memory:
+        _memory.move_to_end(name)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return _memory[name]
+
+    try:
+        dist = np.load(path, mmap_mode="r")
+        os.utime(path)
+    except (OSError, ValueError):
+        dist = fun()
+        try:
+            os.makedirs(_cache_dir(), exist_ok=True)
+            temp = "{}.{}.tmp.npy".format(path[:-4], os.getpid())
+            np.save(temp, dist)
+            os.replace(temp, path)
+            _evict()
+        except OSError:
+            pass
+
+    _memory[name] = dist
+    if len(_memory) > _MEMORY_SIZE:
+        _memory.popitem(last=False)
+    return dist
+
+def _evict():
+    files = []
+    for entry in os.scandir(_cache_dir()):
+        if entry.name.endswith(".npy") and not entry.name.endswith(".tmp.npy"):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for (_, size, _) in files)
+    for (_, size, path) in sorted(files):
+        if total <= _DISK_SIZE:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
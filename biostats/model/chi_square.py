@@ -2,9 +2,10 @@ import numpy as np
 import pandas as pd
 from scipy import stats as st
 
-from biostats.model.util import _CC, _process, _add_p
+from biostats.model.util import _CC, _process, _weight, _pairing, _result, _proportion
+from biostats.model.exact_test import monte_carlo
 
-def chi_square_test(data, variable_1, variable_2, kind="count"):
+def chi_square_test(data, variable_1, variable_2, kind="count", method="normal", replicates=10000, seed=None, count=None):
     '''
     Test whether there is an association between two categorical variables.
 
@@ -13,9 +14,9 @@ def chi_square_test(data, variable_1, variable_2, kind="count"):
     data : :py:class:`pandas.DataFrame`
         The input data. Must contain at least two categorical columns.
     variable_1 : :py:class:`str`
-        The first categorical variable. Maximum 20 groups.
+        The first categorical variable. Maximum 20 groups, unless method is "monte-carlo".
     variable_2 : :py:class:`str`
-        The second categorical variable. Maximum 20 groups. Switching the two variables will not change the result of chi-square test.
+        The second categorical variable. Maximum 20 groups, unless method is "monte-carlo". Switching the two variables will not change the result of chi-square test.
     kind : :py:class:`str`
         The way to summarize the contingency table.
         
@@ -23,13 +24,24 @@ def chi_square_test(data, variable_1, variable_2, kind="count"):
         * "vertical" : Calculate proportions vertically, so that the sum of each column equals 1.
         * "horizontal" : Calculate proportions horizontally, so that the sum of each row equals 1.
         * "overall" : Calculate overall proportions, so that the sum of the whole table equals 1.
+    method : :py:class:`str`
+        The way to calculate the p-value.
+
+        * "normal" : Compare the chi-square statistic with the chi-square distribution.
+        * "monte-carlo" : Also estimate the p-value from random tables with the same row and column sums.
+    replicates : :py:class:`int`
+        The number of random tables when method is "monte-carlo".
+    seed : :py:class:`int`
+        The random seed when method is "monte-carlo".
+    count : :py:class:`str`
+        The numeric variable that gives the number of samples each row stands for, when the data is already aggregated. If not given, each row is one sample.
 
     Returns
     -------
     summary : :py:class:`pandas.DataFrame`
         The contingency table of the two categorical variables.
     result : :py:class:`pandas.DataFrame`
-        The degree of freedom, chi-square statistic, and p-value of the test.
+        The degree of freedom, chi-square statistic, and p-value of the test. For "monte-carlo", the standard error of the estimated p-value is also given.
 
     See also
     --------
@@ -74,37 +86,24 @@ def chi_square_test(data, variable_1, variable_2, kind="count"):
 
     '''
     
-    data = data[list({variable_1, variable_2})].dropna()
-    _process(data, cat=[variable_1, variable_2])
+    data = data[list({variable_1, variable_2, count} - {None})].dropna()
+    _process(data, num=[count], cat=[variable_1, variable_2])
+    (data, weight) = _weight(data, count)
 
-    if data[variable_1].nunique() > 20:
+    if method not in ["normal", "monte-carlo"]:
+        raise Warning("The method '{}' is not supported.".format(method))
+    if method != "monte-carlo" and data[variable_1].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(variable_1))
-    if data[variable_2].nunique() > 20:
+    if method != "monte-carlo" and data[variable_2].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(variable_2))
 
-    summary = pd.crosstab(index=data[variable_1], columns=data[variable_2])
+    summary = pd.crosstab(index=data[variable_1], columns=data[variable_2], values=weight, aggfunc="sum").fillna(0).astype("int64")
     summary.index.name = None
     summary.columns.name = None
 
     obs = summary.values.tolist()
 
-    if kind == "vertical":
-        col_sum = _CC(lambda: summary.sum(axis=0))
-        for i in range(summary.shape[0]):
-            for j in range(summary.shape[1]):
-                summary.iat[i,j] = _CC(lambda: summary.iat[i,j] / col_sum[j])
-
-    if kind == "horizontal":
-        col_sum = _CC(lambda: summary.sum(axis=1))
-        for i in range(summary.shape[0]):
-            for j in range(summary.shape[1]):
-                summary.iat[i,j] = _CC(lambda: summary.iat[i,j] / col_sum[i])
-
-    if kind == "overall":
-        _sum = _CC(lambda: summary.to_numpy().sum())
-        for i in range(summary.shape[0]):
-            for j in range(summary.shape[1]):
-                summary.iat[i,j] = _CC(lambda: summary.iat[i,j] / _sum)
+    summary = _proportion(summary, kind)
 
     rr = _CC(lambda: len(obs))
     cc = _CC(lambda: len(obs[0]))
@@ -140,13 +139,14 @@ def chi_square_test(data, variable_1, variable_2, kind="count"):
     
     p = _CC(lambda: 1 - st.chi2.cdf(chi2, (rr-1)*(cc-1)))
 
-    result = pd.DataFrame(
-        {
-            "D.F.": _CC(lambda: (rr-1)*(cc-1)),
-            "Chi Square": _CC(lambda: chi2),
-            "p-value": _CC(lambda: p)
-        }, index=["Normal"]
-    )
+    # The rows go into one table in the order they are shown, with a standard
+    # error column only when there is a Monte Carlo estimate to report.
+    result = _result()
+    row = {"D.F.": _CC(lambda: (rr-1)*(cc-1)), "Chi Square": chi2}
+    if method == "monte-carlo":
+        row["Std. Error"] = np.nan
+    row["p-value"] = p
+    result.add(row, "Normal")
 
     if summary.shape == (2,2):
         chi2 = 0
@@ -156,16 +156,18 @@ def chi_square_test(data, variable_1, variable_2, kind="count"):
         
         p = _CC(lambda: 1 - st.chi2.cdf(chi2, (rr-1)*(cc-1)))
 
-        result2 = pd.DataFrame(
-            {
-            "D.F.": _CC(lambda: (rr-1)*(cc-1)),
-            "Chi Square": _CC(lambda: chi2),
-            "p-value": _CC(lambda: p)
-            }, index=["Corrected"]
-        )
-        result = pd.concat([result, result2], axis=0)
-    
-    _add_p(result)
+        result.add(dict(row, **{"Chi Square": chi2, "p-value": p}), "Corrected")
+
+    if method == "monte-carlo":
+        _exp = np.array(exp)
+        test = monte_carlo(obs, lambda x: ((x - _exp) ** 2 / _exp).sum(axis=(1, 2)), replicates, seed)
+        estimate = _CC(lambda: test.calc())
+        p = _CC(lambda: estimate[0])
+        se = _CC(lambda: estimate[1])
+
+        result.add(dict(row, **{"D.F.": np.nan, "Std. Error": se, "p-value": p}), "Monte Carlo")
+
+    result = result.build(p=True)
 
     _process(summary)
     _process(result)
@@ -241,49 +243,42 @@ def chi_square_test_fit(data, variable, expect):
     if data[variable].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(variable))
 
-    cat = data.groupby(variable, sort=False)[variable].groups.keys()
-    obs = []
-    exp = []
-    pro_o = []
-    pro_e = []
+    # Count every category at once, in the order they first appear.
+    cat = list(data.groupby(variable, sort=False)[variable].groups.keys())
+    obs = data[variable].value_counts()[cat].tolist()
     exp_sum = sum(list(expect.values()))
-    for var in cat:
-        obs_val = _CC(lambda: data[variable].value_counts()[var])
-        obs.append(_CC(lambda: obs_val))
-        pro_o.append(_CC(lambda: obs_val / len(data)))
-        exp.append(_CC(lambda: expect[var] * len(data) / exp_sum))
-        pro_e.append(_CC(lambda: expect[var] / exp_sum))
+    freq = np.array([expect.get(var, np.nan) for var in cat], dtype=np.float64)
+    (pro_o, pro_e) = (np.array(obs) / len(data), freq / exp_sum)
+    exp = freq * len(data) / exp_sum
 
-    summary = pd.DataFrame(
+    summary = _result(
         {
-            "Observe" : _CC(lambda: obs),
-            "Prop.(Obs.)" : _CC(lambda: pro_o),
-            "Expect"  : _CC(lambda: exp),
-            "Prop.(Exp.)" : _CC(lambda: pro_e),
+            "Observe" : obs,
+            "Prop.(Obs.)" : pro_o,
+            "Expect"  : exp,
+            "Prop.(Exp.)" : pro_e,
         }, index=cat
-    )
+    ).build()
 
     dim = _CC(lambda: len(obs))
     chi2 = 0
     for i in range(dim):
         chi2 = _CC(lambda: chi2 + (obs[i]-exp[i]) * (obs[i]-exp[i]) / exp[i])
     p = _CC(lambda: 1 - st.chi2.cdf(chi2, dim-1))
-    result = pd.DataFrame(
+    result = _result(
         {
-            "D.F.": _CC(lambda: dim-1),
-            "Chi Square": _CC(lambda: chi2),
-            "p-value": _CC(lambda: p)
+            "D.F.": [_CC(lambda: dim-1)],
+            "Chi Square": [chi2],
+            "p-value": [p]
         }, index=["Normal"]
-    )
-
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
 
     return summary, result
 
-def mcnemar_test(data, variable_1, variable_2, pair):
+def mcnemar_test(data, variable_1, variable_2, pair, count=None):
     '''
     Test whether the proportions of a categorical variable are different in two paired groups.
 
@@ -296,7 +291,9 @@ def mcnemar_test(data, variable_1, variable_2, pair):
     variable_2 : :py:class:`str`
         The categorical variable that we want to calculate proportions of. Maximum 20 groups. The most frequently appearing two groups will be chosen automatically.
     pair : :py:class:`str`
-        The variable that specifies the pair ID. Samples in the same pair should have the same ID. Maximum 2000 pairs.
+        The variable that specifies the pair ID. Samples in the same pair should have the same ID. There is no limit on the number of pairs.
+    count : :py:class:`str`
+        The numeric variable that gives the number of pairs each pair ID stands for, when the data is already aggregated. Both samples of a pair must have the same count. If not given, each pair ID is one pair.
 
     Returns
     -------
@@ -347,39 +344,46 @@ def mcnemar_test(data, variable_1, variable_2, pair):
 
     '''
 
-    data = data[list({variable_1, variable_2, pair})].dropna()
-    _process(data, cat=[variable_1, variable_2, pair])
+    data = data[list({variable_1, variable_2, pair, count} - {None})].dropna()
+    _process(data, num=[count], cat=[variable_1, variable_2, pair])
+    (data, weight) = _weight(data, count)
+    data = data.assign(_weight=weight)
 
     if data[variable_1].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(variable_1))
     if data[variable_2].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(variable_2))
-    if data[pair].nunique() > 2000:
-        raise Warning("The nmuber of classes in column '{}' cannot > 2000.".format(pair))
 
-    grp_1 = data[variable_1].value_counts()[:2].index.tolist()
-    grp_2 = data[variable_2].value_counts()[:2].index.tolist()
+    if count is None:
+        grp_1 = data[variable_1].value_counts()[:2].index.tolist()
+        grp_2 = data[variable_2].value_counts()[:2].index.tolist()
+    else:
+        grp_1 = data.groupby(variable_1, sort=False)["_weight"].sum().sort_values(ascending=False, kind="stable")[:2].index.tolist()
+        grp_2 = data.groupby(variable_2, sort=False)["_weight"].sum().sort_values(ascending=False, kind="stable")[:2].index.tolist()
 
     data = data[data[variable_1].isin(grp_1)]
     data = data[data[variable_2].isin(grp_2)]
 
-    cross = pd.crosstab(index=data[pair], columns=data[variable_1])
-    for col in cross:
-        cross = cross.drop(cross[cross[col] != 1].index)
-    sub = cross.index.values.tolist()
-    data = data[data[pair].isin(sub)]
+    # The pairs measured once in both groups, laid out side by side.
+    (index, _) = _pairing(data, pair, variable_1, grp_1)
+    outcome = data[variable_2].to_numpy(dtype=object)[index]
+    weight = data["_weight"].to_numpy()[index]
 
     _dat = pd.DataFrame(
         {
-            "fst" : data[data[variable_1]==grp_1[0]].sort_values(by=[pair])[variable_2].tolist() ,
-            "snd" : data[data[variable_1]==grp_1[1]].sort_values(by=[pair])[variable_2].tolist()
+            "fst" : outcome[:, 0] ,
+            "snd" : outcome[:, 1] ,
+            "cnt" : weight[:, 0]
         }
     )
 
-    a = _CC(lambda: _dat[(_dat["fst"]==grp_2[0]) & (_dat["snd"]==grp_2[0])]["fst"].count())
-    b = _CC(lambda: _dat[(_dat["fst"]==grp_2[0]) & (_dat["snd"]==grp_2[1])]["fst"].count())
-    c = _CC(lambda: _dat[(_dat["fst"]==grp_2[1]) & (_dat["snd"]==grp_2[0])]["fst"].count())
-    d = _CC(lambda: _dat[(_dat["fst"]==grp_2[1]) & (_dat["snd"]==grp_2[1])]["fst"].count())
+    if (weight[:, 0] != weight[:, 1]).any():
+        raise Warning("The two samples of a pair must have the same count in column '{}'.".format(count))
+
+    a = _CC(lambda: _dat[(_dat["fst"]==grp_2[0]) & (_dat["snd"]==grp_2[0])]["cnt"].sum())
+    b = _CC(lambda: _dat[(_dat["fst"]==grp_2[0]) & (_dat["snd"]==grp_2[1])]["cnt"].sum())
+    c = _CC(lambda: _dat[(_dat["fst"]==grp_2[1]) & (_dat["snd"]==grp_2[0])]["cnt"].sum())
+    d = _CC(lambda: _dat[(_dat["fst"]==grp_2[1]) & (_dat["snd"]==grp_2[1])]["cnt"].sum())
 
     summary = pd.DataFrame(
         {
@@ -393,14 +397,13 @@ def mcnemar_test(data, variable_1, variable_2, pair):
     p = _CC(lambda: 1 - st.chi2.cdf(chi2, 1))
     p_ = _CC(lambda: 1 - st.chi2.cdf(chi2_, 1))
 
-    result = pd.DataFrame(
+    result = _result(
         {
             "D.F." : [1, 1] ,
             "Chi Square" : [chi2, chi2_] ,
             "p-value" : [p, p_]
         }, index=["Normal", "Corrected"]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -497,41 +500,38 @@ def mantel_haenszel_test(data, variable_1, variable_2, stratum):
     grp_1 = data[variable_1].value_counts()[:2].index.tolist()
     grp_2 = data[variable_2].value_counts()[:2].index.tolist()
 
-    summary = pd.DataFrame(columns=["", grp_2[0], grp_2[1]])
-
-    O, V, E = 0, 0 ,0
-
-    for stu in study:
-        part = data.loc[data[stratum]==stu]
-        a = _CC(lambda: part[(part[variable_1]==grp_1[0]) & (part[variable_2]==grp_2[0])][stratum].count())
-        b = _CC(lambda: part[(part[variable_1]==grp_1[0]) & (part[variable_2]==grp_2[1])][stratum].count())
-        c = _CC(lambda: part[(part[variable_1]==grp_1[1]) & (part[variable_2]==grp_2[0])][stratum].count())
-        d = _CC(lambda: part[(part[variable_1]==grp_1[1]) & (part[variable_2]==grp_2[1])][stratum].count())
-        n = _CC(lambda: a + b + c + d)
-        temp = pd.DataFrame(
-            {
-                "" : [grp_1[0], grp_1[1], ""] ,
-                grp_2[0] : [a, c, np.nan] ,
-                grp_2[1] : [b, d, np.nan]
-            }, index=[stu, "", ""]
-        )
-        summary = pd.concat([summary, temp])
-
-        O = _CC(lambda: O + a)
-        E = _CC(lambda: E + (a + b) * (a + c) / n)
-        V = _CC(lambda: V + (a + b) * (c + d) * (a + c) * (b + d) / (n**3 - n**2))
-    
+    # The 2 x 2 table of every stratum at once, from the codes of the rows.
+    code = pd.Index(study).get_indexer(data[stratum])
+    (i, j) = (pd.Index(grp_1).get_indexer(data[variable_1]), pd.Index(grp_2).get_indexer(data[variable_2]))
+    keep = (i >= 0) & (j >= 0)
+    count = np.bincount(4 * code[keep] + 2 * i[keep] + j[keep], minlength=4 * len(study)).reshape(len(study), 4)
+    (a, b, c, d) = count.T
+    n = count.sum(axis=1)
+
+    k = len(study)
+    summary = _result(
+        {
+            "" : np.ravel(np.column_stack([np.full(k, grp_1[0], dtype=object), np.full(k, grp_1[1], dtype=object), np.full(k, "", dtype=object)])) ,
+            grp_2[0] : np.ravel(np.column_stack([a, c, np.full(k, np.nan)])) ,
+            grp_2[1] : np.ravel(np.column_stack([b, d, np.full(k, np.nan)])) ,
+        }, index=np.ravel(np.column_stack([np.asarray(study, dtype=object), np.full(k, "", dtype=object), np.full(k, "", dtype=object)]))
+    ).build()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        O = a.sum()
+        E = ((a + b) * (a + c) / n).sum()
+        V = ((a + b) * (c + d) * (a + c) * (b + d) / (n**3 - n**2)).sum()
+
     chi2 = _CC(lambda: (abs(O-E) - 0.5) ** 2 / V)
     p = _CC(lambda: 1 - st.chi2.cdf(chi2, 1))
 
-    result = pd.DataFrame(
+    result = _result(
         {
             "D.F.": 1,
-            "Chi Square": _CC(lambda: chi2),
-            "p-value": _CC(lambda: p)
+            "Chi Square": chi2,
+            "p-value": p
         }, index=["Normal"]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -1,91 +1,245 @@
 import numpy as np
 import pandas as pd
 import math
-
-from biostats.model.util import _CC, _process, _add_p
+from itertools import repeat
+from scipy import stats as st
+from biostats.model.util import _CC, _process, _weight, _pairing, _result, _proportion
+from biostats.model.kernel import _log_factorial, _log_multinom_pmf, _log_hypergeom_pmf, _log_sum, _binom_cdf, _random_tables, _executor, _split, _budget, _Exhausted
+
+# New paths are settled in chunks of about _CHUNK, nodes are grown in batches
+# of at most _BATCH nodes or _CHUNK paths, and at most _MAX_PATHS paths are kept
+# between two cells or columns, which bounds the memory to about a gigabyte.
+# A column whose splits times the paths they extend are more than _MAX_SPLITS,
+# cells that would grow more than _MAX_SPLITS paths in all, or a last cell or
+# column with more than _MAX_WORK splits, is not even started. Either way the
+# engines give up and return None, as when the budget runs out.
+_CHUNK = 2 ** 18
+_BATCH = 1024
+_MAX_PATHS = 2 ** 23
+_MAX_WORK = 2 ** 30
+_MAX_SPLITS = 2 ** 26
+
+# The work sent to other processes is done by module-level functions that only
+# take arrays, so that nothing else of the engines has to be pickled.
+
+def _binom_resolve(node, past, cnt, longest, shortest, total, limit, p):
+
+    # Paths whose every completion counts are added at once, paths with none
+    # are dropped, and the rest are returned to be expanded further.
+    done = past + longest[node] <= limit
+    if done.any():
+        p.append(np.logaddexp.reduce(past[done] + cnt[done] + total[node[done]]))
+    keep = ~done & (past + shortest[node] <= limit)
+    return node[keep], past[keep], cnt[keep]
+
+def _binom_grow(node, past, cnt, line, longest, shortest, total, limit):
+
+    # Put every possible count into the current cell, all at once.
+    p = []
+    size = node + 1
+    idx = np.repeat(np.arange(len(node)), size)
+    val = np.arange(size.sum()) - np.repeat(np.cumsum(size) - size, size)
+    (node, past, cnt) = _binom_resolve(node[idx] - val, past[idx] + line[val], cnt[idx], longest, shortest, total, limit, p)
+    return p, node, past, cnt
+
+def _binom_close(node, past, cnt, line_1, line_2, limit):
+
+    # The last two cells are fixed by the count in the first one, so every
+    # future weight is listed, sorted and summed cumulatively.
+    p = []
+    start = np.flatnonzero(np.concatenate([[True], np.diff(node) != 0, [True]]))
+    for k in range(len(start) - 1):
+        (t, x, c) = (node[start[k]], past[start[k]:start[k+1]], cnt[start[k]:start[k+1]])
+        future = np.sort(line_1[:t+1] + line_2[t::-1])
+        total = np.logaddexp.accumulate(future)
+        idx = np.searchsorted(future, limit - x, side="right")
+        hit = idx > 0
+        if hit.any():
+            p.append(np.logaddexp.reduce(x[hit] + c[hit] + total[idx[hit]-1]))
+    return p
 
 class binom_exact:
 
-    def __init__(self, table, freqency):
+    def __init__(self, table, freqency, n_jobs=1):
         self.table = table
         self.freq = freqency
-
-    def calc(self):
-
-        self.sum = sum(self.table)
-
-        self.p_part = math.factorial(self.sum)
-
-        self.p_0 = self.multi_nom(self.table)
-        self.p = 0
-        #self.cnt = 0
-
-        mat = [0] * len(self.table)
-        pos = 0
-
-        self.dfs(mat, pos)
-
-        #if self.cnt > 1000000:
-        #    return np.NAN
-
-        return self.p
-
-    def dfs(self, mat, pos):
-
-        #self.cnt += 1
-        #if self.cnt > 1000000:
-        #    return
-
-        mat_new = []
-        for x in mat:
-            mat_new.append(x)
-
-        if pos == -1:
-            temp = self.sum - sum(mat_new)
-            if temp <0:
-                return
-            mat_new[len(mat)-1] = temp
-
-            p_1 = self.multi_nom(mat_new)
-            if p_1 <= self.p_0 + 0.000000000000000001:
-                self.p += p_1
-        else:
-            max_ = self.sum - sum(mat_new)
-            for k in range(max_+1):
-                mat_new[pos] = k
-                if pos == len(mat)-2:
-                    pos_new = -1
-                else:
-                    pos_new = pos + 1
-                self.dfs(mat_new, pos_new)
-
-    def multi_nom(self, table):
-        p = self.p_part
-        for i in range(len(table)):
-            p *= self.freq[i] ** table[i]
-        for x in table:
-            p /= math.factorial(x)
-        return p
-
-def binomial_test(data, variable, expect):
+        self.n_jobs = n_jobs
+
+    def calc(self, budget=None):
+
+        table = np.array(self.table, dtype=np.int64)
+        freq = np.array(self.freq, dtype=np.float64)
+        if (table[freq == 0] > 0).any():
+            return 0.0
+        (table, freq) = (table[freq > 0], freq[freq > 0])
+        if len(table) < 2:
+            return 1.0
+        order = np.argsort(freq, kind="stable")[::-1]
+        (table, freq) = (table[order], freq[order] / freq.sum())
+
+        self.sum = table.sum()
+
+        # Work in log space: a distribution weighs sum(x log p - log x!), and its
+        # probability is exp(p_part + weight). Ties within a relative 1e-7 count.
+        self.weight = -_log_factorial(np.arange(self.sum + 1))
+        self.line = np.log(freq)[:, None] * np.arange(self.sum + 1) + self.weight
+        self.p_part = -self.weight[self.sum]
+        self.limit = _log_multinom_pmf(table, freq) - self.p_part + 1e-7
+        p = []
+
+        self.bound()
+        self.work = 0
+
+        # Convolve the cells one at a time: a node is the number of observations
+        # left, and carries the distinct past weights (with log multiplicities).
+        node = np.array([self.sum])
+        past = np.zeros(1)
+        cnt = np.zeros(1)
+        (node, past, cnt) = _binom_resolve(node, past, cnt, self.longest[0], self.shortest[0], self.total[0], self.limit, p)
+
+        # The budget is checked between batches and never sent to other processes.
+        budget = budget or _budget()
+        stages = len(table) - 1
+        with _executor(self.n_jobs) as pool:
+            try:
+                for pos in range(len(table) - 2):
+                    (node, past, cnt) = self.expand(node, past, cnt, pos, pool, p, budget, stages)
+                self.finish(node, past, cnt, pool, p, budget, stages)
+            except _Exhausted:
+                pool.shutdown(wait=False, cancel_futures=True)
+                return None
+
+        if len(p) == 0:
+            return 0.0
+        return min(1.0, math.exp(self.p_part + _log_sum(p)))
+
+    def bound(self):
+
+        # For every cell position and every number of observations left, find the
+        # largest, smallest and total future weights. The largest one is a max-plus
+        # convolution of concave lines, so their slopes are simply merged.
+        (k, n) = self.line.shape
+        self.longest = np.zeros((k, n))
+        self.longest[-1] = self.line[-1]
+        for pos in range(k - 2, -1, -1):
+            slope = np.concatenate([np.diff(self.line[pos]), np.diff(self.longest[pos+1])])
+            slope = np.sort(slope)[::-1][:n-1]
+            self.longest[pos, 1:] = np.cumsum(slope)
+
+        log_freq = self.line[:, 1] - self.weight[1]
+        low = np.minimum.accumulate(log_freq[::-1])[::-1]
+        total = np.logaddexp.accumulate(log_freq[::-1])[::-1]
+        self.shortest = low[:, None] * np.arange(n) + self.weight
+        self.total = total[:, None] * np.arange(n) + self.weight
+
+    def expand(self, node, past, cnt, pos, pool, p, budget, stages):
+
+        if len(node) == 0:
+            return node, past, cnt
+
+        # Grow the paths in batches of about a million children, possibly in other
+        # processes. The batches are cut and put back the same way whatever the
+        # number of processes, so the sums are bit-identical to a serial run.
+        size = np.cumsum(node + 1)
+        self.work += size[-1]
+        if self.work > _MAX_SPLITS:
+            raise _Exhausted()
+        edge = np.searchsorted(size, np.arange(2 ** 20, size[-1], 2 ** 20)) + 1
+        edge = np.unique(np.concatenate([[0], edge, [len(node)]]))
+        (merged, new) = (None, ([], [], []))
+        for (i, part) in enumerate(pool.map(
+            _binom_grow,
+            [node[edge[i]:edge[i+1]] for i in range(len(edge) - 1)],
+            [past[edge[i]:edge[i+1]] for i in range(len(edge) - 1)],
+            [cnt[edge[i]:edge[i+1]] for i in range(len(edge) - 1)],
+            repeat(self.line[pos]),
+            repeat(self.longest[pos+1]),
+            repeat(self.shortest[pos+1]),
+            repeat(self.total[pos+1]),
+            repeat(self.limit)
+        )):
+            p.extend(part[0])
+            for (x, y) in zip(new, part[1:]):
+                x.append(y)
+            (merged, new) = self.merge(merged, new, False)
+            budget.spend(edge[i+1] - edge[i], (pos + (i + 1) / (len(edge) - 1)) / stages)
+        return self.merge(merged, new, True)[0]
+
+    def merge(self, merged, new, force):
+
+        # New paths are merged in once they outnumber the merged ones, so only the
+        # merged paths and about as many new ones are alive at a time.
+        if merged is None:
+            merged = (np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0))
+        size = sum(len(x) for x in new[1])
+        if size == 0 or (not force and size <= max(16 * _CHUNK, len(merged[1]))):
+            return merged, new
+        node = np.concatenate([merged[0]] + new[0])
+        past = np.concatenate([merged[1]] + new[1])
+        cnt = np.concatenate([merged[2]] + new[2])
+
+        # Merge the paths that reach the same node with the same past weight.
+        order = np.argsort(node * (past.max() - past.min() + 1) + past)
+        (node, past, cnt) = (node[order], past[order], cnt[order])
+        first = np.concatenate([[True], (np.diff(node) != 0) | (np.diff(past) > 1e-9)])
+        first = np.flatnonzero(first)
+        if len(first) > _MAX_PATHS:
+            raise _Exhausted()
+
+        return (node[first], past[first], np.logaddexp.reduceat(cnt, first)), ([], [], [])
+
+    def finish(self, node, past, cnt, pool, p, budget, stages):
+
+        if len(node) == 0:
+            return
+        order = np.argsort(node, kind="stable")
+        (node, past, cnt) = (node[order], past[order], cnt[order])
+        start = np.flatnonzero(np.concatenate([[True], np.diff(node) != 0, [True]]))
+        if (node[start[:-1]] + 1).sum() > _MAX_WORK:
+            raise _Exhausted()
+        edge = start[_split(len(start) - 1, self.n_jobs)]
+        parts = pool.map(
+            _binom_close,
+            [node[edge[i]:edge[i+1]] for i in range(len(edge) - 1)],
+            [past[edge[i]:edge[i+1]] for i in range(len(edge) - 1)],
+            [cnt[edge[i]:edge[i+1]] for i in range(len(edge) - 1)],
+            repeat(self.line[-2]),
+            repeat(self.line[-1]),
+            repeat(self.limit)
+        )
+        for (i, part) in enumerate(parts):
+            p.extend(part)
+            budget.spend(edge[i+1] - edge[i], (stages - 1 + (i + 1) / (len(edge) - 1)) / stages)
+
+def binomial_test(data, variable, expect, n_jobs=1, max_time=None, max_nodes=None, progress=None, cancel=None):
     '''
     Test whether the proportion of a categorical variable is different from the expected proportion.
 
     Parameters
     ----------
     data : :py:class:`pandas.DataFrame`
-        The input data. Must contain at least one categorical column. Maximum 500 rows.
+        The input data. Must contain at least one categorical column.
     variable : :py:class:`str`
-        The categorical variable that we want to calculate the proportion of. Maximum 10 groups.
+        The categorical variable that we want to calculate the proportion of.
     expect : :py:class:`dict`
         The expected proportions of each group. The sum of the proportions will be automatically normalized to 1.
+    n_jobs : :py:class:`int`
+        The number of processes for the exact calculation. -1 uses all the CPU cores. The p-value is the same for any number of processes.
+    max_time : :py:class:`float`
+        The maximum number of seconds for the exact calculation. If it runs out, the chi-square approximation is given instead.
+    max_nodes : :py:class:`int`
+        The maximum number of nodes for the exact calculation. If it runs out, the chi-square approximation is given instead.
+    progress : callable
+        Called with the fraction of the exact calculation done, between 0 and 1.
+    cancel : :py:class:`threading.Event`
+        Once set, the exact calculation stops and the chi-square approximation is given instead.
 
     Returns
     -------
     summary : :py:class:`pandas.DataFrame`
         The observed counts and proportions of each group, and the expected counts and proportions of each group.
     result : :py:class:`pandas.DataFrame`
-        The p-value of the test.
+        The p-value of the test. If the exact calculation falls back to the chi-square approximation, the row is labeled "Normal (Fallback)", with the degrees of freedom and the chi-square statistic.
 
     See also
     --------
@@ -95,7 +249,7 @@ def binomial_test(data, variable, expect):
     Notes
     -----
     .. warning::
-        The binomial test calculates the exact p-value by iterating through all the possible distributions, so it may consume lots of time when the size of data is huge. For larger data, :py:func:`chi_square_test_fit` is recommended. 
+        The binomial test calculates the exact p-value by convolving the probabilities of the groups one at a time, which sums over all the possible distributions without listing them one by one. It still may consume lots of time when both the size of data and the number of groups are huge. When the distributions are too many to be enumerated in about a gigabyte of memory, or the budget runs out, the chi-square approximation of :py:func:`chi_square_test_fit` is given instead. 
 
     Examples
     --------
@@ -138,160 +292,406 @@ def binomial_test(data, variable, expect):
     data = data[[variable]].dropna()
     _process(data, cat=[variable])
 
-    if data[variable].nunique() > 10:
-        raise Warning("The nmuber of classes in column '{}' cannot > 10.".format(variable))
-    if len(data) > 500:
-        raise Warning("The length of data cannot > 500.")
-
-    cat = data.groupby(variable, sort=False)[variable].groups.keys()
-    obs = []
-    exp = []
-    pro_o = []
-    pro_e = []
+    # Count every category at once, in the order they first appear.
+    cat = list(data.groupby(variable, sort=False)[variable].groups.keys())
+    obs = data[variable].value_counts()[cat].tolist()
     exp_sum = sum(list(expect.values()))
-    for var in cat:
-        obs_val = _CC(lambda: data[variable].value_counts()[var])
-        obs.append(_CC(lambda: obs_val))
-        pro_o.append(_CC(lambda: obs_val / len(data)))
-        exp.append(_CC(lambda: expect[var] * len(data) / exp_sum))
-        pro_e.append(_CC(lambda: expect[var] / exp_sum))
+    freq = np.array([expect.get(var, np.nan) for var in cat], dtype=np.float64)
+    (pro_o, pro_e) = (np.array(obs) / len(data), freq / exp_sum)
+    exp = freq * len(data) / exp_sum
 
-    summary = pd.DataFrame(
+    summary = _result(
         {
-            "Observe" : _CC(lambda: obs),
-            "Prop.(Obs.)" : _CC(lambda: pro_o),
-            "Expect"  : _CC(lambda: exp),
-            "Prop.(Exp.)" : _CC(lambda: pro_e),
+            "Observe" : obs,
+            "Prop.(Obs.)" : pro_o,
+            "Expect"  : exp,
+            "Prop.(Exp.)" : pro_e,
         }, index=cat
-    )
-
-    test = binom_exact(obs, pro_e)
-    p = _CC(lambda: test.calc())
-
-    result = pd.DataFrame(
-        {
-            "p-value": _CC(lambda: p)
-        }, index=["Model"]
-    )
-
-    _add_p(result)
+    ).build()
+
+    test = binom_exact(obs, pro_e, n_jobs)
+    p = test.calc(_budget(max_nodes, max_time, progress, cancel))
+
+    if p is None:
+        dim = len(obs)
+        chi2 = ((np.array(obs) - exp) ** 2 / exp).sum()
+        p = _CC(lambda: 1 - st.chi2.cdf(chi2, dim-1))
+        result = _result(
+            {
+                "D.F.": [dim-1],
+                "Chi Square": [chi2],
+                "p-value": [p]
+            }, index=["Normal (Fallback)"]
+        ).build(p=True)
+    else:
+        result = _result(
+            {
+                "p-value": [p]
+            }, index=["Model"]
+        ).build(p=True)
 
     _process(summary)
     _process(result)
 
     return summary, result
 
+def _fisher_grow(keys, start, past, cnt, col, bound, weight, limit, radix, last, check):
+
+    # Split the column among the rows for every node, and settle the new paths
+    # in chunks, against the bounds of the children.
+    p = []
+    (merged, new) = (None, ([], [], [], []))
+    (pending, size) = ([], 0)
+    for k in range(len(keys)):
+        (child, value) = _branch(keys[k], col, weight, check)
+        step = max(1, _CHUNK // (start[k+1] - start[k]))
+        for i in range(0, len(child), step):
+            pending.append((k, child[i:i+step], value[i:i+step]))
+            size += len(pending[-1][1]) * (start[k+1] - start[k])
+            if size >= _CHUNK:
+                _fisher_settle(pending, start, past, cnt, bound, weight, limit, radix, p, new)
+                (merged, new) = _fisher_merge(merged, new, keys.shape[1], radix, last, False)
+                (pending, size) = ([], 0)
+                check()
+    if len(pending) > 0:
+        _fisher_settle(pending, start, past, cnt, bound, weight, limit, radix, p, new)
+    return p, _fisher_merge(merged, new, keys.shape[1], radix, last, True)[0]
+
+def _fisher_settle(pending, start, past, cnt, bound, weight, limit, radix, p, new):
+
+    child = np.concatenate([x[1] for x in pending])
+    value = np.concatenate([x[2] for x in pending])
+    parent = np.concatenate([np.full(len(x[1]), x[0]) for x in pending])
+    (key, inv) = _unique_rows(child, radix)
+    (longest, shortest, total) = (x[inv] for x in _bound(key, *bound, weight))
+
+    # List every path from the parents through the children.
+    size = start[parent+1] - start[parent]
+    idx = np.repeat(np.arange(len(child)), size)
+    src = np.arange(size.sum()) - np.repeat(np.cumsum(size) - size, size) + np.repeat(start[parent], size)
+    (x, c) = (past[src] + value[idx], cnt[src])
+
+    # Paths whose every completion counts are added at once, paths with none
+    # are dropped, and the rest are kept to be expanded further.
+    done = x + longest[idx] <= limit
+    if done.any():
+        p.append(np.logaddexp.reduce(x[done] + c[done] + total[idx[done]]))
+    keep = ~done & (x + shortest[idx] <= limit)
+    if keep.any():
+        (used, node) = np.unique(idx[keep], return_inverse=True)
+        new[0].append(child[used])
+        new[1].append(node.ravel())
+        new[2].append(x[keep])
+        new[3].append(c[keep])
+
+def _fisher_merge(merged, new, width, radix, last, force):
+
+    # New paths are merged in once they outnumber the merged ones, so only the
+    # merged paths and about as many new ones are alive at a time.
+    if merged is None:
+        merged = (np.zeros((0, width), dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0))
+    if len(new[0]) == 0 or (not force and sum(len(x) for x in new[2]) <= max(16 * _CHUNK, len(merged[2]))):
+        return merged, new
+    offset = np.cumsum([len(merged[0])] + [len(x) for x in new[0]])
+    child = np.concatenate([merged[0]] + new[0])
+    node = np.concatenate([merged[1]] + [x + offset[i] for (i, x) in enumerate(new[1])])
+    past = np.concatenate([merged[2]] + new[2])
+    cnt = np.concatenate([merged[3]] + new[3])
+    (keys, idx) = _unique_rows(child, radix)
+    node = idx[node]
+
+    # Before the last two columns the paths only need to be grouped by node.
+    # Otherwise merge the paths that reach the same node with past weights
+    # within the tolerance, as FEXACT does with its past probabilities.
+    if last:
+        order = np.argsort(node, kind="stable")
+        merged = (keys, node[order], past[order], cnt[order])
+    else:
+        grid = np.floor((past - past.min()) / 1e-7).astype(np.int64)
+        if (node.max() + 1.0) * (grid.max() + 1.0) < 2 ** 62:
+            order = np.argsort(node * (grid.max() + 1) + grid)
+        else:
+            order = np.lexsort((past, node))
+        (node, past, cnt) = (node[order], past[order], cnt[order])
+        first = np.concatenate([[True], (np.diff(node) != 0) | (np.diff(past) > 1e-7)])
+        first = np.flatnonzero(first)
+        merged = (keys, node[first], past[first], np.logaddexp.reduceat(cnt, first))
+
+    if len(merged[2]) > _MAX_PATHS:
+        raise _Exhausted()
+    return merged, ([], [], [], [])
+
+def _fisher_close(keys, start, past, cnt, col, weight, limit, check):
+
+    # The last two columns are fixed by the split of the first one, so every
+    # future weight is listed, and the future mass below each threshold is
+    # summed by binning the futures between the sorted thresholds.
+    p = []
+    for k in range(len(keys)):
+        (x, c) = (past[start[k]:start[k+1]], cnt[start[k]:start[k+1]])
+        (child, value) = _branch(keys[k], col, weight, check)
+        future = value + weight[child].sum(axis=1)
+        top = future.max()
+        order = np.argsort(limit - x)
+        idx = np.searchsorted((limit - x)[order], future, side="left")
+        mass = np.cumsum(np.bincount(idx, weights=np.exp(future - top), minlength=len(x) + 1))[:len(x)]
+        hit = order[mass > 0]
+        if len(hit) > 0:
+            p.append(np.logaddexp.reduce(x[hit] + c[hit] + np.log(mass[mass > 0]) + top))
+    return p
+
+def _unique_rows(child, radix):
+
+    # Nodes are looked up by a mixed-radix code when it fits in 64 bits.
+    if radix is None:
+        (keys, idx) = np.unique(child, axis=0, return_inverse=True)
+    else:
+        (_, first, idx) = np.unique(child @ radix, return_index=True, return_inverse=True)
+        keys = child[first]
+    return keys, idx.ravel()
+
+def _splits(keys, col):
+
+    # An upper bound on the ways to split the column among the rows of every
+    # node: the compositions of the column into as many parts, and the choices
+    # of all the parts but the last one within their rows.
+    r = keys.shape[1]
+    comb = float(math.comb(col + r - 1, r - 1))
+    return np.minimum(comb, np.prod(np.minimum(keys[:, :-1], col) + 1.0, axis=1))
+
+def _work(keys, node, col):
+    return (_splits(keys, col) * np.bincount(node, minlength=len(keys))).sum()
+
+def _branch(key, col, weight, check=None):
+
+    # Enumerate every way to split the column among the rows, all at once, as
+    # long as they fit in memory.
+    mat = np.zeros((1, 0), dtype=np.int64)
+    rest = np.array([col], dtype=np.int64)
+    for i in range(len(key) - 1):
+        low = np.maximum(rest - key[i+1:].sum(), 0)
+        high = np.minimum(rest, key[i])
+        size = high - low + 1
+        if size.sum() > _MAX_PATHS:
+            raise _Exhausted()
+        if check is not None:
+            check()
+        idx = np.repeat(np.arange(len(rest)), size)
+        val = np.arange(size.sum()) - np.repeat(np.cumsum(size) - size, size) + low[idx]
+        mat = np.column_stack([mat[idx], val])
+        rest = rest[idx] - val
+    mat = np.column_stack([mat, rest])
+
+    child = np.sort(key - mat, axis=1)
+    return child, weight[mat].sum(axis=1)
+
+def _bound(keys, col, col_long, col_short, weight):
+
+    # The largest and smallest future weights of many nodes at once, bounded by
+    # relaxing either the row or the column margins, which splits the problem
+    # into lines. The lines of the column margins are tabulated by row sum.
+    longest = np.minimum(
+        sum(_spread(np.full(len(keys), x), keys, weight) for x in col),
+        col_long[keys].sum(axis=1)
+    )
+    shortest = np.maximum(
+        sum(_pile(np.full(len(keys), x), keys[:, ::-1], weight) for x in col),
+        col_short[keys].sum(axis=1)
+    )
+    total = weight[keys].sum(axis=1) + weight[col].sum() - weight[keys.sum(axis=1)]
+    return longest, shortest, total
+
+def _spread(total, caps, weight):
+
+    # Spread each total as evenly as the ascending caps allow.
+    caps = np.broadcast_to(caps, (len(total), caps.shape[-1]))
+    k = caps.shape[1]
+    line = np.zeros(caps.shape, dtype=np.int64)
+    left = total.astype(np.int64)
+    active = np.ones(len(total), dtype=bool)
+    for i in range(k):
+        full = active & (caps[:, i] <= left // (k - i))
+        line[full, i] = caps[full, i]
+        left = np.where(full, left - caps[:, i], left)
+        stop = active & ~full
+        if stop.any():
+            (q, r) = np.divmod(left[stop], k - i)
+            fill = q[:, None] + (np.arange(k) >= k - r[:, None])
+            line[stop] = np.where(np.arange(k) >= i, fill, line[stop])
+        active = full
+    return weight[line].sum(axis=1)
+
+def _pile(total, caps, weight):
+
+    # Pile each total into the descending caps, largest first.
+    caps = np.broadcast_to(caps, (len(total), caps.shape[-1]))
+    line = np.minimum(caps, np.maximum(total[:, None] - np.cumsum(caps, axis=1) + caps, 0))
+    return weight[line].sum(axis=1)
+
 class fisher_exact:
-    
-    def __init__(self, table):
+
+    def __init__(self, table, n_jobs=1):
         self.table = table
+        self.n_jobs = n_jobs
+
+    def calc(self, budget=None):
+
+        table = np.array(self.table, dtype=np.int64)
+        table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+        if table.shape[0] > table.shape[1]:
+            table = table.T
+        if table.shape[0] < 2:
+            return 1.0
+
+        self.row_sum = np.sort(table.sum(axis=1))
+        self.col_sum = np.sort(table.sum(axis=0))[::-1]
+        self.sum = self.row_sum.sum()
+
+        # Work in log space: a table weighs -sum(log x!), and its probability is
+        # exp(p_part + weight). Tables within a relative 1e-7 of the observed one count.
+        self.weight = -_log_factorial(np.arange(self.sum + 1))
+        self.p_part = -self.weight[self.row_sum].sum() - self.weight[self.col_sum].sum() + self.weight[self.sum]
+        self.limit = _log_hypergeom_pmf(table) - self.p_part + 1e-7
+        p = []
+
+        # Relaxing the row margins leaves lines of the column margins, whose bounds
+        # only depend on the row sum and are tabulated up front.
+        value = np.arange(self.sum + 1)
+        self.col_long = [_spread(value, self.col_sum[pos:][::-1], self.weight) for pos in range(len(self.col_sum))]
+        self.col_short = [_pile(value, self.col_sum[pos:], self.weight) for pos in range(len(self.col_sum))]
+
+        self.radix = None
+        if np.prod(self.row_sum + 1.0) < 2 ** 62:
+            self.radix = np.cumprod(np.concatenate([[1], self.row_sum[:-1] + 1]))
+
+        # Network algorithm: a node is the sorted vector of remaining row sums, and
+        # carries the distinct past weights (with log multiplicities) that reach it.
+        # Only the paths that the bounds cannot settle are carried on.
+        keys = self.row_sum[None, :]
+        (longest, shortest, total) = _bound(keys, *self.bound(0), self.weight)
+        if longest[0] <= self.limit:
+            return 1.0
+        if shortest[0] > self.limit:
+            return 0.0
+        node = np.zeros(1, dtype=np.int64)
+        past = np.zeros(1)
+        cnt = np.zeros(1)
+
+        # The budget is checked between batches and never sent to other processes.
+        budget = budget or _budget()
+        stages = len(self.col_sum) - 1
+        with _executor(self.n_jobs) as pool:
+            try:
+                for pos in range(len(self.col_sum) - 2):
+                    (keys, node, past, cnt) = self.expand(keys, node, past, cnt, pos, pool, p, budget, stages)
+                self.finish(keys, node, past, cnt, pool, p, budget, stages)
+            except _Exhausted:
+                pool.shutdown(wait=False, cancel_futures=True)
+                return None
+
+        if len(p) == 0:
+            return 0.0
+        return min(1.0, math.exp(self.p_part + _log_sum(p)))
+
+    def bound(self, pos):
+        return self.col_sum[pos:], self.col_long[pos], self.col_short[pos]
+
+    def expand(self, keys, node, past, cnt, pos, pool, p, budget, stages):
+
+        # Splitting the column among the rows of every node is not even started
+        # when the ways to do it, bounded without listing them, times the paths
+        # that reach the node are too many.
+        if _work(keys, node, self.col_sum[pos]) > _MAX_SPLITS:
+            raise _Exhausted()
+
+        # Grow the nodes in batches, possibly in other processes. The batches do
+        # not depend on the number of processes and are put back in order, so the
+        # sums are bit-identical to a serial run.
+        last = pos == len(self.col_sum) - 3
+        (merged, new) = (None, ([], [], [], []))
+        batch = self.batch(keys, node, past, cnt)
+        for (i, part) in enumerate(pool.map(
+            _fisher_grow,
+            *batch,
+            repeat(self.col_sum[pos]),
+            repeat(self.bound(pos + 1)),
+            repeat(self.weight),
+            repeat(self.limit),
+            repeat(self.radix),
+            repeat(last),
+            repeat(budget.watch(pool))
+        )):
+            p.extend(part[0])
+            if len(part[1][2]) > 0:
+                for (x, y) in zip(new, part[1]):
+                    x.append(y)
+            (merged, new) = _fisher_merge(merged, new, len(self.row_sum), self.radix, last, False)
+            budget.spend(len(batch[0][i]), (pos + (i + 1) / len(batch[0])) / stages)
+        return _fisher_merge(merged, new, len(self.row_sum), self.radix, last, True)[0]
+
+    def finish(self, keys, node, past, cnt, pool, p, budget, stages):
+
+        # The last split of every node is listed once for all of its paths.
+        if _splits(keys, self.col_sum[-2]).sum() > _MAX_WORK:
+            raise _Exhausted()
+        batch = self.batch(keys, node, past, cnt)
+        for (i, part) in enumerate(pool.map(
+            _fisher_close,
+            *batch,
+            repeat(self.col_sum[-2]),
+            repeat(self.weight),
+            repeat(self.limit),
+            repeat(budget.watch(pool))
+        )):
+            p.extend(part)
+            budget.spend(len(batch[0][i]), (stages - 1 + (i + 1) / len(batch[0])) / stages)
+
+    def batch(self, keys, node, past, cnt):
+
+        # Cut the nodes into batches, with the paths of each node alongside.
+        start = np.searchsorted(node, np.arange(len(keys) + 1))
+        edge = [0]
+        while edge[-1] < len(keys):
+            stop = np.searchsorted(start, start[edge[-1]] + _CHUNK, side="right") - 1
+            edge.append(min(max(stop, edge[-1] + 1), edge[-1] + _BATCH, len(keys)))
+        edge = list(zip(edge[:-1], edge[1:]))
+        return (
+            [keys[a:b] for (a, b) in edge],
+            [start[a:b+1] - start[a] for (a, b) in edge],
+            [past[start[a]:start[b]] for (a, b) in edge],
+            [cnt[start[a]:start[b]] for (a, b) in edge]
+        )
+
+class monte_carlo:
+
+    def __init__(self, table, statistic, replicates=10000, seed=None):
+        self.table = table
+        self.statistic = statistic
+        self.replicates = replicates
+        self.seed = seed
 
     def calc(self):
 
-        self.row_sum = []
-        self.col_sum = []
-        self.sum = 0
-
-        for i in range(len(self.table)):
-            temp = 0
-            for j in range(len(self.table[0])):
-                temp += self.table[i][j]
-            self.row_sum.append(temp)
-        
-        for j in range(len(self.table[0])):
-            temp = 0
-            for i in range(len(self.table)):
-                temp += self.table[i][j]
-            self.col_sum.append(temp)
-        
-        for k in self.row_sum:
-            self.sum += k
-        
-        self.p_part = 1
-        for x in self.row_sum:
-            self.p_part *= math.factorial(x)
-        for y in self.col_sum:
-            self.p_part *= math.factorial(y)
-        self.p_part /= math.factorial(self.sum)
-
-        self.p_0 = self.hyper_geom(self.table)
-        self.p = 0
-        #self.cnt = 0
-
-        mat = [[0] * len(self.col_sum)] * len(self.row_sum)
-        pos = (0, 0)
-
-        self.dfs(mat, pos)
-
-        #if self.cnt > 1000000:
-        #    return np.NAN
-
-        return self.p
-
-    def dfs(self, mat, pos):
-
-        #self.cnt += 1
-        #if self.cnt > 1000000:
-        #    return
-        
-        (xx, yy) = pos
-        (rr, cc) = (len(self.row_sum), len(self.col_sum))
-
-        mat_new = []
-
-        for i in range(len(mat)):
-            temp = []
-            for j in range(len(mat[0])):
-                temp.append(mat[i][j])
-            mat_new.append(temp)
-
-        if xx == -1 and yy == -1:
-            for i in range(rr-1):
-                temp = self.row_sum[i]
-                for j in range(cc-1):
-                    temp -= mat_new[i][j]
-                mat_new[i][cc-1] = temp
-            for j in range(cc-1):
-                temp = self.col_sum[j]
-                for i in range(rr-1):
-                    temp -= mat_new[i][j]
-                mat_new[rr-1][j] = temp
-            temp = self.row_sum[rr-1]
-            for j in range(cc-1):
-                temp -= mat_new[rr-1][j]
-            if temp <0:
-                return
-            mat_new[rr-1][cc-1] = temp
-            
-            p_1 = self.hyper_geom(mat_new)
-
-            if p_1 <= self.p_0 + 0.000000000000000001:
-                self.p += p_1
-        else:
-            max_1 = self.row_sum[xx]
-            max_2 = self.col_sum[yy]
-            for j in range(cc):
-                max_1 -= mat_new[xx][j]
-            for i in range(rr):
-                max_2 -= mat_new[i][yy]
-            for k in range(min(max_1,max_2)+1):
-                mat_new[xx][yy] = k
-                if xx == rr-2 and yy == cc-2:
-                    pos_new = (-1, -1)
-                elif xx == rr-2:
-                    pos_new = (0, yy+1)
-                else:
-                    pos_new = (xx+1, yy)
-                self.dfs(mat_new, pos_new)
-
-    def hyper_geom(self, table):
-        p = self.p_part
-        for i in range(len(table)):
-            for j in range(len(table[0])):
-                p /= math.factorial(table[i][j])
-        return p
-
-def fisher_exact_test(data, variable_1, variable_2, kind="count"):
+        table = np.array(self.table, dtype=np.int64)
+        rng = np.random.default_rng(self.seed)
+
+        # Count the random tables at least as extreme as the observed one, allowing
+        # a relative 1e-7 for ties, in batches to bound the memory.
+        obs = self.statistic(table[None])[0]
+        limit = obs - 1e-7 * abs(obs)
+        hit = 0
+        done = 0
+        while done < self.replicates:
+            size = min(self.replicates - done, 100000)
+            tables = _random_tables(table.sum(axis=1), table.sum(axis=0), size, rng)
+            hit += (self.statistic(tables) >= limit).sum()
+            done += size
+
+        p = (hit + 1) / (self.replicates + 1)
+        se = math.sqrt(p * (1 - p) / self.replicates)
+        return p, se
+
+def fisher_exact_test(data, variable_1, variable_2, kind="count", method="exact", replicates=10000, seed=None, n_jobs=1, max_time=None, max_nodes=None, progress=None, cancel=None, count=None):
     '''
     Test whether there is an association between two categorical variables.
 
@@ -300,9 +700,9 @@ def fisher_exact_test(data, variable_1, variable_2, kind="count"):
     data : :py:class:`pandas.DataFrame`
         The input data. Must contain at least two categorical columns.
     variable_1 : :py:class:`str`
-        The first categorical variable. Maximum 10 groups.
+        The first categorical variable. Maximum 10 groups, unless method is "monte-carlo".
     variable_2 : :py:class:`str`
-        The second categorical variable. Switching the two variables will not change the result of Fisher exact test. Maximum 10 groups.
+        The second categorical variable. Switching the two variables will not change the result of Fisher exact test. Maximum 10 groups, unless method is "monte-carlo".
     kind : :py:class:`str`
         The way to summarize the contingency table.
 
@@ -310,13 +710,34 @@ def fisher_exact_test(data, variable_1, variable_2, kind="count"):
         * "vertical" : Calculate proportions vertically, so that the sum of each column equals 1.
         * "horizontal" : Calculate proportions horizontally, so that the sum of each row equals 1.
         * "overall" : Calculate overall proportions, so that the sum of the whole table equals 1.
+    method : :py:class:`str`
+        The way to calculate the p-value.
+
+        * "exact" : Sum over all the possible distributions.
+        * "monte-carlo" : Estimate from random tables with the same row and column sums.
+    replicates : :py:class:`int`
+        The number of random tables when method is "monte-carlo", or when the exact calculation falls back to it.
+    seed : :py:class:`int`
+        The random seed when method is "monte-carlo", or when the exact calculation falls back to it.
+    n_jobs : :py:class:`int`
+        The number of processes when method is "exact". -1 uses all the CPU cores. The p-value is the same for any number of processes.
+    max_time : :py:class:`float`
+        The maximum number of seconds for the exact calculation. If it runs out, the Monte Carlo estimate is given instead.
+    max_nodes : :py:class:`int`
+        The maximum number of nodes for the exact calculation. If it runs out, the Monte Carlo estimate is given instead.
+    progress : callable
+        Called with the fraction of the exact calculation done, between 0 and 1.
+    cancel : :py:class:`threading.Event`
+        Once set, the exact calculation stops and the Monte Carlo estimate is given instead.
+    count : :py:class:`str`
+        The numeric variable that gives the number of samples each row stands for, when the data is already aggregated. If not given, each row is one sample.
 
     Returns
     -------
     summary : :py:class:`pandas.DataFrame`
         The contingency table of the two categorical variables.
     result : :py:class:`pandas.DataFrame`
-        The p-value of the test.
+        The p-value of the test. For "monte-carlo", the number of replicates and the standard error of the p-value are also given. If the exact calculation falls back to the Monte Carlo estimate, the row is labeled "Monte Carlo (Fallback)".
 
     See also
     --------
@@ -326,7 +747,7 @@ def fisher_exact_test(data, variable_1, variable_2, kind="count"):
     Notes
     -----
     .. warning::
-        Fisher exact test calculates the exact p-value by iterating through all the possible distributions, so it may consume lots of time when the size of data is huge. For larger data, :py:func:`chi_square_test` is recommended. 
+        Fisher exact test calculates the exact p-value with the network algorithm of Mehta and Patel, which sums over all the possible distributions without listing them one by one. It still may consume lots of time when both the size of data and the number of groups are huge. When the table is too large to be enumerated in about a gigabyte of memory, or the budget runs out, the Monte Carlo estimate is given instead. For larger data, :py:func:`chi_square_test` is recommended, or ``method="monte-carlo"`` for an estimate of the exact p-value. 
 
     Examples
     --------
@@ -366,48 +787,49 @@ def fisher_exact_test(data, variable_1, variable_2, kind="count"):
 
     '''
 
-    data = data[list({variable_1, variable_2})].dropna()
-    _process(data, cat=[variable_1, variable_2])
+    data = data[list({variable_1, variable_2, count} - {None})].dropna()
+    _process(data, num=[count], cat=[variable_1, variable_2])
+    (data, weight) = _weight(data, count)
 
-    if data[variable_1].nunique() > 10:
+    if method not in ["exact", "monte-carlo"]:
+        raise Warning("The method '{}' is not supported.".format(method))
+    if method != "monte-carlo" and data[variable_1].nunique() > 10:
         raise Warning("The nmuber of classes in column '{}' cannot > 10.".format(variable_1))
-    if data[variable_2].nunique() > 10:
+    if method != "monte-carlo" and data[variable_2].nunique() > 10:
         raise Warning("The nmuber of classes in column '{}' cannot > 10.".format(variable_2))
 
-    summary = pd.crosstab(index=data[variable_1], columns=data[variable_2])
+    summary = pd.crosstab(index=data[variable_1], columns=data[variable_2], values=weight, aggfunc="sum").fillna(0).astype("int64")
     summary.index.name = None
     summary.columns.name = None
 
     obs = summary.values.tolist()
 
-    if kind == "vertical":
-        col_sum = _CC(lambda: summary.sum(axis=0))
-        for i in range(summary.shape[0]):
-            for j in range(summary.shape[1]):
-                summary.iat[i,j] = _CC(lambda: summary.iat[i,j] / col_sum[j])
-
-    if kind == "horizontal":
-        col_sum = _CC(lambda: summary.sum(axis=1))
-        for i in range(summary.shape[0]):
-            for j in range(summary.shape[1]):
-                summary.iat[i,j] = _CC(lambda: summary.iat[i,j] / col_sum[i])
-
-    if kind == "overall":
-        _sum = _CC(lambda: summary.to_numpy().sum())
-        for i in range(summary.shape[0]):
-            for j in range(summary.shape[1]):
-                summary.iat[i,j] = _CC(lambda: summary.iat[i,j] / _sum)
-
-    test = fisher_exact(obs)
-    p = _CC(lambda: test.calc())
-
-    result = pd.DataFrame(
-        {
-            "p-value": _CC(lambda: p)
-        }, index=["Model"]
-    )
-    
-    _add_p(result)
+    summary = _proportion(summary, kind)
+
+    p = None
+    if method == "exact":
+        test = fisher_exact(obs, n_jobs)
+        p = test.calc(_budget(max_nodes, max_time, progress, cancel))
+
+    if p is None:
+        test = monte_carlo(obs, lambda x: _log_factorial(x).sum(axis=(1, 2)), replicates, seed)
+        estimate = _CC(lambda: test.calc())
+        p = _CC(lambda: estimate[0])
+        se = _CC(lambda: estimate[1])
+
+        result = _result(
+            {
+                "Replicates": [replicates],
+                "Std. Error": [se],
+                "p-value": [p]
+            }, index=["Monte Carlo" if method == "monte-carlo" else "Monte Carlo (Fallback)"]
+        ).build(p=True)
+    else:
+        result = _result(
+            {
+                "p-value": [p]
+            }, index=["Model"]
+        ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -427,7 +849,7 @@ def mcnemar_exact_test(data, variable_1, variable_2, pair):
     variable_2 : :py:class:`str`
         The categorical variable that we want to calculate proportions of. Maximum 10 groups. The most frequently appearing two groups will be chosen automatically.
     pair : :py:class:`str`
-        The variable that specifies the pair ID. Samples in the same pair should have the same ID. Maximum 1000 pairs.
+        The variable that specifies the pair ID. Samples in the same pair should have the same ID. There is no limit on the number of pairs.
 
     Returns
     -------
@@ -484,8 +906,6 @@ def mcnemar_exact_test(data, variable_1, variable_2, pair):
         raise Warning("The nmuber of classes in column '{}' cannot > 10.".format(variable_1))
     if data[variable_2].nunique() > 10:
         raise Warning("The nmuber of classes in column '{}' cannot > 10.".format(variable_2))
-    if data[pair].nunique() > 1000:
-        raise Warning("The nmuber of classes in column '{}' cannot > 1000.".format(pair))
 
     grp_1 = data[variable_1].value_counts()[:2].index.tolist()
     grp_2 = data[variable_2].value_counts()[:2].index.tolist()
@@ -493,16 +913,14 @@ def mcnemar_exact_test(data, variable_1, variable_2, pair):
     data = data[data[variable_1].isin(grp_1)]
     data = data[data[variable_2].isin(grp_2)]
 
-    cross = pd.crosstab(index=data[pair], columns=data[variable_1])
-    for col in cross:
-        cross = cross.drop(cross[cross[col] != 1].index)
-    sub = cross.index.values.tolist()
-    data = data[data[pair].isin(sub)]
+    # The pairs measured once in both groups, laid out side by side.
+    (index, _) = _pairing(data, pair, variable_1, grp_1)
+    outcome = data[variable_2].to_numpy(dtype=object)[index]
 
     _dat = pd.DataFrame(
         {
-            "fst" : data[data[variable_1]==grp_1[0]].sort_values(by=[pair])[variable_2].tolist() ,
-            "snd" : data[data[variable_1]==grp_1[1]].sort_values(by=[pair])[variable_2].tolist()
+            "fst" : outcome[:, 0] ,
+            "snd" : outcome[:, 1]
         }
     )
 
@@ -518,25 +936,17 @@ def mcnemar_exact_test(data, variable_1, variable_2, pair):
         }, index=["{} : {}".format(grp_1[0], grp_2[0]), "{} : {}".format(grp_1[0], grp_2[1])]
     )
 
-    p = _CC(lambda: 0)
     n = _CC(lambda: b + c)
-    if b < c:
-        for x in range(0, b+1):
-            p = _CC(lambda: p + math.factorial(n) / (math.factorial(x) * math.factorial(n-x) * 2**n))
-        p = _CC(lambda: p * 2)
-    elif b > c:
-        for x in range(b, n+1):
-            p = _CC(lambda: p + math.factorial(n) / (math.factorial(x) * math.factorial(n-x) * 2**n))
-        p = _CC(lambda: p * 2)
+    if b != c:
+        p = _CC(lambda: 2 * _binom_cdf(min(b, c), n))
     else: 
         p = _CC(lambda: 1)
 
-    result = pd.DataFrame(
+    result = _result(
         {
-            "p-value": _CC(lambda: p)
+            "p-value": p
         }, index=["Model"]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -0,0 +1,152 @@
+import numpy as np
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from scipy.special import gammaln
+
+# log(n!) for n = 0, 1, 2, ..., grown by doubling whenever a larger n is asked for.
+_log_fact = gammaln(np.arange(1024) + 1)
+
+def _log_factorial(n):
+    global _log_fact
+    n = np.asarray(n, dtype=np.int64)
+    top = int(n.max(initial=0))
+    if top >= len(_log_fact):
+        size = len(_log_fact)
+        while size <= top:
+            size *= 2
+        _log_fact = gammaln(np.arange(size) + 1)
+    return _log_fact[n]
+
+def _log_comb(n, k):
+    return _log_factorial(n) - _log_factorial(k) - _log_factorial(np.asarray(n) - k)
+
+def _log_binom_pmf(k, n, p=0.5):
+    k = np.asarray(k, dtype=np.int64)
+    return _log_comb(n, k) + k * math.log(p) + (n - k) * math.log1p(-p)
+
+def _log_multinom_pmf(x, p):
+    x = np.asarray(x, dtype=np.int64)
+    return _log_factorial(x.sum(axis=-1)) - _log_factorial(x).sum(axis=-1) + (x * np.log(p)).sum(axis=-1)
+
+def _log_hypergeom_pmf(table):
+    table = np.asarray(table, dtype=np.int64)
+    return (
+        _log_factorial(table.sum(axis=-1)).sum(axis=-1)
+        + _log_factorial(table.sum(axis=-2)).sum(axis=-1)
+        - _log_factorial(table.sum(axis=(-2, -1)))
+        - _log_factorial(table).sum(axis=(-2, -1))
+    )
+
+def _log_sum(x):
+    x = np.asarray(x, dtype=np.float64)
+    if x.size == 0:
+        return -np.inf
+    return np.logaddexp.reduce(x, axis=None)
+
+def _binom_cdf(k, n, p=0.5):
+    if k < 0:
+        return 0.0
+    return min(1.0, math.exp(_log_sum(_log_binom_pmf(np.arange(min(k, n) + 1), n, p))))
+
+def _random_tables(row_sum, col_sum, size, rng):
+    # Draw tables with fixed margins as in Patefield's algorithm: each cell is a
+    # hypergeometric draw given the cells before it, for all the tables at once.
+    row_sum = np.asarray(row_sum, dtype=np.int64)
+    col_sum = np.asarray(col_sum, dtype=np.int64)
+    (r, c) = (len(row_sum), len(col_sum))
+    table = np.zeros((size, r, c), dtype=np.int64)
+    row_left = np.tile(row_sum, (size, 1))
+    for j in range(c - 1):
+        need = np.full(size, col_sum[j])
+        rest = row_left.sum(axis=1)
+        for i in range(r - 1):
+            rest -= row_left[:, i]
+            table[:, i, j] = rng.hypergeometric(row_left[:, i], rest, need)
+            need -= table[:, i, j]
+        table[:, r-1, j] = need
+        row_left -= table[:, :, j]
+    table[:, :, c-1] = row_left
+    return table
+
+class _serial:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def map(self, fun, *args):
+        return map(fun, *args)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+def _jobs(n_jobs):
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
+def _executor(n_jobs):
+    if _jobs(n_jobs) == 1:
+        return _serial()
+    return ProcessPoolExecutor(_jobs(n_jobs))
+
+def _split(count, n_jobs):
+    # Cut range(count) into a few batches per process, as a list of edges.
+    pieces = 1 if _jobs(n_jobs) == 1 else 4 * _jobs(n_jobs)
+    return np.unique(np.linspace(0, count, min(count, pieces) + 1).astype(np.int64))
+
+class _Exhausted(Exception):
+    # Raised when an exact calculation is cancelled, runs out of its budget, or
+    # would need more memory than it is allowed to use.
+    pass
+
+class _budget:
+
+    def __init__(self, max_nodes=None, max_time=None, progress=None, cancel=None):
+        self.max_nodes = max_nodes
+        self.max_time = max_time
+        self.progress = progress
+        self.cancel = cancel
+        self.nodes = 0
+        self.start = time.monotonic()
+
+    def spend(self, nodes, done):
+        # Called between batches of work: count the nodes, report the fraction
+        # done, and stop once cancelled or over the budget.
+        self.nodes += nodes
+        if self.progress is not None:
+            self.progress(min(done, 1.0))
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise _Exhausted()
+        self.check()
+
+    def check(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise _Exhausted()
+        if self.max_time is not None and time.monotonic() - self.start > self.max_time:
+            raise _Exhausted()
+
+    def watch(self, pool):
+        # A check for the work inside a batch. Batches run in this process check
+        # the whole budget, while other processes only get the deadline, as the
+        # progress callback and the cancellation token cannot be pickled.
+        if isinstance(pool, _serial):
+            return self.check
+        if self.max_time is None:
+            return _deadline(math.inf)
+        return _deadline(time.time() + self.max_time - (time.monotonic() - self.start))
+
+class _deadline:
+
+    def __init__(self, stop):
+        self.stop = stop
+
+    def __call__(self):
+        if time.time() > self.stop:
+            raise _Exhausted()
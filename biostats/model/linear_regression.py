@@ -5,7 +5,7 @@ import math
 
 from statsmodels.formula.api import ols
 
-from biostats.model.util import _CC, _process, _add_p
+from biostats.model.util import _CC, _process, _add_p, _result
 
 def correlation(data, x, y):
     '''
@@ -92,9 +92,9 @@ def correlation(data, x, y):
 
     summary = pd.DataFrame(
         {
-            "Coefficient": _CC(lambda: r) ,
-            "95% CI: Lower": _CC(lambda: r_l), 
-            "95% CI: Upper": _CC(lambda: r_h)
+            "Coefficient": r ,
+            "95% CI: Lower": r_l, 
+            "95% CI: Upper": r_h
         }, index=["Correlation"]
     )
 
@@ -102,14 +102,13 @@ def correlation(data, x, y):
     p = _CC(lambda: st.t.cdf(t, n-2))
     p = _CC(lambda: 2*min(p, 1-p))
 
-    result = pd.DataFrame(
+    result = _result(
         {
             "D.F." : _CC(lambda: n-2) ,
-            "t Statistic" : _CC(lambda: t) ,
-            "p-value" : _CC(lambda: p)
+            "t Statistic" : t ,
+            "p-value" : p
         }, index=["Model"]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -5,7 +5,7 @@ from statsmodels.formula.api import logit
 from statsmodels.miscmodels.ordinal_model import OrderedModel
 from statsmodels.discrete.discrete_model import MNLogit
 
-from biostats.model.util import _CC, _process, _add_p
+from biostats.model.util import _CC, _process, _add_p, _result
 
 def simple_logistic_regression(data, x, y, target):
     '''
@@ -512,40 +512,23 @@ def multinomial_logistic_regression(data, x_numeric, x_categorical, y, baseline)
 
     model = MNLogit.from_formula(formula, data=data2).fit(disp=False)
 
-    summary = pd.DataFrame(columns=["Coefficient", "95% CI: Lower", "95% CI: Upper", "Std. Error", "z Statistic", "p-value"])
-
-    for i, cat in enumerate(group):        
-        temp_1 = pd.DataFrame(
-            {
-                "Coefficient" : np.nan ,
-                "95% CI: Lower" : np.nan ,
-                "95% CI: Upper" : np.nan ,
-                "Std. Error"  : np.nan ,
-                "z Statistic" : np.nan ,
-                "p-value"     : np.nan ,
-            }, index=[cat]
-        )
-        temp_2 = pd.DataFrame(
+    # One block of rows per class, under a row with its name, made into a frame once.
+    column = ["Coefficient", "95% CI: Lower", "95% CI: Upper", "Std. Error", "z Statistic", "p-value"]
+    conf = model.conf_int()
+    part = []
+    for i, cat in enumerate(group):
+        block = _result(
             {
-                "Coefficient" : _CC(lambda: model.params[i]),
-                "95% CI: Lower" : _CC(lambda: model.conf_int().xs(str(i+1), level=0)["lower"]) ,
-                "95% CI: Upper" : _CC(lambda: model.conf_int().xs(str(i+1), level=0)["upper"]) ,
-                "Std. Error"  : _CC(lambda: model.bse[i]),
-                "z Statistic" : _CC(lambda: model.tvalues[i]),
-                "p-value"     : _CC(lambda: model.pvalues[i])
+                "Coefficient" : model.params[i],
+                "95% CI: Lower" : conf.xs(str(i+1), level=0)["lower"] ,
+                "95% CI: Upper" : conf.xs(str(i+1), level=0)["upper"] ,
+                "Std. Error"  : model.bse[i],
+                "z Statistic" : model.tvalues[i],
+                "p-value"     : model.pvalues[i]
             }
-        )
-        temp_3 = pd.DataFrame(
-            {
-                "Coefficient" : np.nan ,
-                "95% CI: Lower" : np.nan ,
-                "95% CI: Upper" : np.nan ,
-                "Std. Error"  : np.nan ,
-                "z Statistic" : np.nan ,
-                "p-value"     : np.nan ,
-            }, index=[""]
-        )
-        summary = pd.concat([summary, temp_1, temp_2, temp_3])
+        ).build()
+        part += [pd.DataFrame(np.nan, index=[cat], columns=column), block, pd.DataFrame(np.nan, index=[""], columns=column)]
+    summary = pd.concat(part)
     index_change = {}
     for index in summary.index:
         changed = index.replace("/", " / ")
@@ -0,0 +1,216 @@
+import pandas as pd
+import numpy as np
+from scipy import stats as st
+
+from biostats.model.util import _process, _result
+from biostats.model.basic import _read
+from biostats.model.t_test import _adjust
+
+# The variables are tested in blocks of about _BLOCK values, which bounds the
+# memory taken by the sorted copies and the ranks.
+_BLOCK = 2 ** 24
+
+class mass_test:
+
+    def __init__(self, values, code, size, test, kind):
+        self.values = values
+        self.code = code
+        self.size = size
+        self.test = test
+        self.kind = kind
+
+    def calc(self):
+
+        # Sort the samples by group once, so that the sums of every group are
+        # taken with reduceat along the rows of each block of variables.
+        order = np.argsort(self.code, kind="stable")
+        code = self.code[order]
+        start = np.searchsorted(code, np.arange(self.size))
+        step = max(1, _BLOCK // max(1, len(code)))
+        result = []
+        for i in range(0, len(self.values), step):
+            result.append(self.block(self.values[i:i+step][:, order], code, start))
+        return np.concatenate(result, axis=1) if result else np.zeros((5, 0))
+
+    def block(self, x, code, start):
+
+        valid = ~np.isnan(x)
+        n = np.add.reduceat(valid, start, axis=1).astype(np.float64)
+        if self.test in ("wilcoxon rank-sum", "kruskal-wallis"):
+            (x, tie) = self.rank(x)
+        total = np.add.reduceat(np.where(valid, x, 0), start, axis=1)
+        N = n.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = total / n
+            if self.test == "two-sample t-test":
+                dev = np.where(valid, x - mean[:, code], 0)
+                var = np.add.reduceat(dev * dev, start, axis=1) / (n - 1)
+                return self.t_test(n, mean, var)
+            if self.test == "one-way anova":
+                dev = np.where(valid, x - mean[:, code], 0)
+                return self.anova(n, mean, np.add.reduceat(dev * dev, start, axis=1), N)
+            if self.test == "wilcoxon rank-sum":
+                return self.rank_sum(n, total, tie, N)
+            return self.kruskal_wallis(n, total, tie, N)
+
+    def rank(self, x):
+
+        # The average ranks of every row, leaving out the missing values, and the
+        # sum of t^3 - t over the ties, from where the runs of equal values start
+        # in the sorted rows.
+        order = np.argsort(x, axis=1, kind="stable")
+        y = np.take_along_axis(x, order, axis=1)
+        col = np.arange(y.shape[1])
+        first = np.ones(y.shape, dtype=bool)
+        first[:, 1:] = y[:, 1:] != y[:, :-1]
+        begin = np.maximum.accumulate(np.where(first, col, 0), axis=1)
+        run = (np.cumsum(first, axis=1) - 1) + np.arange(len(y))[:, None] * y.shape[1]
+        t = np.bincount(run.ravel(), minlength=y.size)[run]
+        rank = np.where(np.isnan(y), np.nan, begin + (t + 1) / 2)
+        tie = np.where(np.isnan(y), 0, t * t - 1.0).sum(axis=1)
+        out = np.empty(x.shape)
+        np.put_along_axis(out, order, rank, axis=1)
+        return out, tie
+
+    def t_test(self, n, mean, var):
+        diff = mean[:, 0] - mean[:, 1]
+        if self.kind == "equal variances":
+            df = n[:, 0] + n[:, 1] - 2
+            se = np.sqrt(((n[:, 0] - 1) * var[:, 0] + (n[:, 1] - 1) * var[:, 1]) * (1 / n[:, 0] + 1 / n[:, 1]) / df)
+        else:
+            (sem_0, sem_1) = (var[:, 0] / n[:, 0], var[:, 1] / n[:, 1])
+            se = np.sqrt(sem_0 + sem_1)
+            df = (sem_0 + sem_1) ** 2 / (sem_0 ** 2 / (n[:, 0] - 1) + sem_1 ** 2 / (n[:, 1] - 1))
+        t = diff / se
+        return np.array([diff, se, df, t, 2 * st.t.sf(np.abs(t), df)])
+
+    def anova(self, n, mean, ss, N):
+        k = (n > 0).sum(axis=1)
+        grand = np.nansum(n * mean, axis=1) / N
+        (ss_1, ss_2) = (np.nansum(n * (mean - grand[:, None]) ** 2, axis=1), ss.sum(axis=1))
+        (df_1, df_2) = (k - 1, N - k)
+        F = (ss_1 / df_1) / (ss_2 / df_2)
+        return np.array([df_1, df_2, ss_1 / df_1, F, st.f.sf(F, df_1, df_2)])
+
+    def rank_sum(self, n, total, tie, N):
+        (n_1, n_2, R) = (n[:, 0], n[:, 1], total[:, 0])
+        T = (np.abs(R - n_1 * (N + 1) / 2) - 0.5) / np.sqrt((n_1 * n_2 / 12) * (N + 1 - tie / (N * (N - 1))))
+        T = np.where(R == n_1 * (N + 1) / 2, 0, T)
+        return np.array([n_1, n_2, R, T, 2 * st.norm.sf(T)])
+
+    def kruskal_wallis(self, n, total, tie, N):
+        k = (n > 0).sum(axis=1)
+        H = np.nansum(total ** 2 / n, axis=1) * 12 / (N * (N + 1)) - 3 * (N + 1)
+        H = H / (1 - tie / (N ** 3 - N))
+        return np.array([k - 1, N, np.full(len(N), np.nan), H, st.chi2.sf(H, k - 1)])
+
+def mass_univariate_test(data, variable, between, test="two-sample t-test", group=None, kind="equal variances", correction="benjamini-hochberg"):
+    '''
+    Test many numeric variables between the same groups at once, such as the genes of an omics dataset.
+
+    Parameters
+    ----------
+    data : :py:class:`pandas.DataFrame`
+        The input data. Must contain at least one numeric column and one categorical column.
+    variable : :py:class:`list`
+        The list of numeric variables to be tested, one test each. Missing values are left out of the test of their variable only.
+    between : :py:class:`str`
+        The categorical variable that specifies which group the samples belong to.
+    test : :py:class:`str`
+        The test done on every variable.
+
+        * "two-sample t-test" : The same as :py:func:`two_sample_t_test`.
+        * "one-way anova" : The same as :py:func:`one_way_anova`.
+        * "wilcoxon rank-sum" : The normal approximation of :py:func:`wilcoxon_rank_sum_test`.
+        * "kruskal-wallis" : The normal approximation of :py:func:`kruskal_wallis_test`.
+    group : :py:class:`list`
+        List of the two groups to be compared, for "two-sample t-test" and "wilcoxon rank-sum".
+    kind : :py:class:`str`
+        For "two-sample t-test", "equal variances" or "unequal variances", as in :py:func:`two_sample_t_test`.
+    correction : :py:class:`str`
+        The way to correct the p-values for testing many variables.
+
+        * "bonferroni" : Multiply the p-values by the number of variables.
+        * "holm" : The step-down method of Holm.
+        * "benjamini-hochberg" : Control the false discovery rate.
+
+    Returns
+    -------
+    result : :py:class:`pandas.DataFrame`
+        One row per variable, with the statistic, degrees of freedom or counts, the uncorrected p-value, and the corrected p-value of its test.
+
+    See also
+    --------
+    two_sample_t_test : Test whether the mean values of a variable are different in two groups.
+    one_way_anova : Test whether the mean values of a variable are different between several groups.
+    pairwise_t_test : Test whether the mean values of a variable are different between every two groups.
+
+    Notes
+    -----
+    The samples are sorted by group once, and the sums, sums of squares and rank sums of all the variables are taken as arrays, in blocks of variables, so testing 20,000 variables costs about as much as reading them.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> data = bs.dataset("linear_discriminant_analysis.csv")
+    >>> variable = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+    >>> result = bs.mass_univariate_test(data=data, variable=variable, between="species", test="one-way anova")
+    >>> result
+           Variable  D.F.  Residual D.F.  Mean Square  F Statistic  Unadjusted p-value       p-value     
+    1  sepal_length     2            147    31.606067   119.264502        1.669669e-31  2.226226e-31  ***
+    2   sepal_width     2            147     5.672400    49.160040        4.492017e-17  4.492017e-17  ***
+    3  petal_length     2            147   218.551400  1180.161182        2.856777e-91  1.142711e-90  ***
+    4   petal_width     2            147    40.206667   960.007147        4.169446e-85  8.338892e-85  ***
+
+    All four variables are significantly different between the three *species*.
+
+    '''
+
+    if test not in ["two-sample t-test", "one-way anova", "wilcoxon rank-sum", "kruskal-wallis"]:
+        raise Warning("The test '{}' is not supported.".format(test))
+    if kind not in ["equal variances", "unequal variances"]:
+        raise Warning("The kind '{}' is not supported.".format(kind))
+    if correction not in ["bonferroni", "holm", "benjamini-hochberg"]:
+        raise Warning("The correction '{}' is not supported.".format(correction))
+
+    # Read every variable once into a row of one buffer, and the groups as codes.
+    variable = list(dict.fromkeys(variable))
+    data = data[data[between].notna()]
+    if test in ("two-sample t-test", "wilcoxon rank-sum"):
+        if group is None or len(group) != 2:
+            raise Warning("Two groups must be given to compare.")
+        code = pd.Index(group).get_indexer(data[between])
+        for (i, x) in enumerate(group):
+            if not (code == i).any():
+                raise Warning("The group '{}' is not in column '{}'.".format(x, between))
+        data = data[code >= 0]
+        code = code[code >= 0]
+        size = 2
+    else:
+        (code, cat) = pd.factorize(data[between], sort=False)
+        size = len(cat)
+    values = _read(data, variable)
+
+    stat = mass_test(values, code, size, test, kind).calc()
+    p = _adjust(stat[4], correction)
+
+    if test == "two-sample t-test":
+        column = ["Difference", "Std. Error", "D.F.", "t Statistic"]
+    elif test == "one-way anova":
+        column = ["D.F.", "Residual D.F.", "Mean Square", "F Statistic"]
+    elif test == "wilcoxon rank-sum":
+        column = ["Count 1", "Count 2", "Rank Sum", "z Statistic"]
+    else:
+        column = ["D.F.", "Count", None, "Chi Square"]
+
+    result = _result({"Variable": variable})
+    for (i, col) in enumerate(column):
+        if col is not None:
+            result.column[col] = stat[i]
+    result.column["Unadjusted p-value"] = stat[4]
+    result.column["p-value"] = p
+    result = result.build(start=1, p=True)
+
+    _process(result)
+
+    return result
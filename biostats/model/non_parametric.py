@@ -2,29 +2,212 @@ import numpy as np
 import pandas as pd
 from scipy import stats as st
 import math
+import itertools
 
-from biostats.model.util import _CC, _process, _add_p
+from biostats.model.util import _CC, _process, _pairing, _result
+from biostats.model.kernel import _log_binom_pmf
+from biostats.model.cache import _cached
 
 class permutation:
 
-    def __init__(self, N, n):
-        self.N = N
-        self.n = n
-        self.s_0 = 0
-        self.s_1 = 0
-    
+    def __init__(self, rank, size=None):
+        self.rank = rank
+        self.size = size
+
+    def calc(self):
+
+        # Mid-ranks are multiples of 0.5, so without ties the sums are counted in
+        # whole units and otherwise in half units: entry x of the result is the
+        # probability of a rank sum of x / unit.
+        rank = np.asarray(self.rank, dtype=np.float64)
+        self.unit = 1 if (rank == np.rint(rank)).all() else 2
+        rank = np.sort(np.rint(self.unit * rank).astype(np.int64))
+
+        # The distribution depends only on the sizes and the tie pattern, so it is
+        # looked up in the on-disk cache before being counted.
+        key = np.concatenate([[-1 if self.size is None else self.size, self.unit], rank])
+        return _cached("permutation", key, lambda: self.count(rank))
+
+    def count(self, rank):
+
+        total = rank.sum()
+
+        if self.size is None:
+            # Signed ranks: every rank joins the sum with probability 1/2.
+            dist = np.zeros(total + 1)
+            dist[0] = 1
+            top = 0
+            for r in rank:
+                top += r
+                dist[r:top+1] += dist[:top+1-r]
+                dist[:top+1] *= 0.5
+            return dist
+
+        # Rank sums: count the subsets of each size that reach each sum, keeping
+        # the smaller side and mirroring it back at the end. Subset sizes that can
+        # no longer reach the target size are skipped.
+        flip = self.size > len(rank) - self.size
+        size = len(rank) - self.size if flip else self.size
+        dist = np.zeros((size + 1, total + 1))
+        dist[0, 0] = 1
+        top = 0
+        for i, r in enumerate(rank):
+            top += r
+            (low, high) = (max(size - len(rank) + i, 0), min(i + 1, size))
+            dist[low+1:high+1, r:top+1] += dist[low:high, :top+1-r]
+        dist = dist[size] / dist[size].sum()
+        return dist[::-1] if flip else dist
+
+    def test(self, R):
+        dist = self.calc()
+        x = int(round(self.unit * R))
+        return min(1.0, 2 * min(dist[:x+1].sum(), dist[x:].sum()))
+
+# Rank permutation tests keep at most _MAX_STATES distinct states between two
+# ranks or subjects, and grow at most _MAX_WORK states from them. The states are
+# grown and the Monte Carlo permutations drawn in batches of about _BATCH.
+_MAX_STATES = 2 ** 22
+_MAX_WORK = 2 ** 26
+_BATCH = 2 ** 20
+
+def _merge_states(merged, new, force):
+
+    # Merge the equal states and add up their probabilities. New states are
+    # merged in once they outnumber the merged ones, which bounds the memory.
+    if merged is None:
+        merged = (np.zeros((0, new[0][0].shape[1]), dtype=np.int64), np.zeros(0))
+    size = sum(len(x) for x in new[1])
+    if size == 0 or (not force and size <= max(_BATCH, len(merged[1]))):
+        return merged, new
+    key = np.concatenate([merged[0]] + new[0])
+    prob = np.concatenate([merged[1]] + new[1])
+
+    # States are looked up by a mixed-radix code when it fits in 64 bits.
+    base = key.max(axis=0) + 1
+    if np.prod(base.astype(np.float64)) < 2 ** 62:
+        (_, first, idx) = np.unique(key @ np.cumprod(np.concatenate([[1], base[:-1]])), return_index=True, return_inverse=True)
+        key = key[first]
+    else:
+        (key, idx) = np.unique(key, axis=0, return_inverse=True)
+    prob = np.bincount(idx.ravel(), weights=prob)
+    if len(key) > _MAX_STATES:
+        raise Warning("The data is too large for the exact test. Use method=\"monte-carlo\" instead.")
+
+    return (key, prob), ([], [])
+
+class rank_permutation:
+
+    def __init__(self, rank, size=None, replicates=None, seed=None):
+        self.rank = rank
+        self.size = size
+        self.replicates = replicates
+        self.seed = seed
+
     def calc(self):
-        self.dfs(0, 1)
-        return self.s_1 / self.s_0
-
-    def dfs(self, s, i):
-        if i == self.N+1:
-            self.s_0 += 1
-            if s <= self.n:
-                self.s_1 += 1
+
+        # With group sizes, the ranks are listed group by group and permuted
+        # across the groups, as in Kruskal-Wallis test. Without, they form one row
+        # per subject and are permuted within each row, as in Friedman test. Both
+        # statistics only grow with the sum of squared rank sums, weighted by the
+        # group sizes, which is compared instead.
+        rank = np.asarray(self.rank, dtype=np.float64)
+        self.unit = 1 if (rank == np.rint(rank)).all() else 2
+        rank = np.rint(self.unit * rank).astype(np.int64)
+
+        if self.size is None:
+            obs = self.statistic(rank.sum(axis=0)[None])[0]
         else:
-            self.dfs(s, i+1)
-            self.dfs(s+i, i+1)
+            size = np.asarray(self.size, dtype=np.int64)
+            obs = self.statistic(np.add.reduceat(rank, np.cumsum(size) - size)[None])[0]
+        limit = obs - 1e-7 * abs(obs)
+
+        if self.replicates is not None:
+            return self.sample(rank, limit)
+        if self.size is None:
+            return self.block(rank, limit)
+        return self.group(rank, limit)
+
+    def statistic(self, total):
+        if self.size is None:
+            return (total.astype(np.float64) ** 2).sum(axis=-1)
+        return (total.astype(np.float64) ** 2 / np.asarray(self.size)).sum(axis=-1)
+
+    def group(self, rank, limit):
+
+        # Deal the ranks to the groups one at a time. A state is the count and the
+        # rank sum of every group, packed into one key per group, and carries its
+        # probability. Groups of the same size are interchangeable, so their keys
+        # are kept sorted, which merges the states that only differ by a swap.
+        size = np.sort(np.asarray(self.size, dtype=np.int64))
+        base = rank.sum() + 1
+        block = np.flatnonzero(np.concatenate([[True], np.diff(size) != 0, [True]]))
+
+        key = np.zeros((1, len(size)), dtype=np.int64)
+        prob = np.ones(1)
+        (step, chunk) = (np.eye(len(size), dtype=np.int64), _BATCH // len(size))
+        for (i, r) in enumerate(np.sort(rank)):
+            (merged, new) = (None, ([], []))
+            for j in range(0, len(key), chunk):
+                (part, w) = (key[j:j+chunk], prob[j:j+chunk])
+                child = (part[:, None, :] + step * (base + r)).reshape(-1, len(size))
+                weight = (w[:, None] * (size - part // base) / (len(rank) - i)).ravel()
+                (child, weight) = (child[weight > 0], weight[weight > 0])
+                for (a, b) in zip(block[:-1], block[1:]):
+                    child[:, a:b] = np.sort(child[:, a:b], axis=1)
+                new[0].append(child)
+                new[1].append(weight)
+                (merged, new) = _merge_states(merged, new, False)
+            (key, prob) = _merge_states(merged, new, True)[0]
+
+        # Every group is full by now, so only the rank sums are left. The order of
+        # groups of the same size does not change the statistic.
+        total = key % base
+        stat = (total.astype(np.float64) ** 2 / size).sum(axis=1)
+        return min(1.0, prob[stat >= limit].sum())
+
+    def block(self, rank, limit):
+
+        # Add the subjects one at a time. A state is the sorted rank sums of the
+        # groups, since every subject is permuted in every way and the statistic
+        # does not depend on the order of the groups.
+        key = np.zeros((1, rank.shape[1]), dtype=np.int64)
+        prob = np.ones(1)
+        for row in rank:
+            (perm, count) = np.unique(np.array(list(itertools.permutations(row))), axis=0, return_counts=True)
+            if len(key) * len(perm) > _MAX_WORK:
+                raise Warning("The data is too large for the exact test. Use method=\"monte-carlo\" instead.")
+            (merged, new) = (None, ([], []))
+            chunk = max(1, _BATCH // perm.size)
+            for j in range(0, len(key), chunk):
+                (part, w) = (key[j:j+chunk], prob[j:j+chunk])
+                new[0].append(np.sort((part[:, None, :] + perm).reshape(-1, rank.shape[1]), axis=1))
+                new[1].append((w[:, None] * count / count.sum()).ravel())
+                (merged, new) = _merge_states(merged, new, False)
+            (key, prob) = _merge_states(merged, new, True)[0]
+
+        stat = self.statistic(key)
+        return min(1.0, prob[stat >= limit].sum())
+
+    def sample(self, rank, limit):
+
+        # Count the random permutations at least as extreme as the observed one,
+        # in batches to bound the memory.
+        rng = np.random.default_rng(self.seed)
+        hit = 0
+        done = 0
+        while done < self.replicates:
+            size = min(self.replicates - done, max(1, _BATCH // rank.size))
+            perm = rng.permuted(np.broadcast_to(rank, (size,) + rank.shape), axis=-1)
+            if self.size is None:
+                total = perm.sum(axis=1)
+            else:
+                total = np.add.reduceat(perm, np.cumsum(self.size) - np.asarray(self.size), axis=1)
+            hit += (self.statistic(total) >= limit).sum()
+            done += size
+
+        p = (hit + 1) / (self.replicates + 1)
+        se = math.sqrt(p * (1 - p) / self.replicates)
+        return p, se
 
 
 def median_test(data, variable, expect):
@@ -81,10 +264,10 @@ def median_test(data, variable, expect):
 
     >>> result
             Rank Sum  z Statistic   p-value   
-    Normal      32.5      2.05306  0.040067  *
-    Exact       32.5          NaN  0.039062  *
+    Normal      32.5      2.05306  0.040067    *
+    Exact       32.5          NaN  0.054688  NaN
 
-    The p-value < 0.05, so the mean value of *Value* is significantly different from the expected value.
+    The p-value of the normal approximation < 0.05, but the exact p-value > 0.05. With such a small sample, the exact test is preferred, so the mean value of *Value* is not significantly different from the expected value.
 
     '''
 
@@ -130,21 +313,19 @@ def median_test(data, variable, expect):
         T = _CC(lambda: (abs(R - n * (n+1) / 4) - 0.5) / math.sqrt(n * (n+1) * (2*n+1) / 24 - _tsum / 48))
     p = _CC(lambda: 2 * (1 - st.norm.cdf(T)))
 
-    if n < 15:
-        exact = permutation(n, int(R))
-        _p = _CC(lambda: exact.calc())
-        _p = _CC(lambda: 2 * min(_p, 1-_p))
+    if n < 300:
+        exact = permutation(data_wide["rank"])
+        _p = _CC(lambda: exact.test(R))
     else:
         _p = np.nan
     
-    result = pd.DataFrame(
+    result = _result(
         {
             "Rank Sum" : [R, R] ,
             "z Statistic" : [T, None] ,
             "p-value" : [p, _p]
         }, index=["Normal", "Exact"]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -167,7 +348,7 @@ def sign_test(data, variable, between, group, pair):
     group : :py:class:`list`
         List of the two groups to be compared.
     pair : :py:class:`str`
-        The variable that specifies the pair ID. Samples in the same pair should have the same ID. Maximum 2000 pairs.
+        The variable that specifies the pair ID. Samples in the same pair should have the same ID. There is no limit on the number of pairs.
 
     Returns
     -------
@@ -241,15 +422,11 @@ def sign_test(data, variable, between, group, pair):
         raise Warning("The column '{}' must be numeric".format(variable))
     if data[between].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(between))
-    if data[pair].nunique() > 2000:
-        raise Warning("The nmuber of classes in column '{}' cannot > 2000.".format(pair))
 
-    data = data[data[between].isin(group)]
-    cross = pd.crosstab(index=data[pair], columns=data[between])
-    for col in cross:
-        cross = cross.drop(cross[cross[col] != 1].index)
-    sub = cross.index.values.tolist()
-    data = data[data[pair].isin(sub)]
+    # The pairs measured once in both groups, laid out side by side.
+    (index, _) = _pairing(data, pair, between, group)
+    values = data[variable].to_numpy(dtype=np.float64, na_value=np.nan)[index]
+    data = data.iloc[np.sort(index.ravel())]
 
     summary = pd.DataFrame(
         {
@@ -268,8 +445,8 @@ def sign_test(data, variable, between, group, pair):
 
     data_wide = pd.DataFrame(
         {
-            "var_1" : data[data[between]==group[0]].sort_values(by=[pair])[variable].tolist() ,
-            "var_2" : data[data[between]==group[1]].sort_values(by=[pair])[variable].tolist()
+            "var_1" : values[:, 0] ,
+            "var_2" : values[:, 1]
         }
     )
     data_wide["diff"] = data_wide["var_1"] - data_wide["var_2"]
@@ -287,29 +464,19 @@ def sign_test(data, variable, between, group, pair):
         z = _CC(lambda: (C - n/2 + 0.5) / math.sqrt(n/4))
         p = _CC(lambda: 2 * st.norm.cdf(z))
 
-    if n < 20:
-        _p = 0
-        if C > n/2:
-            for x in range(C, n+1):
-                _p = _CC(lambda: _p + math.factorial(n) / (math.factorial(x) * math.factorial(n-x) * 2**n))
-            _p = _CC(lambda: _p * 2)
-        elif C < n/2:
-            for x in range(0, C+1):
-                _p = _CC(lambda: _p + math.factorial(n) / (math.factorial(x) * math.factorial(n-x) * 2**n))
-            _p = _CC(lambda: _p * 2)
-        else: 
-            _p = 1
-    else:
-        _p = np.nan
+    if C != n/2:
+        dist = _cached("sign", [n], lambda: np.exp(_log_binom_pmf(np.arange(n+1), n)))
+        _p = _CC(lambda: min(1.0, 2 * dist[:min(C, n-C)+1].sum()))
+    else: 
+        _p = 1
     
-    result = pd.DataFrame(
+    result = _result(
         {
             "Sum" : [C, C] ,
             "z Statistic" : [z, None] ,
             "p-value" : [p, _p]
         }, index=["Normal", "Exact"]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -332,7 +499,7 @@ def wilcoxon_signed_rank_test(data, variable, between, group, pair):
     group : :py:class:`list`
         List of the two groups to be compared.
     pair : :py:class:`str`
-        The variable that specifies the pair ID. Samples in the same pair should have the same ID. Maximum 2000 pairs.
+        The variable that specifies the pair ID. Samples in the same pair should have the same ID. There is no limit on the number of pairs.
 
     Returns
     -------
@@ -406,15 +573,11 @@ def wilcoxon_signed_rank_test(data, variable, between, group, pair):
         raise Warning("The column '{}' must be numeric".format(variable))
     if data[between].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(between))
-    if data[pair].nunique() > 2000:
-        raise Warning("The nmuber of classes in column '{}' cannot > 2000.".format(pair))
 
-    data = data[data[between].isin(group)]
-    cross = pd.crosstab(index=data[pair], columns=data[between])
-    for col in cross:
-        cross = cross.drop(cross[cross[col] != 1].index)
-    sub = cross.index.values.tolist()
-    data = data[data[pair].isin(sub)]
+    # The pairs measured once in both groups, laid out side by side.
+    (index, _) = _pairing(data, pair, between, group)
+    values = data[variable].to_numpy(dtype=np.float64, na_value=np.nan)[index]
+    data = data.iloc[np.sort(index.ravel())]
 
     summary = pd.DataFrame(
         {
@@ -433,8 +596,8 @@ def wilcoxon_signed_rank_test(data, variable, between, group, pair):
 
     data_wide = pd.DataFrame(
         {
-            "var_1" : data[data[between]==group[0]].sort_values(by=[pair])[variable].tolist() ,
-            "var_2" : data[data[between]==group[1]].sort_values(by=[pair])[variable].tolist()
+            "var_1" : values[:, 0] ,
+            "var_2" : values[:, 1]
         }
     )
     data_wide["diff"] = data_wide["var_1"] - data_wide["var_2"]
@@ -454,21 +617,19 @@ def wilcoxon_signed_rank_test(data, variable, between, group, pair):
         T = _CC(lambda: (abs(R - n * (n+1) / 4) - 0.5) / math.sqrt(n * (n+1) * (2*n+1) / 24 - _tsum / 48))
     p = _CC(lambda: 2 * (1 - st.norm.cdf(T)))
 
-    if n < 15:
-        exact = permutation(n, int(R))
-        _p = _CC(lambda: exact.calc())
-        _p = _CC(lambda: 2 * min(_p, 1-_p))
+    if n < 300:
+        exact = permutation(data_wide["rank"])
+        _p = _CC(lambda: exact.test(R))
     else:
         _p = np.nan
     
-    result = pd.DataFrame(
+    result = _result(
         {
             "Rank Sum" : [R, R] ,
             "z Statistic" : [T, None] ,
             "p-value" : [p, _p]
         }, index=["Normal", "Exact"]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -558,7 +719,7 @@ def wilcoxon_rank_sum_test(data, variable, between, group):
     >>> result
             Rank Sum  z Statistic   p-value      
     Normal       357     1.444746  0.148529  <NA>
-    Exact        357          NaN       NaN  <NA>
+    Exact        357          NaN  0.147591  <NA>
 
     The p-value > 0.05, so there is no significant difference between the two groups.
 
@@ -604,21 +765,19 @@ def wilcoxon_rank_sum_test(data, variable, between, group):
         T = _CC(lambda: (abs(R -n_1*(n_1+n_2+1)/2)-0.5)/math.sqrt((n_1*n_2/12)*(n_1+n_2+1-_tsum/((n_1+n_2)*(n_1+ n_2-1)))))
     p = _CC(lambda: 2 * (1 - st.norm.cdf(T)))
 
-    if n_1 + n_2 < 15:
-        exact = permutation(n_1+n_2, int(R))
-        _p = _CC(lambda: exact.calc())
-        _p = _CC(lambda: 2 * min(_p, 1-_p))
+    if n_1 + n_2 < 200:
+        exact = permutation(data["rank"], n_1)
+        _p = _CC(lambda: exact.test(R))
     else:
         _p = np.nan
 
-    result = pd.DataFrame(
+    result = _result(
         {
             "Rank Sum" : [R, R] ,
             "z Statistic" : [T, None] ,
             "p-value" : [p, _p]
         }, index=["Normal", "Exact"]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -626,7 +785,7 @@ def wilcoxon_rank_sum_test(data, variable, between, group):
     return summary, result
 
 
-def kruskal_wallis_test(data, variable, between):
+def kruskal_wallis_test(data, variable, between, method="normal", replicates=10000, seed=None):
     '''
     Test whether the mean values of a variable are different between several groups with nonparametric methods.
 
@@ -638,18 +797,33 @@ def kruskal_wallis_test(data, variable, between):
         The numeric variable that we want to calculate mean values of.
     between : :py:class:`str`
         The categorical variable that specifies which group the samples belong to. Maximum 20 groups.
+    method : :py:class:`str`
+        The way to calculate the p-value.
+
+        * "normal" : Compare the H statistic with the chi-square distribution.
+        * "exact" : Also sum over all the permutations of the ranks between the groups.
+        * "monte-carlo" : Also estimate the p-value from random permutations of the ranks between the groups.
+    replicates : :py:class:`int`
+        The number of random permutations when method is "monte-carlo".
+    seed : :py:class:`int`
+        The random seed when method is "monte-carlo".
 
     Returns
     -------
     summary : :py:class:`pandas.DataFrame`
         The counts, mean values, standard deviations, minimums, first quartiles, medians, third quartiles, and maximums of the variable in each group.
     result : :py:class:`pandas.DataFrame`
-        The degree of freedom, chi-square statistic, and p-value of the test.
+        The degree of freedom, chi-square statistic, and p-value of the test. For "exact" and "monte-carlo", the p-value of the permutation test is also given, with the standard error of the estimate for "monte-carlo".
 
     See also
     --------
     one_way_anova : The parametric version of Kruskal-Wallis test.
 
+    Notes
+    -----
+    .. warning::
+        The exact test sums over the permutations of the ranks between the groups without listing them one by one, and a Warning is raised when they are still too many. For larger data, ``method="monte-carlo"`` is recommended.
+
     Examples
     --------
     >>> import biostats as bs
@@ -737,6 +911,8 @@ def kruskal_wallis_test(data, variable, between):
         raise Warning("The column '{}' must be numeric".format(variable))
     if data[between].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(between))
+    if method not in ["normal", "exact", "monte-carlo"]:
+        raise Warning("The method '{}' is not supported.".format(method))
 
     summary = pd.DataFrame(
         {
@@ -765,6 +941,7 @@ def kruskal_wallis_test(data, variable, between):
     R_i = data2.groupby(between, sort=False)[variable].sum().tolist()
     n_i = data2.groupby(between, sort=False)[variable].count().tolist()
     k = _CC(lambda: len(n_i))
+    rank = np.concatenate([x.values for (_, x) in data2.groupby(between, sort=False)[variable]])
 
     H = 0
     for i in range(k):
@@ -782,15 +959,28 @@ def kruskal_wallis_test(data, variable, between):
 
     p = _CC(lambda: 1 - st.chi2.cdf(H, k-1))
 
-    result = pd.DataFrame(
-        {
-            "D.F.": _CC(lambda: k-1),
-            "Chi Square": _CC(lambda: H),
-            "p-value": _CC(lambda: p)
-        }, index=["Model"]
-    )
-
-    _add_p(result)
+    # The exact or Monte Carlo row goes into the same table as the model row,
+    # with a standard error column only when there is an estimate to report.
+    result = _result()
+    row = {"D.F.": _CC(lambda: k-1), "Chi Square": H}
+    if method == "monte-carlo":
+        row["Std. Error"] = np.nan
+    row["p-value"] = p
+    result.add(row, "Model")
+
+    if method == "exact":
+        test = rank_permutation(rank, n_i)
+        _p = test.calc()
+        result.add({"D.F.": np.nan, "Chi Square": H, "p-value": _p}, "Exact")
+
+    if method == "monte-carlo":
+        test = rank_permutation(rank, n_i, replicates, seed)
+        estimate = _CC(lambda: test.calc())
+        _p = _CC(lambda: estimate[0])
+        se = _CC(lambda: estimate[1])
+        result.add({"D.F.": np.nan, "Chi Square": H, "Std. Error": se, "p-value": _p}, "Monte Carlo")
+
+    result = result.build(p=True)
 
     _process(summary)
     _process(result)
@@ -798,7 +988,7 @@ def kruskal_wallis_test(data, variable, between):
     return summary, result
 
 
-def friedman_test(data, variable, between, subject):
+def friedman_test(data, variable, between, subject, method="normal", replicates=10000, seed=None):
     '''
     Test whether the mean values of a variable are different between several groups on repeated measured data with nonparametric methods.
 
@@ -811,20 +1001,35 @@ def friedman_test(data, variable, between, subject):
     between : :py:class:`str`
         The categorical variable that specifies which group the samples belong to. Maximum 20 groups.
     subject : :py:class:`str`
-        The variable that specifies the subject ID. Samples measured on the same subject should have the same ID. Maximum 2000 subjects.
+        The variable that specifies the subject ID. Samples measured on the same subject should have the same ID. There is no limit on the number of subjects.
+    method : :py:class:`str`
+        The way to calculate the p-value.
+
+        * "normal" : Compare the Friedman statistic with the chi-square distribution.
+        * "exact" : Also sum over all the permutations of the ranks within each subject.
+        * "monte-carlo" : Also estimate the p-value from random permutations of the ranks within each subject.
+    replicates : :py:class:`int`
+        The number of random permutations when method is "monte-carlo".
+    seed : :py:class:`int`
+        The random seed when method is "monte-carlo".
 
     Returns
     -------
     summary : :py:class:`pandas.DataFrame`
         The counts, mean values, standard deviations, minimums, first quartiles, medians, third quartiles, and maximums of the variable in each group.
     result : :py:class:`pandas.DataFrame`
-        The degree of freedom, chi-square statistic, and p-value of the test.
+        The degree of freedom, chi-square statistic, and p-value of the test. For "exact" and "monte-carlo", the p-value of the permutation test is also given, with the standard error of the estimate for "monte-carlo".
 
     See also
     --------
     kruskal_wallis_test : Test whether the mean values of a variable are different between groups with nonparametric methods.
     repeated_measures_anova : The parametric version of Friedman Test.
 
+    Notes
+    -----
+    .. warning::
+        The exact test sums over the permutations of the ranks within each subject without listing them one by one, and a Warning is raised when they are still too many. For larger data, ``method="monte-carlo"`` is recommended.
+
     Examples
     --------
     >>> import biostats as bs
@@ -879,39 +1084,29 @@ def friedman_test(data, variable, between, subject):
         raise Warning("The column '{}' must be numeric".format(variable))
     if data[between].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(between))
-    if data[subject].nunique() > 2000:
-        raise Warning("The nmuber of classes in column '{}' cannot > 2000.".format(subject))
-
-    cross = pd.crosstab(index=data[subject], columns=data[between])
-    for col in cross:
-        cross = cross.drop(cross[cross[col] != 1].index)
-    sub = cross.index.values.tolist()
-    data = data[data[subject].isin(sub)]
-    
-    group = data[between].dropna().unique()
-
-    summary = pd.DataFrame()
-
-    for x in group:
-        temp = pd.DataFrame(
-            {
-                "{}".format(between): x,
-                "Count": _CC(data[data[between]==x][variable].dropna().count) ,
-                "Mean": _CC(data[data[between]==x][variable].dropna().mean) ,
-                "Std. Deviation": _CC(data[data[between]==x][variable].dropna().std) ,
-                "Minimum": _CC(data[data[between]==x][variable].dropna().min),
-                "1st Quartile": _CC(lambda: data[data[between]==x][variable].dropna().quantile(0.25)),
-                "Median": _CC(data[data[between]==x][variable].dropna().median),
-                "3rd Quartile": _CC(lambda: data[data[between]==x][variable].dropna().quantile(0.75)),
-                "Maximum": _CC(data[data[between]==x][variable].dropna().max),
-            }, index=[0]
-        )
-        summary = pd.concat([summary, temp], ignore_index=True)
-    summary.index += 1
+    if method not in ["normal", "exact", "monte-carlo"]:
+        raise Warning("The method '{}' is not supported.".format(method))
 
-    data_wide = pd.DataFrame()
-    for x in group:
-        data_wide[x] = data[data[between]==x].sort_values(by=[subject])[variable].tolist()
+    # The subjects measured once in every group, laid out side by side.
+    (index, group) = _pairing(data, subject, between)
+    values = data[variable].to_numpy(dtype=np.float64, na_value=np.nan)[index]
+
+    wide = pd.DataFrame(values, columns=range(len(group)))
+    summary = _result(
+        {
+            "{}".format(between): group,
+            "Count": wide.count().to_numpy() ,
+            "Mean": wide.mean().to_numpy() ,
+            "Std. Deviation": wide.std().to_numpy() ,
+            "Minimum": wide.min().to_numpy() ,
+            "1st Quartile": wide.quantile(0.25).to_numpy() ,
+            "Median": wide.median().to_numpy() ,
+            "3rd Quartile": wide.quantile(0.75).to_numpy() ,
+            "Maximum": wide.max().to_numpy() ,
+        }
+    ).build(start=1)
+
+    data_wide = pd.DataFrame(values, columns=group)
     data_wide = data_wide.rank(axis=1)
 
     k = _CC(lambda: len(data_wide.columns))
@@ -923,14 +1118,28 @@ def friedman_test(data, variable, between, subject):
     chi2 = _CC(lambda: R_2 * 12 / (n * k * (k + 1)) - 3 * n * (k + 1))
     p = _CC(lambda: 1 - st.chi2.cdf(chi2, k-1))
 
-    result = pd.DataFrame(
-        {
-            "D.F.": _CC(lambda: k-1),
-            "Chi Square": _CC(lambda: chi2),
-            "p-value": _CC(lambda: p)
-        }, index=["Model"]
-    )
-    _add_p(result)
+    # The exact or Monte Carlo row goes into the same table as the model row,
+    # with a standard error column only when there is an estimate to report.
+    result = _result()
+    row = {"D.F.": _CC(lambda: k-1), "Chi Square": chi2}
+    if method == "monte-carlo":
+        row["Std. Error"] = np.nan
+    row["p-value"] = p
+    result.add(row, "Model")
+
+    if method == "exact":
+        test = rank_permutation(data_wide.values)
+        _p = test.calc()
+        result.add({"D.F.": np.nan, "Chi Square": chi2, "p-value": _p}, "Exact")
+
+    if method == "monte-carlo":
+        test = rank_permutation(data_wide.values, None, replicates, seed)
+        estimate = _CC(lambda: test.calc())
+        _p = _CC(lambda: estimate[0])
+        se = _CC(lambda: estimate[1])
+        result.add({"D.F.": np.nan, "Chi Square": chi2, "Std. Error": se, "p-value": _p}, "Monte Carlo")
+
+    result = result.build(p=True)
 
     _process(summary)
     _process(result)
@@ -1021,7 +1230,7 @@ def spearman_rank_correlation(data, x, y):
 
     summary = pd.DataFrame(
         {
-            "Coefficient": _CC(lambda: r)
+            "Coefficient": r
         }, index=["Correlation"]
     )
 
@@ -1029,14 +1238,13 @@ def spearman_rank_correlation(data, x, y):
     p = _CC(lambda: st.t.cdf(t, n-2))
     p = _CC(lambda a: 2*min(a, 1-a), p)
 
-    result = pd.DataFrame(
+    result = _result(
         {
             "D.F." : _CC(lambda: n-2) ,
-            "t Statistic" : _CC(lambda: t) ,
-            "p-value" : _CC(lambda: p)
+            "t Statistic" : t ,
+            "p-value" : p
         }, index=["Model"]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
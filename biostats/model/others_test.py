@@ -7,7 +7,7 @@ from factor_analyzer import FactorAnalyzer
 from sklearn.decomposition import PCA
 from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
 
-from biostats.model.util import _CC, _process, _add_p
+from biostats.model.util import _CC, _process, _add_p, _result
 
 def screening_test(data, disease, disease_target, test, test_target):
     '''
@@ -377,19 +377,13 @@ def factor_analysis(data, x, factors, analyze=None):
     summary.index = ["Uniqueness"]
     summary.columns = x
 
-    loadings = pd.DataFrame(fa.loadings_)
-    loadings.index = x
-    loadings.columns = ["Factor {}".format(i+1) for i in range(factors)]
-
-    blank = pd.DataFrame([[np.nan]*factors])
-    blank.index = [""]
-    blank.columns = ["Factor {}".format(i+1) for i in range(factors)]
-
-    var = pd.DataFrame(np.array(fa.get_factor_variance()))
-    var.index = ["SS Loadings", "Proportion Var.", "Cumulative Var."]
-    var.columns = ["Factor {}".format(i+1) for i in range(factors)]
-
-    result = pd.concat([loadings, blank, var])
+    # The loadings, a blank row and the variances explained, stacked into one
+    # table at once.
+    table = np.vstack([fa.loadings_, np.full((1, factors), np.nan), np.array(fa.get_factor_variance())])
+    result = _result(
+        {"Factor {}".format(i+1): table[:, i] for i in range(factors)},
+        index = list(x) + ["", "SS Loadings", "Proportion Var.", "Cumulative Var."]
+    ).build()
 
     if analyze:
         analysis = pd.DataFrame(fa.transform(pd.DataFrame(analyze, index=[0])))
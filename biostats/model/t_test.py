@@ -6,7 +6,7 @@ import math
 from statsmodels.formula.api import ols
 from statsmodels.stats.anova import anova_lm
 
-from biostats.model.util import _CC, _process, _add_p
+from biostats.model.util import _CC, _process, _add_p, _read_stats, _pairing, _result
 
 def one_sample_t_test(data, variable, expect, kind="two-side"):
     '''
@@ -82,11 +82,15 @@ def one_sample_t_test(data, variable, expect, kind="two-side"):
     mean = _CC(st.tmean, data[variable].dropna())
     sem = _CC(st.tsem, data[variable].dropna())
 
+    return _one_sample_t_test(variable, n, mean, sem, expect, kind)
+
+def _one_sample_t_test(variable, n, mean, sem, expect, kind):
+
     if kind == "two-side":
         summary = pd.DataFrame(
             {
-                "Estimate" : _CC(lambda: mean) ,
-                "Std. Error" : _CC(lambda: sem) ,
+                "Estimate" : mean ,
+                "Std. Error" : sem ,
                 "95% CI: Lower" : _CC(lambda: st.t.ppf(0.025, n-1, mean, sem)) ,
                 "95% CI: Upper" : _CC(lambda: st.t.ppf(0.975, n-1, mean, sem)) ,
             }, index=[variable]
@@ -94,18 +98,18 @@ def one_sample_t_test(data, variable, expect, kind="two-side"):
         t = _CC(lambda: (mean-expect)/sem)
         p = _CC(lambda: st.t.cdf(t, n-1))
         p = _CC(lambda: 2*min(p, 1-p))
-        result = pd.DataFrame(
+        result = _result(
             {
                 "D.F." : _CC(lambda: n-1) ,
-                "t Statistic" : _CC(lambda: t) ,
-                "p-value" : _CC(lambda: p)
+                "t Statistic" : t ,
+                "p-value" : p
             }, index=["Model"]
-        )
+        ).build(p=True)
     elif kind == "greater":
         summary = pd.DataFrame(
             {
-                "Estimate" : _CC(lambda: mean) ,
-                "Std. Error" : _CC(lambda: sem) ,
+                "Estimate" : mean ,
+                "Std. Error" : sem ,
                 "95% CI: Lower" : _CC(lambda: st.t.ppf(0.05, n-1, mean, sem)) ,
                 "95% CI: Upper" : "Inf" ,
             }, index=[variable]
@@ -113,42 +117,97 @@ def one_sample_t_test(data, variable, expect, kind="two-side"):
         t = _CC(lambda: (mean-expect)/sem)
         p = _CC(lambda: st.t.cdf(t, n-1))
         p = _CC(lambda: 1-p)
-        result = pd.DataFrame(
+        result = _result(
             {
                 "D.F." : _CC(lambda: n-1) ,
-                "t Statistic" : _CC(lambda: t) ,
-                "p-value" : _CC(lambda: p)
+                "t Statistic" : t ,
+                "p-value" : p
             }, index=["Model"]
-        )
+        ).build(p=True)
     elif kind == "less":
         summary = pd.DataFrame(
             {
-                "Estimate" : _CC(lambda: mean) ,
-                "Std. Error" : _CC(lambda: sem) ,
+                "Estimate" : mean ,
+                "Std. Error" : sem ,
                 "95% CI: Lower" : "-Inf" ,
                 "95% CI: Upper" : _CC(lambda: st.t.ppf(0.95, n-1, mean, sem)) ,
             }, index=[variable]
         )
         t = _CC(lambda: (mean-expect)/sem)
         p = _CC(lambda: st.t.cdf(t, n-1))
-        result = pd.DataFrame(
+        result = _result(
             {
                 "D.F." : _CC(lambda: n-1) ,
-                "t Statistic" : _CC(lambda: t) ,
-                "p-value" : _CC(lambda: p)
+                "t Statistic" : t ,
+                "p-value" : p
             }, index=["Model"]
-        )
+        ).build(p=True)
     else:
         return
 
-    _add_p(result)
-
     _process(summary)
     _process(result)
 
     return summary, result
 
 
+def one_sample_t_test_stats(data, count, mean, std, expect, kind="two-side"):
+    '''
+    Test whether the mean value of a variable is different from the expected value, from its count, mean value and standard deviation.
+
+    Parameters
+    ----------
+    data : :py:class:`pandas.DataFrame`
+        The summary of the input data, in one row. Must contain the count, mean value and standard deviation of the variable.
+    count : :py:class:`str`
+        The column of the count.
+    mean : :py:class:`str`
+        The column of the mean value.
+    std : :py:class:`str`
+        The column of the sample standard deviation.
+    expect : :py:class:`float` or :py:class:`int`
+        The expected value.
+    kind : :py:class:`str`
+        * "two-side" : Test whether the mean value is different from the expected value.
+        * "greater" : Test whether the mean value is greater than the expected value.
+        * "less" : Test whether the mean value is less than the expected value.
+
+    Returns
+    -------
+    summary : :py:class:`pandas.DataFrame`
+        The estimation, standard error, and confidence interval of the mean value.
+    result : :py:class:`pandas.DataFrame`
+        The degree of freedom, t statistic, and p-value of the test.
+
+    See also
+    --------
+    one_sample_t_test : The same test on the raw data.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> import pandas as pd
+    >>> data = pd.DataFrame({"Count": [10], "Angle": [117.16], "SD": [2.432282]})
+    >>> summary, result = bs.one_sample_t_test_stats(data=data, count="Count", mean="Angle", std="SD", expect=120, kind="two-side")
+    >>> summary
+           Estimate  Std. Error  95% CI: Lower  95% CI: Upper
+    Angle    117.16    0.769155      115.42005      118.89995
+    >>> result
+           D.F.  t Statistic   p-value    
+    Model     9    -3.692362  0.004979  **
+
+    The same as :py:func:`one_sample_t_test` on the 10 values of *Angle*.
+
+    '''
+
+    (_, n, m, sd) = _read_stats(data, count, mean, std)
+
+    if len(n) != 1:
+        raise Warning("The summary must be given in one row.")
+
+    return _one_sample_t_test(mean, n[0], m[0], sd[0] / math.sqrt(n[0]), expect, kind)
+
+
 def two_sample_t_test(data, variable, between, group, kind="equal variances"):
     '''
     Test whether the mean values of a variable are different in two groups.
@@ -248,17 +307,26 @@ def two_sample_t_test(data, variable, between, group, kind="equal variances"):
     if data[between].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(between))
 
-    n, mean, std, sem = [None] * 2, [None] * 2, [None] * 2, [None] * 2
-    for i, cat, in enumerate(group):
-        n[i]    = _CC(data[data[between]==cat][variable].dropna().count)
-        mean[i] = _CC(st.tmean, data[data[between]==cat][variable].dropna())
-        std[i]  = _CC(st.tstd, data[data[between]==cat][variable].dropna())
-        sem[i]  = _CC(st.tsem, data[data[between]==cat][variable].dropna())
+    stats = data.groupby(between, sort=False)[variable].agg(["count", "mean", "std"]).reindex(group)
+    (n, mean, std, sem) = _two_groups(stats["count"].fillna(0), stats["mean"], stats["std"])
+
+    return _two_sample_t_test(group, n, mean, std, sem, kind)
+
+def _two_groups(n, mean, std):
+
+    # The counts, mean values, standard deviations and standard errors of the
+    # two groups, as plain numbers.
+    n = np.asarray(n, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sem = np.asarray(std, dtype=np.float64) / np.sqrt(n)
+    return n.astype(np.int64).tolist(), list(np.asarray(mean, dtype=np.float64)), list(np.asarray(std, dtype=np.float64)), list(sem)
 
-    summary = pd.DataFrame(
+def _two_sample_t_test(group, n, mean, std, sem, kind):
+
+    summary = _result(
         {
-            "Estimate" : _CC(lambda: mean) ,
-            "Std. Error" : _CC(lambda: sem) ,
+            "Estimate" : mean ,
+            "Std. Error" : sem ,
             "95% CI: Lower" : [_CC(lambda: st.t.ppf(0.025, n[i]-1, mean[i], sem[i])) for i in range(2)] ,
             "95% CI: Upper" : [_CC(lambda: st.t.ppf(0.975, n[i]-1, mean[i], sem[i])) for i in range(2)] ,
         }, index=group
@@ -271,23 +339,22 @@ def two_sample_t_test(data, variable, between, group, kind="equal variances"):
         p = _CC(lambda: st.t.cdf(t, n[0]+n[1]-2))
         p = _CC(lambda a: 2*min(a, 1-a), p)
 
-        diff = pd.DataFrame(
+        summary.add(
             {
-                "Estimate" : _CC(lambda: _mean) ,
-                "Std. Error" : _CC(lambda: _sem) ,
+                "Estimate" : _mean ,
+                "Std. Error" : _sem ,
                 "95% CI: Lower" : _CC(lambda: st.t.ppf(0.025, n[0]+n[1]-2, _mean, _sem)) ,
                 "95% CI: Upper" : _CC(lambda: st.t.ppf(0.975, n[0]+n[1]-2, _mean, _sem)) ,
-            }, index=["Difference"]
+            }, index="Difference"
         )
-        summary = pd.concat([summary, diff])
 
-        result = pd.DataFrame(
+        result = _result(
             {
                 "D.F." : _CC(lambda: n[0]+n[1]-2) ,
-                "t Statistic" : _CC(lambda: t) ,
-                "p-value" : _CC(lambda: p)
+                "t Statistic" : t ,
+                "p-value" : p
             }, index=["Model"]
-        )
+        ).build(p=True)
     elif kind == "unequal variances":
         _mean = _CC(lambda: mean[0]-mean[1])
         _sem = _CC(lambda: math.sqrt(sem[0]**2+sem[1]**2))
@@ -296,27 +363,26 @@ def two_sample_t_test(data, variable, between, group, kind="equal variances"):
         p = _CC(lambda: st.t.cdf(t, df))
         p = _CC(lambda a: 2*min(a, 1-a), p)
 
-        diff = pd.DataFrame(
+        summary.add(
             {
-                "Estimate" : _CC(lambda: _mean) ,
-                "Std. Error" : _CC(lambda: _sem) ,
+                "Estimate" : _mean ,
+                "Std. Error" : _sem ,
                 "95% CI: Lower" : _CC(lambda: st.t.ppf(0.025, n[0]+n[1]-2, _mean, _sem)) ,
                 "95% CI: Upper" : _CC(lambda: st.t.ppf(0.975, n[0]+n[1]-2, _mean, _sem)) ,
-            }, index=["Difference"]
+            }, index="Difference"
         )
-        summary = pd.concat([summary, diff])
 
-        result = pd.DataFrame(
+        result = _result(
             {
-                "D.F." : _CC(lambda: df) ,
-                "t Statistic" : _CC(lambda: t) ,
-                "p-value" : _CC(lambda: p)
+                "D.F." : df ,
+                "t Statistic" : t ,
+                "p-value" : p
             }, index=["Model"]
-        )
+        ).build(p=True)
     else:
         return
 
-    _add_p(result)
+    summary = summary.build()
 
     _process(summary)
     _process(result)
@@ -324,6 +390,64 @@ def two_sample_t_test(data, variable, between, group, kind="equal variances"):
     return summary, result
 
 
+def two_sample_t_test_stats(data, between, count, mean, std, group, kind="equal variances"):
+    '''
+    Test whether the mean values of a variable are different in two groups, from their counts, mean values and standard deviations.
+
+    Parameters
+    ----------
+    data : :py:class:`pandas.DataFrame`
+        The summary of the input data, one row per group. Must contain a categorical column and the counts, mean values and standard deviations of the groups.
+    between : :py:class:`str`
+        The categorical variable that specifies the groups.
+    count : :py:class:`str`
+        The column of the counts.
+    mean : :py:class:`str`
+        The column of the mean values.
+    std : :py:class:`str`
+        The column of the sample standard deviations.
+    group : :py:class:`list`
+        List of the two groups to be compared.
+    kind : :py:class:`str`
+        * "equal variances" : The normal two-sample t-test which assumes variances of the two groups are equal.
+        * "unequal variances" : The variant model in which variances of the two groups can be unequal. Also called Welch's t-test.
+
+    Returns
+    -------
+    summary : :py:class:`pandas.DataFrame`
+        The estimations, standard errors, and confidence intervals of the mean values in the two groups, as well as the difference between them.
+    result : :py:class:`pandas.DataFrame`
+        The degree of freedom, t statistic, and p-value of the test.
+
+    See also
+    --------
+    two_sample_t_test : The same test on the raw data.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> import pandas as pd
+    >>> data = pd.DataFrame({"Time": ["2pm", "5pm"], "Count": [18, 16], "Mean": [66.555556, 64.625], "SD": [4.889632, 3.667424]})
+    >>> summary, result = bs.two_sample_t_test_stats(data=data, between="Time", count="Count", mean="Mean", std="SD", group=["2pm", "5pm"], kind="equal variances")
+    >>> result
+           D.F.  t Statistic  p-value      
+    Model    32     1.288822   0.2067  <NA>
+
+    The same as :py:func:`two_sample_t_test` on the 34 values of *Value*.
+
+    '''
+
+    (cat, n, m, sd) = _read_stats(data, count, mean, std, between)
+
+    pos = {x: i for (i, x) in enumerate(cat)}
+    for x in group:
+        if x not in pos:
+            raise Warning("The group '{}' is not in column '{}'.".format(x, between))
+    idx = [pos[x] for x in group]
+
+    return _two_sample_t_test(group, list(n[idx]), list(m[idx]), list(sd[idx]), list(sd[idx] / np.sqrt(n[idx])), kind)
+
+
 def paired_t_test(data, variable, between, group, pair):
     '''
     Test whether the mean values of a variable are different in two paired groups.
@@ -339,7 +463,7 @@ def paired_t_test(data, variable, between, group, pair):
     group : :py:class:`list`
         List of the two groups to be compared.
     pair : :py:class:`str`
-        The variable that specifies the pair ID. Samples in the same pair should have the same ID. Maximum 2000 pairs.
+        The variable that specifies the pair ID. Samples in the same pair should have the same ID. There is no limit on the number of pairs.
 
     Returns
     -------
@@ -418,27 +542,18 @@ def paired_t_test(data, variable, between, group, pair):
         raise Warning("The column '{}' must be numeric".format(variable))
     if data[between].nunique() > 20:
         raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(between))
-    if data[pair].nunique() > 2000:
-        raise Warning("The nmuber of classes in column '{}' cannot > 2000.".format(pair))
-
-    data = data[data[between].isin(group)]
-    cross = pd.crosstab(index=data[pair], columns=data[between])
-    for col in cross:
-        cross = cross.drop(cross[cross[col] != 1].index)
-    sub = cross.index.values.tolist()
-    data = data[data[pair].isin(sub)]
-
-    n, mean, std, sem = [None] * 2, [None] * 2, [None] * 2, [None] * 2
-    for i, cat, in enumerate(group):
-        n[i]    = _CC(data[data[between]==cat][variable].dropna().count)
-        mean[i] = _CC(st.tmean, data[data[between]==cat][variable].dropna())
-        std[i]  = _CC(st.tstd, data[data[between]==cat][variable].dropna())
-        sem[i]  = _CC(st.tsem, data[data[between]==cat][variable].dropna())
-
-    summary = pd.DataFrame(
+
+    # The pairs measured once in both groups, laid out side by side.
+    (index, _) = _pairing(data, pair, between, group)
+    values = data[variable].to_numpy(dtype=np.float64, na_value=np.nan)[index]
+
+    wide = pd.DataFrame(values)
+    (n, mean, std, sem) = _two_groups(wide.count(), wide.mean(), wide.std())
+
+    summary = _result(
         {
-            "Estimate" : _CC(lambda: mean) ,
-            "Std. Error" : _CC(lambda: sem) ,
+            "Estimate" : mean ,
+            "Std. Error" : sem ,
             "95% CI: Lower" : [_CC(lambda: st.t.ppf(0.025, n[i]-1, mean[i], sem[i])) for i in range(2)] ,
             "95% CI: Upper" : [_CC(lambda: st.t.ppf(0.975, n[i]-1, mean[i], sem[i])) for i in range(2)] ,
         }, index=group
@@ -446,8 +561,8 @@ def paired_t_test(data, variable, between, group, pair):
 
     data_wide = pd.DataFrame(
         {
-            "var_1" : data[data[between]==group[0]].sort_values(by=[pair])[variable].tolist() ,
-            "var_2" : data[data[between]==group[1]].sort_values(by=[pair])[variable].tolist()
+            "var_1" : values[:, 0] ,
+            "var_2" : values[:, 1]
         }
     )
 
@@ -458,27 +573,26 @@ def paired_t_test(data, variable, between, group, pair):
     _mean = _CC(st.tmean, diff.dropna())
     _sem = _CC(st.tsem, diff.dropna())
 
-    diff = pd.DataFrame(
+    summary.add(
         {
-            "Estimate" : _CC(lambda: _mean) ,
-            "Std. Error" : _CC(lambda: _sem) ,
+            "Estimate" : _mean ,
+            "Std. Error" : _sem ,
             "95% CI: Lower" : _CC(lambda: st.t.ppf(0.025, _n-1, _mean, _sem)) ,
             "95% CI: Upper" : _CC(lambda: st.t.ppf(0.975, _n-1, _mean, _sem)) ,
-        }, index=["Difference"]
+        }, index="Difference"
     )
-    summary = pd.concat([summary, diff])
+    summary = summary.build()
 
     t = _CC(lambda: _mean/_sem)
     p = _CC(lambda: st.t.cdf(t, _n-1))
     p = _CC(lambda a: 2*min(a, 1-a), p)
-    result = pd.DataFrame(
+    result = _result(
         {
             "D.F." : _CC(lambda: _n-1) ,
-            "t Statistic" : _CC(lambda: t) ,
-            "p-value" : _CC(lambda: p)
+            "t Statistic" : t ,
+            "p-value" : p
         }, index=["Model"]
-    )
-    _add_p(result)
+    ).build(p=True)
 
     _process(summary)
     _process(result)
@@ -486,7 +600,7 @@ def paired_t_test(data, variable, between, group, pair):
     return summary, result
 
 
-def pairwise_t_test(data, variable, between):
+def pairwise_t_test(data, variable, between, correction="bonferroni"):
     '''
     Test whether the mean values of a variable are different between every two groups.
 
@@ -497,14 +611,20 @@ def pairwise_t_test(data, variable, between):
     variable : :py:class:`str`
         The numeric variable that we want to calculate mean values of.
     between : :py:class:`str`
-        The categorical variable that specifies which group the samples belong to. Maximum 20 groups.
+        The categorical variable that specifies which group the samples belong to. There is no limit on the number of groups.
+    correction : :py:class:`str`
+        The way to correct the p-values for multiple comparisons.
+
+        * "bonferroni" : Multiply the p-values by the number of pairs.
+        * "holm" : The step-down method of Holm, which is uniformly more powerful than Bonferroni.
+        * "benjamini-hochberg" : Control the false discovery rate instead of the family-wise error rate.
 
     Returns
     -------
     summary : :py:class:`pandas.DataFrame`
         The counts, mean values, standard deviations, and confidence intervals of each group.
     result : :py:class:`pandas.DataFrame`
-        The differences, standard errors, t statistics, and p-values of two-sample t-tests on every pair of groups.
+        The differences, standard errors, t statistics, and corrected p-values of two-sample t-tests on every pair of groups.
 
     See also
     --------
@@ -592,75 +712,137 @@ def pairwise_t_test(data, variable, between):
 
     if str(data[variable].dtypes) not in ("float64", "Int64"):
         raise Warning("The column '{}' must be numeric".format(variable))
-    if data[between].nunique() > 20:
-        raise Warning("The nmuber of classes in column '{}' cannot > 20.".format(between))
+    if correction not in ["bonferroni", "holm", "benjamini-hochberg"]:
+        raise Warning("The correction '{}' is not supported.".format(correction))
 
-    group = data[between].dropna().unique()
+    # The count, mean and standard deviation of every group, at once.
+    stats = data.groupby(between, sort=False)[variable].agg(["count", "mean", "std"])
+    n = stats["count"].to_numpy(dtype=np.float64)
+    mean = stats["mean"].to_numpy(dtype=np.float64)
+    std = stats["std"].to_numpy(dtype=np.float64, na_value=np.nan)
 
-    summary = pd.DataFrame()
+    return _pairwise_t_test(between, stats.index.tolist(), n, mean, std, correction)
 
-    for x in group:
-        n = _CC(data[data[between]==x][variable].dropna().count)
-        mean = _CC(data[data[between]==x][variable].dropna().mean)
-        std = _CC(data[data[between]==x][variable].dropna().std)
-        sem = _CC(data[data[between]==x][variable].dropna().sem)
-        temp = pd.DataFrame(
+
+def pairwise_t_test_stats(data, between, count, mean, std, correction="bonferroni"):
+    '''
+    Test whether the mean values of a variable are different between every two groups, from their counts, mean values and standard deviations.
+
+    Parameters
+    ----------
+    data : :py:class:`pandas.DataFrame`
+        The summary of the input data, one row per group. Must contain a categorical column and the counts, mean values and standard deviations of the groups.
+    between : :py:class:`str`
+        The categorical variable that specifies the groups. There is no limit on the number of groups.
+    count : :py:class:`str`
+        The column of the counts.
+    mean : :py:class:`str`
+        The column of the mean values.
+    std : :py:class:`str`
+        The column of the sample standard deviations.
+    correction : :py:class:`str`
+        The way to correct the p-values for multiple comparisons: "bonferroni", "holm" or "benjamini-hochberg", as in :py:func:`pairwise_t_test`.
+
+    Returns
+    -------
+    summary : :py:class:`pandas.DataFrame`
+        The counts, mean values, standard deviations, and confidence intervals of each group.
+    result : :py:class:`pandas.DataFrame`
+        The differences, standard errors, t statistics, and p-values of two-sample t-tests on every pair of groups.
+
+    See also
+    --------
+    pairwise_t_test : The same test on the raw data.
+
+    Examples
+    --------
+    >>> import biostats as bs
+    >>> data = bs.dataset("pairwise_t_test.csv")
+    >>> stats = data.groupby("Location", sort=False)["Length"].agg(["count", "mean", "std"]).reset_index()
+    >>> summary, result = bs.pairwise_t_test_stats(data=stats, between="Location", count="count", mean="mean", std="std")
+    >>> result.head(3)
+          Group 1    Group 2  Difference  Std. Error  t Statistic   p-value    
+    1     Newport  Tillamook   -0.005400    0.005975    -0.903754  1.000000  NaN
+    2  Petersburg  Tillamook    0.023243    0.006208     3.744222  0.006696   **
+    3     Magadan  Tillamook   -0.002187    0.005975    -0.366104  1.000000  NaN
+
+    The same as :py:func:`pairwise_t_test` on the raw data.
+
+    '''
+
+    if correction not in ["bonferroni", "holm", "benjamini-hochberg"]:
+        raise Warning("The correction '{}' is not supported.".format(correction))
+
+    (group, n, m, sd) = _read_stats(data, count, mean, std, between)
+
+    return _pairwise_t_test(between, group, n, m, sd, correction)
+
+def _group_summary(between, group, n, mean, std):
+
+    # The table of the groups, one row each.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sem = std / np.sqrt(n)
+        return _result(
             {
-                "{}".format(between): x,
-                "Count": _CC(lambda: n),
-                "Mean": _CC(lambda: mean),
-                "Std. Deviation": _CC(lambda: std),
-                "95% CI: Lower" : _CC(lambda: st.t.ppf(0.025, n-1, mean, sem)) ,
-                "95% CI: Upper" : _CC(lambda: st.t.ppf(0.975, n-1, mean, sem)) ,
-            }, index=[0]
-        )
-        summary = pd.concat([summary, temp], ignore_index=True)
-    summary.index += 1
-    result = pd.DataFrame()
-    group = data[between].dropna().unique()
-    df = _CC(lambda: len(data[[variable, between]].dropna()) - len(group))
-    corr = _CC(lambda: len(group) * (len(group) - 1) / 2)
-
-    formula = "Q('%s') ~ " % variable
-    formula += "C(Q('%s'))" % between
-    model = ols(formula, data=data).fit()
-    anova = anova_lm(model)
-    s = _CC(lambda: math.sqrt(anova["mean_sq"][1]))
-
-    for i in range(0, len(group)):
-        for j in range(i+1, len(group)):
-            n, mean, std = [None] * 2, [None] * 2, [None] * 2
-            for k, cat, in enumerate([group[j], group[i]]):
-                n[k]    = _CC(data[data[between]==cat][variable].count)
-                mean[k] = _CC(st.tmean, data[data[between]==cat][variable].dropna())
-                std[k]  = _CC(st.tstd, data[data[between]==cat][variable].dropna())
-            diff = _CC(lambda: mean[0]-mean[1])
-            sem = _CC(lambda: s*math.sqrt(1/n[0]+1/n[1]))
-            t = _CC(lambda: diff/sem)
-            p = _CC(lambda: st.t.cdf(t, df))
-            p = _CC(lambda a: 2*min(a, 1-a), p)
-            p = _CC(lambda: p*corr)
-            if p > 1:
-                p = 1
-            temp = pd.DataFrame(
-                {
-                    "Group 1" : _CC(lambda: group[j]),
-                    "Group 2" : _CC(lambda: group[i]),
-                    "Difference" : _CC(lambda: diff),
-                    "Std. Error" : _CC(lambda: sem),
-                    "t Statistic" : _CC(lambda: t),
-                    "p-value" : _CC(lambda: p)
-                }, index=[0]
-            )
-            result = pd.concat([result, temp], ignore_index=True)
-
-    _add_p(result)
-    result.index += 1
+                "{}".format(between): group,
+                "Count": n,
+                "Mean": mean,
+                "Std. Deviation": std,
+                "95% CI: Lower" : st.t.ppf(0.025, n-1, mean, sem) ,
+                "95% CI: Upper" : st.t.ppf(0.975, n-1, mean, sem) ,
+            }
+        ).build(start=1)
+
+def _pairwise_t_test(between, group, n, mean, std, correction="bonferroni"):
+
+    summary = _group_summary(between, group, n, mean, std)
+
+    # The pooled standard deviation is the root of the residual mean square of
+    # one-way ANOVA, and every pair of groups is compared with it at once.
+    df = n.sum() - len(group)
+    s = np.sqrt(np.where(n > 1, (n - 1) * std ** 2, 0).sum() / df)
+
+    (i, j) = np.triu_indices(len(group), 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diff = mean[j] - mean[i]
+        sem = s * np.sqrt(1 / n[j] + 1 / n[i])
+        t = diff / sem
+        p = st.t.cdf(t, df)
+        p = _adjust(2 * np.minimum(p, 1 - p), correction)
+
+    result = _result(
+        {
+            "Group 1" : np.asarray(group, dtype=object)[j],
+            "Group 2" : np.asarray(group, dtype=object)[i],
+            "Difference" : diff,
+            "Std. Error" : sem,
+            "t Statistic" : t,
+            "p-value" : p
+        }
+    ).build(start=1, p=True)
 
     _process(summary)
     _process(result)
 
-    return summary, result        
-
-
+    return summary, result
 
+def _adjust(p, correction):
+
+    # The corrected p-values of all the pairs at once. Holm and Benjamini-Hochberg
+    # scale the sorted p-values by their ranks and make them monotone with a
+    # running maximum or minimum. Every comparison counts, as k(k-1)/2 pairs do
+    # for k groups, even when its p-value is missing and stays missing.
+    m = len(p)
+    if correction == "bonferroni":
+        return np.minimum(p * m, 1)
+    order = np.argsort(np.where(np.isfinite(p), p, np.inf), kind="stable")
+    q = p[order]
+    rank = np.arange(1, len(p) + 1)
+    if correction == "holm":
+        q = np.maximum.accumulate(np.nan_to_num((m - rank + 1) * q, nan=-np.inf))
+    else:
+        q = np.minimum.accumulate(np.nan_to_num(m / rank * q, nan=np.inf)[::-1])[::-1]
+    adjust = np.empty(len(p))
+    adjust[order] = np.minimum(q, 1)
+    adjust[~np.isfinite(p)] = np.nan
+    return adjust
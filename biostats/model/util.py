@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 
 def _CC(fun, *args):
     try:
@@ -6,38 +7,159 @@ def _CC(fun, *args):
     except:
         return np.nan
 
-def _process(data, num=[], cat=[]):
-    for col in data:
-        if col in num:
+def _coerce(data, col, num, cat):
+    if col in num:
+        if data[col].dtype != 'float64':
             try: 
                 data[col] = data[col].astype('float64')
             except:
                 pass 
-        elif col in cat:
+    elif col in cat:
+        if data[col].dtype != 'object':
             try: 
                 data[col] = data[col].astype('object')
             except:
                 pass 
-        else:
+    elif data[col].dtype != 'Int64':
+        try: 
+            data[col] = data[col].astype('float64')
             try: 
-                data[col] = data[col].astype('float64')
-                try: 
-                    data[col] = data[col].astype('Int64')
-                except:
-                    pass
+                data[col] = data[col].astype('Int64')
             except:
-                data[col] = data[col].astype('object')
+                pass
+        except:
+            data[col] = data[col].astype('object')
+
+def _process(data, num=[], cat=[]):
+    # Float columns with fractions would be left as they are anyway, so they are
+    # found at once and skipped, which matters for wide results.
+    mask = (data.dtypes == 'float64').values
+    with np.errstate(invalid='ignore'):
+        frac = (np.nan_to_num(data.loc[:, mask].to_numpy() % 1) != 0).any(axis=0)
+    skip = set(data.columns[mask][frac]) - set(num) - set(cat)
+    for col in data:
+        if col not in skip:
+            _coerce(data, col, num, cat)
     data.columns = data.columns.map(str)
     data.index = data.index.map(str)
 
+def _weight(data, count):
+    # The frequency of every row, one when no column of counts is given. Rows
+    # of zero count are dropped, as they would be absent from the expanded data.
+    if count is None:
+        return data, np.ones(len(data), dtype=np.int64)
+    try:
+        weight = data[count].to_numpy(dtype=np.float64)
+    except:
+        raise Warning("The column '{}' must be numeric".format(count))
+    if (weight < 0).any() or (weight % 1 != 0).any():
+        raise Warning("The column '{}' must contain non-negative whole numbers.".format(count))
+    keep = weight > 0
+    return data[keep], weight[keep].astype(np.int64)
+
+def _read_stats(data, count, mean, std, between=None):
+    # The count, mean value and standard deviation of every group, one row per
+    # group, as given by a summary of the data done elsewhere.
+    column = [x for x in (between, count, mean, std) if x is not None]
+    data = data[list(dict.fromkeys(column))].dropna(subset=[x for x in column if x != std])
+    _process(data, num=[count, mean, std], cat=[between])
+    for col in (count, mean, std):
+        if str(data[col].dtypes) not in ("float64", "Int64"):
+            raise Warning("The column '{}' must be numeric".format(col))
+    n = data[count].to_numpy(dtype=np.float64)
+    sd = data[std].to_numpy(dtype=np.float64, na_value=np.nan)
+    if (n < 1).any() or (n % 1 != 0).any():
+        raise Warning("The column '{}' must contain positive whole numbers.".format(count))
+    if (sd < 0).any():
+        raise Warning("The column '{}' cannot be negative.".format(std))
+    if between is not None and data[between].duplicated().any():
+        raise Warning("Each class in column '{}' must have only one row.".format(between))
+    group = data[between].tolist() if between is not None else [None] * len(data)
+    return group, n, data[mean].to_numpy(dtype=np.float64), sd
+
+def _pairing(data, subject, between, group=None):
+    # Factorize the subjects and the groups once, and keep the subjects measured
+    # exactly once in every group, found with one bincount of the cells. The rows
+    # of the data come back as a matrix of positions, one row per subject in
+    # sorted order and one column per group, so any column of the data can be
+    # laid out the same way. Without a list of groups, all of them are used, in
+    # the order they first appear among the subjects kept.
+    given = group is not None
+    if given:
+        code = pd.Index(group).get_indexer(data[between])
+    else:
+        (code, group) = pd.factorize(data[between], sort=False)
+    (sub, label) = pd.factorize(data[subject], sort=True)
+    (size, k) = (len(label), len(group))
+    ok = code >= 0
+    cell = np.bincount(sub[ok] * k + code[ok], minlength=size * k).reshape(size, k)
+    index = np.zeros((size, k), dtype=np.int64)
+    index[sub[ok], code[ok]] = np.flatnonzero(ok)
+    index = index[(cell == 1).all(axis=1)]
+    group = list(group)
+    if not given and len(index) > 0:
+        order = np.argsort(index.min(axis=0), kind="stable")
+        (index, group) = (index[:, order], [group[i] for i in order])
+    return index, group
+
+def _proportion(table, kind):
+    # The counts of a contingency table as proportions of their columns, of
+    # their rows, or of the total, all at once.
+    if kind == "vertical":
+        return table / table.sum(axis=0)
+    if kind == "horizontal":
+        return table.div(table.sum(axis=1), axis=0)
+    if kind == "overall":
+        return table / table.to_numpy().sum()
+    return table
+
+def _typed(value):
+    # Whole numbers are stored as nullable integers from the start, which is
+    # the dtype _process would give them.
+    if not isinstance(value, (list, tuple, np.ndarray)):
+        return value
+    values = np.asarray(value)
+    if values.ndim != 1 or values.dtype.kind not in "iubf":
+        return value
+    if values.dtype.kind == "f":
+        with np.errstate(invalid='ignore'):
+            if np.isinf(values).any() or (np.nan_to_num(values % 1) != 0).any():
+                return value
+    return pd.array(values.astype(np.float64), dtype="Int64")
+
+class _result:
+
+    # A result table collected column by column, or one row at a time, and made
+    # into a frame once at the end instead of concatenating a frame per row.
+
+    def __init__(self, column=None, index=None):
+        self.column = dict(column) if column is not None else {}
+        self.index = list(index) if index is not None else None
+        self.own = set()
+
+    def add(self, row, index=None):
+        # A column given at the start is copied into a list of its own the first
+        # time a row is added, so the values of the caller are left as they are.
+        for (name, value) in row.items():
+            if name not in self.own:
+                self.column[name] = list(self.column.get(name, []))
+                self.own.add(name)
+            self.column[name].append(value)
+        if index is not None:
+            if self.index is None:
+                self.index = []
+            self.index.append(index)
+
+    def build(self, start=None, p=False):
+        table = pd.DataFrame({name: _typed(value) for (name, value) in self.column.items()}, index=self.index)
+        if start is not None:
+            table.index = np.arange(start, start + len(table))
+        if p:
+            _add_p(table)
+        return table
 
 def _add_p(data):
-    temp = [np.nan] * len(data)
-    for i in range(len(data)):
-        if data['p-value'][i] <= 0.05:
-            temp[i] = "*"
-        if data['p-value'][i] <= 0.01:
-            temp[i] = "**"
-        if data['p-value'][i] <= 0.001:
-            temp[i] = "***"
-    data[""] = temp
\ No newline at end of file
+    p = data['p-value'].to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(invalid="ignore"):
+        temp = np.select([p <= 0.001, p <= 0.01, p <= 0.05], ["***", "**", "*"], "")
+    data[""] = [x if x else np.nan for x in temp.tolist()]
\ No newline at end of file
@@ -1098,7 +1098,7 @@ class Test(ttk.Frame):
                 except:
                     return
 
-                summary, result = model.binomial_test(self.master.data, variable=variable, expect=expect)
+                summary, result = model.binomial_test(self.master.data, variable=variable, expect=expect, max_time=10)
 
                 self.result[0].data = summary
                 self.result[0].set(10)
@@ -1119,7 +1119,7 @@ class Test(ttk.Frame):
                 if not _kind:
                     return
 
-                summary, result = model.fisher_exact_test(self.master.data, variable_1=variable_1, variable_2=variable_2, kind=_kind.lower())
+                summary, result = model.fisher_exact_test(self.master.data, variable_1=variable_1, variable_2=variable_2, kind=_kind.lower(), max_time=10)
 
                 self.result[0].data = summary
                 self.result[0].set(10)
@@ -1,5 +1,8 @@
+import multiprocessing
+
 from biostats import app
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     root = app.App()
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,7 @@
+import pytest
+
+@pytest.fixture(autouse=True, scope="session")
+def cache_dir(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("BIOSTATS_CACHE", str(tmp_path_factory.mktemp("cache")))
+        yield
@@ -23,3 +23,45 @@ def test_multivariate_anova():
 def test_repeated_measures_anova():
     data = bs.dataset("repeated_measures_anova.csv")
     summary, result = bs.repeated_measures_anova(data=data, variable="response", between="drug", subject="patient")
+
+def test_one_way_anova_stats():
+    import numpy as np
+    data = bs.dataset("one_way_anova.csv")
+    stats = data.groupby("Location", sort=False)["Length"].agg(["count", "mean", "std"]).reset_index()
+    (summary, result) = bs.one_way_anova_stats(stats, "Location", "count", "mean", "std")
+    (_summary, _result) = bs.one_way_anova(data, "Length", "Location")
+    assert np.allclose(result.iloc[:, :5].astype(float), _result.iloc[:, :5].astype(float), equal_nan=True)
+
+def test_one_way_anova_value():
+    import numpy as np
+    from scipy import stats as st
+    data = bs.dataset("one_way_anova.csv")
+    (summary, result) = bs.one_way_anova(data, "Length", "Location")
+    (F, p) = st.f_oneway(*[x["Length"] for (_, x) in data.groupby("Location", sort=False)])
+    assert np.isclose(result["F Statistic"].iloc[0], F)
+    assert np.isclose(result["p-value"].iloc[0], p)
+    assert summary["Count"].tolist() == [10, 8, 7, 8, 6]
+
+def test_repeated_measures_anova_value():
+    import numpy as np
+    data = bs.dataset("repeated_measures_anova.csv")
+    (summary, result) = bs.repeated_measures_anova(data, "response", "drug", "patient")
+    assert np.allclose(result["Sum Square"].astype(float), [698.2, 112.8])
+    assert np.isclose(result["F Statistic"].iloc[0], 24.758865)
+    (summary, result) = bs.repeated_measures_anova(data.iloc[:-1], "response", "drug", "patient", sphericity=True)
+    assert summary["Count"].tolist() == [4, 4, 4, 4]
+    (summary, result) = bs.repeated_measures_anova(data, "response", "drug", "patient", sphericity=True)
+    test = result.loc["Mauchly's Test", ["Mauchly W", "Chi Square", "D.F.", "p-value", "G-G Epsilon"]]
+    assert np.allclose(test.astype(float), [0.186495, 4.571562, 5, 0.470366, 0.604874], atol=1e-6)
+    assert np.isclose(result["D.F."].iloc[2], 3 * 0.604874, atol=1e-5)
+
+def test_anova_design():
+    import numpy as np
+    data = bs.dataset("two_way_ancova.csv")
+    data["Half"] = data["Activity"] / 2
+    data.loc[data.index[0], "Half"] = np.nan
+    result = bs.anova_design(data=data, between=["Sex", "Genotype"], covariable="Age").fit(data=data, variable=["Activity", "Half"])
+    summary, single = bs.two_way_ancova(data=data, variable="Half", between_1="Sex", between_2="Genotype", covariable="Age")
+    half = result[result["Variable"] == "Half"]
+    assert np.allclose(half["F Statistic"].to_numpy(dtype=float)[:4], single["F Statistic"].to_numpy(dtype=float)[:4])
+    assert np.allclose(half["Sum Square"].to_numpy(dtype=float), single["Sum Square"].to_numpy(dtype=float))
@@ -15,3 +15,71 @@ def test_categorical():
 def test_contingency():
     data = bs.dataset("contingency.csv")
     result = bs.contingency(data=data, variable_1="Genotype", variable_2="Health", kind="count")
+
+def test_numeric_value():
+    import numpy as np
+    import pandas as pd
+    from scipy import stats as st
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"A": rng.normal(5, 2, 40), "B": rng.integers(1, 6, 40).astype(float)})
+    data.loc[[3, 17], "A"] = np.nan
+    result = bs.numeric(data=data, variable=["A", "B"])
+    for var in ["A", "B"]:
+        x = data[var].dropna()
+        assert np.isclose(result.loc["Mean", var], x.mean())
+        assert np.isclose(result.loc["Geometric Mean", var], st.gmean(x))
+        assert np.isclose(result.loc["Harmonic Mean", var], st.hmean(x))
+        assert np.isclose(result.loc["Mode", var], st.mode(x, keepdims=False)[0])
+        assert np.isclose(result.loc["Variance", var], x.var())
+        assert np.isclose(result.loc["25% Percentile", var], np.percentile(x, 25))
+        assert np.isclose(result.loc["95% CI: Lower", var], st.t.ppf(0.025, len(x) - 1, x.mean(), st.sem(x)))
+
+def test_numeric_grouped_value():
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"Value": rng.normal(size=500).round(1), "Plate": rng.integers(0, 50, 500).astype(str)})
+    result = bs.numeric_grouped(data=data, variable="Value", group="Plate")
+    assert result.shape[1] == 50
+    grouped = data.groupby("Plate")["Value"]
+    assert np.allclose(result.loc["Mean", grouped.mean().index], grouped.mean())
+    assert np.allclose(result.loc["Variance", grouped.var().index], grouped.var())
+    assert np.allclose(result.loc["75% Percentile", grouped.var().index], grouped.quantile(0.75))
+
+def test_numeric_stream():
+    import numpy as np
+    data = bs.dataset("numeric.csv")
+    variable = ["Fish", "Crab", "Temperature"]
+    result = bs.numeric_stream(source=[data[:4], data[4:7], data[7:]], variable=variable)
+    assert np.allclose(result.astype(float), bs.numeric(data=data, variable=variable).astype(float), equal_nan=True)
+    assert result.attrs["approximate"] == []
+
+def test_partial():
+    import pickle
+    import numpy as np
+    data = bs.dataset("numeric.csv")
+    state = sum(pickle.loads(pickle.dumps(bs.partial_numeric(data[i::3], ["Fish", "Crab"]))) for i in range(3))
+    assert np.allclose(state.result().astype(float), bs.numeric(data, ["Fish", "Crab"]).astype(float), equal_nan=True)
+    data = bs.dataset("numeric_grouped.csv")
+    state = bs.partial_numeric_grouped(data[:4], "Count", "Animal") + bs.partial_numeric_grouped(data[4:], "Count", "Animal")
+    assert np.allclose(state.result().astype(float), bs.numeric_grouped(data, "Count", "Animal").astype(float), equal_nan=True)
+    data = bs.dataset("categorical.csv")
+    state = bs.partial_categorical(data[:100], "Color") + bs.partial_categorical(data[100:], "Color")
+    assert state.result().equals(bs.categorical(data, "Color"))
+    data = bs.dataset("contingency.csv")
+    state = pickle.loads(pickle.dumps(bs.partial_contingency(data[:1000], "Genotype", "Health"))) + bs.partial_contingency(data[1000:], "Genotype", "Health")
+    for kind in ("count", "vertical", "horizontal", "overall"):
+        assert np.allclose(state.result(kind).astype(float), bs.contingency(data, "Genotype", "Health", kind).astype(float))
+
+def test_contingency_sparse():
+    import numpy as np
+    data = bs.dataset("contingency.csv")
+    for kind in ("count", "vertical", "horizontal", "overall"):
+        result = bs.contingency(data, "Genotype", "Health", kind, sparse=True)
+        assert np.allclose(result.sparse.to_dense().astype(float), bs.contingency(data, "Genotype", "Health", kind).astype(float))
+
+def test_count():
+    data = bs.dataset("contingency.csv")
+    agg = data.groupby(["Genotype", "Health"]).size().reset_index(name="Count")
+    assert bs.contingency(agg, "Genotype", "Health", count="Count").equals(bs.contingency(data, "Genotype", "Health"))
+    assert bs.categorical(agg, "Health", count="Count").equals(bs.categorical(data, "Health"))
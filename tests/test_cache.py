@@ -0,0 +1,9 @@
+import os
+import numpy as np
+from biostats.model.cache import _cached, _cache_dir
+
+def test_cached():
+    dist = _cached("test", [1, 2, 3], lambda: np.arange(3.0))
+    again = _cached("test", [1, 2, 3], lambda: np.zeros(3))
+    assert np.array_equal(dist, again)
+    assert os.path.isdir(_cache_dir())
@@ -4,6 +4,10 @@ def test_chi_square_test():
     data = bs.dataset("chi_square_test.csv")
     summary, result = bs.chi_square_test(data=data, variable_1="Genotype", variable_2="Health", kind="horizontal")
 
+def test_chi_square_test_monte_carlo():
+    data = bs.dataset("chi_square_test.csv")
+    summary, result = bs.chi_square_test(data=data, variable_1="Genotype", variable_2="Health", method="monte-carlo", seed=0)
+
 def test_chi_square_test_fit():
     data = bs.dataset("chi_square_test_fit.csv")
     summary, result = bs.chi_square_test_fit(data=data, variable="Canopy", expect={"Douglas":0.54, "Ponderosa":0.40, "Grand":0.05, "Western":0.01})
@@ -15,3 +19,18 @@ def test_mcnemar_test():
 def test_mantel_haenszel_test():
     data = bs.dataset("mantel_haenszel_test.csv")
     summary, result = bs.mantel_haenszel_test(data=data, variable_1="Treatment", variable_2="Revascularization", stratum="Study")
+
+def test_count():
+    data = bs.dataset("chi_square_test.csv")
+    agg = data.groupby(["Genotype", "Health"]).size().reset_index(name="Count")
+    (summary, result) = bs.chi_square_test(agg, "Genotype", "Health", count="Count")
+    assert summary.equals(bs.chi_square_test(data, "Genotype", "Health")[0])
+    assert result.equals(bs.chi_square_test(data, "Genotype", "Health")[1])
+    data = bs.dataset("mcnemar_test.csv")
+    wide = data.pivot(index="ID", columns="Treatment", values="Result")
+    agg = wide.groupby(["before", "after"]).size().reset_index(name="Count")
+    agg["ID"] = range(len(agg))
+    agg = agg.melt(id_vars=["ID", "Count"], value_vars=["before", "after"], var_name="Treatment", value_name="Result")
+    (summary, result) = bs.mcnemar_test(agg, "Treatment", "Result", "ID", count="Count")
+    assert summary.equals(bs.mcnemar_test(data, "Treatment", "Result", "ID")[0])
+    assert result.equals(bs.mcnemar_test(data, "Treatment", "Result", "ID")[1])
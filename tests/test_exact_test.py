@@ -10,4 +10,89 @@ def test_fisher_exact_test():
 
 def test_mcnemar_exact_test():
     data = bs.dataset("mcnemar_exact_test.csv")
-    summary, result = bs.mcnemar_exact_test(data=data, variable_1="Treatment", variable_2="Result", pair="ID")
\ No newline at end of file
+    summary, result = bs.mcnemar_exact_test(data=data, variable_1="Treatment", variable_2="Result", pair="ID")
+
+def test_fisher_exact_test_monte_carlo():
+    data = bs.dataset("fisher_exact_test.csv")
+    summary, result = bs.fisher_exact_test(data=data, variable_1="Frequency", variable_2="Result", method="monte-carlo", seed=0)
+
+def test_fisher_exact_test_parallel():
+    data = bs.dataset("fisher_exact_test.csv")
+    summary, result = bs.fisher_exact_test(data=data, variable_1="Frequency", variable_2="Result", n_jobs=2)
+    summary, serial = bs.fisher_exact_test(data=data, variable_1="Frequency", variable_2="Result")
+    assert result["p-value"].iloc[0] == serial["p-value"].iloc[0]
+
+def test_fisher_exact_test_value():
+    import numpy as np
+    import pandas as pd
+    from scipy import stats as st
+    data = pd.DataFrame({"A": ["x"] * 12 + ["y"] * 9, "B": ["u"] * 9 + ["v"] * 3 + ["u"] * 2 + ["v"] * 7})
+    summary, result = bs.fisher_exact_test(data=data, variable_1="A", variable_2="B")
+    assert np.isclose(result["p-value"].iloc[0], st.fisher_exact([[9, 3], [2, 7]])[1], rtol=1e-9)
+
+def test_fisher_exact_value():
+    import itertools
+    import numpy as np
+    from biostats.model.exact_test import fisher_exact
+    from biostats.model.kernel import _log_hypergeom_pmf
+    table = np.array([[3, 1, 4], [1, 5, 2], [2, 2, 6]])
+    row, col = table.sum(axis=1), table.sum(axis=0)
+    obs = _log_hypergeom_pmf(table)
+    p = 0
+    for a in itertools.product(*[range(x + 1) for x in row]):
+        for b in itertools.product(*[range(x + 1) for x in row]):
+            c = row - np.array(a) - np.array(b)
+            if sum(a) == col[0] and sum(b) == col[1] and (c >= 0).all():
+                prob = _log_hypergeom_pmf(np.column_stack([a, b, c]))
+                if prob <= obs + 1e-7:
+                    p += np.exp(prob)
+    assert np.isclose(fisher_exact(table).calc(), p, rtol=1e-9)
+
+def test_binom_exact_value():
+    import itertools
+    import numpy as np
+    from scipy import stats as st
+    from biostats.model.exact_test import binom_exact
+    obs, freq = [9, 3, 6, 2], [0.4, 0.1, 0.3, 0.2]
+    dist = st.multinomial(sum(obs), freq)
+    p = 0
+    for x in itertools.product(range(sum(obs) + 1), repeat=3):
+        if sum(x) <= sum(obs):
+            prob = dist.pmf(list(x) + [sum(obs) - sum(x)])
+            if prob <= dist.pmf(obs) * (1 + 1e-7):
+                p += prob
+    assert np.isclose(binom_exact(obs, freq).calc(), p, rtol=1e-9)
+
+def test_exact_test_fallback():
+    import threading
+    cancel = threading.Event()
+    cancel.set()
+    data = bs.dataset("fisher_exact_test.csv")
+    summary, result = bs.fisher_exact_test(data=data, variable_1="Frequency", variable_2="Result", n_jobs=2, seed=0, progress=lambda x: None, cancel=cancel)
+    assert result.index[0] == "Monte Carlo (Fallback)"
+    data = bs.dataset("binomial_test.csv")
+    summary, result = bs.binomial_test(data=data, variable="Flower", expect={"Purple":9, "Red":3, "Blue":3, "White":1}, max_nodes=0)
+    assert result.index[0] == "Normal (Fallback)"
+
+def test_fisher_exact_test_count():
+    data = bs.dataset("fisher_exact_test.csv")
+    agg = data.groupby(["Frequency", "Result"]).size().reset_index(name="Count")
+    (summary, result) = bs.fisher_exact_test(agg, "Frequency", "Result", count="Count")
+    assert summary.equals(bs.fisher_exact_test(data, "Frequency", "Result")[0])
+    assert result.equals(bs.fisher_exact_test(data, "Frequency", "Result")[1])
+
+def test_fisher_exact_test_large():
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"A": rng.integers(0, 5, 1000).astype(str), "B": rng.integers(0, 5, 1000).astype(str)})
+    summary, result = bs.fisher_exact_test(data=data, variable_1="A", variable_2="B", seed=0)
+    assert result.index[0] == "Monte Carlo (Fallback)"
+
+def test_binomial_test_large():
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"Class": rng.integers(0, 10, 500).astype(str)})
+    summary, result = bs.binomial_test(data=data, variable="Class", expect={str(i):1 for i in range(10)})
+    assert result.index[0] == "Normal (Fallback)"
@@ -0,0 +1,26 @@
+import biostats as bs
+import numpy as np
+
+variable = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+
+def test_mass_univariate_test():
+    data = bs.dataset("linear_discriminant_analysis.csv")
+    data.iloc[[3, 60, 120], 1] = np.nan
+    group = ["versicolor", "virginica"]
+    result = bs.mass_univariate_test(data=data, variable=variable, between="species", test="two-sample t-test", group=group, kind="unequal variances", correction="holm")
+    for (i, var) in enumerate(variable):
+        single = bs.two_sample_t_test(data=data, variable=var, between="species", group=group, kind="unequal variances")[1]
+        assert np.isclose(result["t Statistic"].iloc[i], single["t Statistic"].iloc[0])
+        assert np.isclose(result["Unadjusted p-value"].iloc[i], single["p-value"].iloc[0])
+    result = bs.mass_univariate_test(data=data, variable=variable, between="species", test="one-way anova")
+    for (i, var) in enumerate(variable):
+        single = bs.one_way_anova(data=data, variable=var, between="species")[1]
+        assert np.isclose(result["F Statistic"].iloc[i], single["F Statistic"].iloc[0])
+    result = bs.mass_univariate_test(data=data, variable=variable, between="species", test="wilcoxon rank-sum", group=group)
+    for (i, var) in enumerate(variable):
+        single = bs.wilcoxon_rank_sum_test(data=data, variable=var, between="species", group=group)[1]
+        assert np.isclose(result["z Statistic"].iloc[i], single["z Statistic"].iloc[0])
+    result = bs.mass_univariate_test(data=data, variable=variable, between="species", test="kruskal-wallis")
+    for (i, var) in enumerate(variable):
+        single = bs.kruskal_wallis_test(data=data, variable=var, between="species")[1]
+        assert np.isclose(result["Chi Square"].iloc[i], single["Chi Square"].iloc[0])
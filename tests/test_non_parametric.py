@@ -26,4 +26,55 @@ def test_friedman_test():
 
 def test_spearman_rank_correlation():
     data = bs.dataset("spearman_rank_correlation.csv")
-    summary, result = bs.spearman_rank_correlation(data=data, x="Volume", y="Pitch")
\ No newline at end of file
+    summary, result = bs.spearman_rank_correlation(data=data, x="Volume", y="Pitch")
+
+def test_wilcoxon_rank_sum_test_value():
+    import numpy as np
+    import pandas as pd
+    from scipy import stats as st
+    x, y = [1.1, 2.3, 0.7, 4.2, 3.3, 5.1, 2.9], [3.8, 6.2, 4.4, 5.9, 7.1, 6.6]
+    data = pd.DataFrame({"Value": x + y, "Group": ["a"] * len(x) + ["b"] * len(y)})
+    summary, result = bs.wilcoxon_rank_sum_test(data=data, variable="Value", between="Group", group=["a", "b"])
+    p = st.mannwhitneyu(x, y, method="exact").pvalue
+    assert np.isclose(result.loc["Exact", "p-value"], p, rtol=1e-9)
+
+def test_wilcoxon_signed_rank_test_value():
+    import numpy as np
+    import pandas as pd
+    from scipy import stats as st
+    x, y = [8.1, 10.0, 16.5, 13.6, 9.5, 8.3, 18.3], [11.2, 16.3, 15.3, 15.6, 10.5, 15.5, 12.7]
+    data = pd.DataFrame({"Value": x + y, "Month": ["a"] * 7 + ["b"] * 7, "ID": list(range(7)) * 2})
+    summary, result = bs.wilcoxon_signed_rank_test(data=data, variable="Value", between="Month", group=["a", "b"], pair="ID")
+    p = st.wilcoxon(x, y, method="exact").pvalue
+    assert np.isclose(result.loc["Exact", "p-value"], p, rtol=1e-9)
+
+def test_permutation_value():
+    import itertools
+    import numpy as np
+    from biostats.model.non_parametric import permutation
+    rank = np.array([1.5, 1.5, 3, 5, 5, 5, 7, 8.5, 8.5])
+    sums = np.array([sum(x) for x in itertools.combinations(rank, 4)])
+    R = 14.5
+    p = min(1, 2 * min((sums <= R).mean(), (sums >= R).mean()))
+    assert np.isclose(permutation(rank, 4).test(R), p, rtol=1e-9)
+
+def test_kruskal_wallis_test_exact():
+    import itertools
+    import numpy as np
+    import pandas as pd
+    values = [1.2, 3.4, 3.4, 0.5, 2.2, 5.1, 4.8, 6.0, 3.9]
+    groups = ["a"] * 3 + ["b"] * 2 + ["c"] * 4
+    data = pd.DataFrame({"Value": values, "Group": groups})
+    summary, result = bs.kruskal_wallis_test(data=data, variable="Value", between="Group", method="exact")
+    rank = pd.Series(values).rank().values
+    stat = lambda g: sum(rank[g == x].sum() ** 2 / (g == x).sum() for x in "abc")
+    obs = stat(np.array(groups))
+    perms = [np.array(g) for g in set(itertools.permutations(groups))]
+    p = np.mean([stat(g) >= obs - 1e-9 for g in perms])
+    assert np.isclose(result.loc["Exact", "p-value"], p, rtol=1e-9)
+    summary, result = bs.kruskal_wallis_test(data=data, variable="Value", between="Group", method="monte-carlo", seed=0)
+
+def test_friedman_test_exact():
+    data = bs.dataset("friedman_test.csv")
+    summary, result = bs.friedman_test(data=data, variable="response", between="drug", subject="patient", method="exact")
+    summary, result = bs.friedman_test(data=data, variable="response", between="drug", subject="patient", method="monte-carlo", seed=0)
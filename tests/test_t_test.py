@@ -14,4 +14,46 @@ def test_paired_t_test():
 
 def test_pairwise_t_test():
     data = bs.dataset("pairwise_t_test.csv")
-    summary, result = bs.pairwise_t_test(data=data, variable="Length", between="Location")
\ No newline at end of file
+    summary, result = bs.pairwise_t_test(data=data, variable="Length", between="Location")
+
+def test_t_test_stats():
+    import numpy as np
+    data = bs.dataset("two_sample_t_test.csv")
+    stats = data.groupby("Time")["Value"].agg(["count", "mean", "std"]).reset_index()
+    for kind in ("equal variances", "unequal variances"):
+        (summary, result) = bs.two_sample_t_test_stats(stats, "Time", "count", "mean", "std", ["2pm", "5pm"], kind)
+        (_summary, _result) = bs.two_sample_t_test(data, "Value", "Time", ["2pm", "5pm"], kind)
+        assert np.allclose(summary, _summary)
+        assert np.allclose(result.iloc[:, :3].astype(float), _result.iloc[:, :3].astype(float))
+    data = bs.dataset("pairwise_t_test.csv")
+    stats = data.groupby("Location", sort=False)["Length"].agg(["count", "mean", "std"]).reset_index()
+    (summary, result) = bs.pairwise_t_test_stats(stats, "Location", "count", "mean", "std")
+    (_summary, _result) = bs.pairwise_t_test(data, "Length", "Location")
+    assert np.allclose(summary.iloc[:, 1:].astype(float), _summary.iloc[:, 1:].astype(float))
+    assert np.allclose(result.iloc[:, 2:6].astype(float), _result.iloc[:, 2:6].astype(float))
+
+def test_pairwise_t_test_correction():
+    import numpy as np
+    from scipy import stats as st
+    from statsmodels.stats.multitest import multipletests
+    data = bs.dataset("pairwise_t_test.csv")
+    (_, result) = bs.pairwise_t_test(data, "Length", "Location")
+    raw = 2 * st.t.sf(np.abs(result["t Statistic"].to_numpy(dtype=float)), len(data) - 5)
+    for (correction, method) in (("bonferroni", "bonferroni"), ("holm", "holm"), ("benjamini-hochberg", "fdr_bh")):
+        (_, result) = bs.pairwise_t_test(data, "Length", "Location", correction=correction)
+        assert np.allclose(result["p-value"].to_numpy(dtype=float), multipletests(raw, method=method)[1])
+
+def test_paired_t_test_unmatched():
+    import pandas as pd
+    data = bs.dataset("paired_t_test.csv")
+    extra = pd.DataFrame({"Length": [0.5, 0.7, 0.1], "Feather": ["Typical", "Typical", "Odd"], "Bird": ["Z", "A", "Y"]})
+    (summary, result) = bs.paired_t_test(pd.concat([extra, data]), "Length", "Feather", ["Typical", "Odd"], "Bird")
+    assert result.equals(bs.paired_t_test(data[data["Bird"] != "A"], "Length", "Feather", ["Typical", "Odd"], "Bird")[1])
+
+def test_adjust_missing():
+    import numpy as np
+    from biostats.model.t_test import _adjust
+    p = np.array([0.01, np.nan, 0.02])
+    assert np.allclose(_adjust(p, "bonferroni"), [0.03, np.nan, 0.06], equal_nan=True)
+    assert np.allclose(_adjust(p, "holm"), [0.03, np.nan, 0.04], equal_nan=True)
+    assert np.allclose(_adjust(p, "benjamini-hochberg"), [0.03, np.nan, 0.03], equal_nan=True)
@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+from biostats.model.util import _process
+
+def test_process():
+    data = pd.DataFrame({"a": [1.0, 2.0, np.nan], "b": ["x", "1", "2"], "c": ["1", "2", "3"], "d": [0.5, 1.0, 2.0], "e": [1, 2, 3]})
+    _process(data, num=["e"])
+    assert list(data.dtypes.astype(str)) == ["Int64", "object", "Int64", "float64", "float64"]
+
+def test_process_inf():
+    first = pd.DataFrame({"v": [1.0, np.inf]})
+    _process(first)
+    second = pd.DataFrame({"v": [1.0, 2.0]})
+    _process(second)
+    assert str(first["v"].dtype) == "float64"
+    assert str(second["v"].dtype) == "Int64"